@@ -0,0 +1,342 @@
+"""
+Alert Engine - Persistent price alerts evaluated per tick
+Active alerts are indexed per metal in bisect-sorted arrays (one for
+'above', one for 'below'), so a price update only touches the alerts whose
+threshold it crossed. SQLite is the shared source of truth for every
+worker: each worker's index reloads when another connection commits,
+firing is claimed with a conditional UPDATE, and fired events are rows in
+alert_events whose ids serve /alerts, SSE streams and Last-Event-ID replay.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+ALERT_TYPES = ('above', 'below')
+
+
+class _MetalIndex:
+    """Sorted thresholds for one metal; keys and ids are parallel lists"""
+
+    __slots__ = ('above_keys', 'above_ids', 'below_keys', 'below_ids')
+
+    def __init__(self):
+        self.above_keys = []
+        self.above_ids = []
+        self.below_keys = []
+        self.below_ids = []
+
+    def add(self, alert_type: str, target: float, alert_id: str):
+        keys, ids = (self.above_keys, self.above_ids) if alert_type == 'above' else (self.below_keys, self.below_ids)
+        position = bisect_right(keys, target)
+        keys.insert(position, target)
+        ids.insert(position, alert_id)
+
+    def remove(self, alert_type: str, target: float, alert_id: str) -> bool:
+        keys, ids = (self.above_keys, self.above_ids) if alert_type == 'above' else (self.below_keys, self.below_ids)
+        position = bisect_left(keys, target)
+        while position < len(keys) and keys[position] == target:
+            if ids[position] == alert_id:
+                del keys[position]
+                del ids[position]
+                return True
+            position += 1
+        return False
+
+    def pop_crossed(self, price: float) -> List[str]:
+        """Remove and return every alert the price has reached"""
+        # 'above' alerts with target <= price sit at the front
+        cut = bisect_right(self.above_keys, price)
+        fired = self.above_ids[:cut]
+        del self.above_keys[:cut]
+        del self.above_ids[:cut]
+        # 'below' alerts with target >= price sit at the back
+        cut = bisect_left(self.below_keys, price)
+        fired.extend(self.below_ids[cut:])
+        del self.below_keys[cut:]
+        del self.below_ids[cut:]
+        return fired
+
+    def __len__(self):
+        return len(self.above_ids) + len(self.below_ids)
+
+
+class AlertEngine:
+    """
+    One-shot above/below price alerts backed by SQLite
+    """
+
+    def __init__(self, path: str, metals: Optional[Iterable[str]] = None, poll_interval: float = 1.0):
+        """
+        Args:
+            path: SQLite database file (':memory:' for a throwaway engine)
+            metals: Metals alerts may be set on (None accepts any)
+            poll_interval: Seconds between checks for new events in stream()
+        """
+        self.path = path
+        self.metals = {metal.lower() for metal in metals} if metals is not None else None
+        self.poll_interval = poll_interval
+        self.ticks = 0
+
+        self._alerts = {}  # id -> active alert, mirrored from SQLite
+        self._index = {}   # metal -> _MetalIndex
+        self._data_version = None
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS price_alerts (
+                id TEXT PRIMARY KEY,
+                metal TEXT NOT NULL,
+                type TEXT NOT NULL,
+                target_price REAL NOT NULL,
+                note TEXT,
+                created TEXT NOT NULL,
+                status TEXT NOT NULL,
+                triggered_at TEXT,
+                triggered_price REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_price_alerts_status ON price_alerts (status);
+            CREATE TABLE IF NOT EXISTS alert_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                alert_id TEXT NOT NULL,
+                created TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+        """)
+        self._conn.commit()
+        with self._lock:
+            self._sync_index()
+
+    def _sync_index(self):
+        """Reload active alerts if another connection has committed since the last load (caller holds _lock)"""
+        version = self._conn.execute('PRAGMA data_version').fetchone()[0]
+        if version == self._data_version:
+            return
+        self._data_version = version
+        self._alerts = {}
+        self._index = {}
+        rows = self._conn.execute(
+            "SELECT id, metal, type, target_price, note, created FROM price_alerts WHERE status = 'active'"
+        ).fetchall()
+        for row in rows:
+            alert = _alert_from_row(row)
+            self._alerts[alert['id']] = alert
+            self._index.setdefault(alert['metal'], _MetalIndex()).add(alert['type'], alert['target_price'], alert['id'])
+
+    def add(self, metal: str, target_price: float, alert_type: str = 'above',
+            note: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Create and persist an alert
+
+        Args:
+            metal: Metal name (one of metals, when configured)
+            target_price: Threshold in USD/tonne
+            alert_type: 'above' fires when price >= target, 'below' when price <= target
+            note: Optional free text returned with the fired event
+
+        Returns:
+            The stored alert
+        """
+        metal = metal.lower()
+        if self.metals is not None and metal not in self.metals:
+            raise ValueError(f'metal must be one of {sorted(self.metals)}')
+        if alert_type not in ALERT_TYPES:
+            raise ValueError(f'type must be one of {list(ALERT_TYPES)}')
+        target_price = float(target_price)
+        if target_price <= 0:
+            raise ValueError('target_price must be positive')
+
+        alert = {
+            'id': f'alert_{uuid.uuid4().hex[:12]}',
+            'metal': metal,
+            'type': alert_type,
+            'target_price': target_price,
+            'note': note,
+            'created': datetime.now().isoformat(),
+            'status': 'active'
+        }
+        with self._lock:
+            self._conn.execute(
+                """INSERT INTO price_alerts (id, metal, type, target_price, note, created, status)
+                   VALUES (?, ?, ?, ?, ?, ?, 'active')""",
+                (alert['id'], metal, alert_type, target_price, note, alert['created'])
+            )
+            self._conn.commit()
+            # Our own commits don't move data_version, so mirror the insert directly
+            self._alerts[alert['id']] = dict(alert)
+            self._index.setdefault(metal, _MetalIndex()).add(alert_type, target_price, alert['id'])
+        return alert
+
+    def cancel(self, alert_id: str) -> bool:
+        """Cancel an active alert; returns False if it is unknown or already fired"""
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE price_alerts SET status = 'cancelled' WHERE id = ? AND status = 'active'", (alert_id,)
+            )
+            self._conn.commit()
+            alert = self._alerts.pop(alert_id, None)
+            if alert is not None:
+                self._index[alert['metal']].remove(alert['type'], alert['target_price'], alert_id)
+        return cursor.rowcount == 1
+
+    def list_active(self, metal: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get active alerts from every worker, optionally for one metal"""
+        sql = "SELECT id, metal, type, target_price, note, created FROM price_alerts WHERE status = 'active'"
+        params = []
+        if metal is not None:
+            sql += ' AND metal = ?'
+            params.append(metal.lower())
+        with self._lock:
+            rows = self._conn.execute(sql + ' ORDER BY created', params).fetchall()
+        return [_alert_from_row(row) for row in rows]
+
+    def on_price(self, metal: str, price: float) -> List[Dict[str, Any]]:
+        """
+        Evaluate one price update
+
+        Args:
+            metal: Metal name
+            price: Latest price in USD/tonne
+
+        Returns:
+            Events for the alerts this worker fired
+        """
+        if not price or price <= 0:
+            return []
+        metal = metal.lower()
+        now = datetime.now().isoformat()
+        with self._lock:
+            self.ticks += 1
+            self._sync_index()
+            index = self._index.get(metal)
+            if index is None or not len(index):
+                return []
+            crossed = [self._alerts.pop(alert_id) for alert_id in index.pop_crossed(price)]
+            if not crossed:
+                return []
+
+            # Claim each alert; another worker (or a cancel) may already have changed it
+            events = []
+            with self._conn:
+                for alert in crossed:
+                    cursor = self._conn.execute(
+                        """UPDATE price_alerts SET status = 'triggered', triggered_at = ?, triggered_price = ?
+                           WHERE id = ? AND status = 'active'""",
+                        (now, round(price, 2), alert['id'])
+                    )
+                    if cursor.rowcount != 1:
+                        continue
+                    alert.update(status='triggered', triggered_at=now, triggered_price=round(price, 2))
+                    event = {
+                        'type': 'price_alert',
+                        'alert': alert,
+                        'metal': metal,
+                        'message': f"{metal.title()} at ${price:,.2f}/t crossed your {alert['type']} "
+                                   f"${alert['target_price']:,.2f}/t alert",
+                        'priority': 'high',
+                        'timestamp': now
+                    }
+                    event['event_id'] = self._conn.execute(
+                        'INSERT INTO alert_events (alert_id, created, data) VALUES (?, ?, ?)',
+                        (alert['id'], now, json.dumps(event))
+                    ).lastrowid
+                    events.append(event)
+        return events
+
+    def on_snapshot(self, snapshot) -> int:
+        """
+        PriceRefresher listener: evaluate every metal in a new snapshot
+
+        Returns:
+            Number of alerts fired
+        """
+        fired = 0
+        for metal, data in snapshot.to_response().get('lme_prices', {}).items():
+            if isinstance(data, dict) and 'error' not in data:
+                fired += len(self.on_price(metal, data.get('price_usd_per_tonne', 0)))
+        return fired
+
+    def recent_events(self, after_id: int = 0, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get fired events newer than after_id, newest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, data FROM alert_events WHERE id > ? ORDER BY id DESC LIMIT ?', (after_id, limit)
+            ).fetchall()
+        return [_event_from_row(row) for row in rows]
+
+    def events_after(self, after_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get fired events newer than after_id, oldest first (for streaming)"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, data FROM alert_events WHERE id > ? ORDER BY id LIMIT ?', (after_id, limit)
+            ).fetchall()
+        return [_event_from_row(row) for row in rows]
+
+    def last_event_id(self) -> int:
+        """Id of the newest fired event (0 if none)"""
+        with self._lock:
+            return self._conn.execute('SELECT COALESCE(MAX(id), 0) FROM alert_events').fetchone()[0]
+
+    def stream(self, last_event_id: Optional[int] = None, heartbeat: float = 15.0,
+               max_duration: Optional[float] = None) -> Iterator[str]:
+        """
+        Yield fired alerts as server-sent events, polling alert_events
+
+        Events after last_event_id (Last-Event-ID) are replayed first; without
+        one the stream starts at the newest event. A comment line is sent
+        every heartbeat seconds to keep proxies from closing the connection.
+        After max_duration seconds the stream ends; EventSource clients
+        reconnect with Last-Event-ID and miss nothing.
+        """
+        sent = self.last_event_id() if last_event_id is None else last_event_id
+        idle_since = started = time.monotonic()
+        while max_duration is None or time.monotonic() - started < max_duration:
+            events = self.events_after(sent)
+            for event in events:
+                sent = event['event_id']
+                yield format_sse(event)
+            if events:
+                idle_since = time.monotonic()
+                continue
+            if time.monotonic() - idle_since >= heartbeat:
+                idle_since = time.monotonic()
+                yield ': keep-alive\n\n'
+            time.sleep(self.poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get engine counters"""
+        with self._lock:
+            counts = dict(self._conn.execute(
+                'SELECT status, COUNT(*) FROM price_alerts GROUP BY status'
+            ).fetchall())
+            return {
+                'active_alerts': counts.get('active', 0),
+                'fired': counts.get('triggered', 0),
+                'metals_indexed': sum(1 for index in self._index.values() if len(index)),
+                'ticks': self.ticks
+            }
+
+
+def _alert_from_row(row) -> Dict[str, Any]:
+    alert_id, metal, alert_type, target, note, created = row
+    return {'id': alert_id, 'metal': metal, 'type': alert_type, 'target_price': target,
+            'note': note, 'created': created, 'status': 'active'}
+
+
+def _event_from_row(row) -> Dict[str, Any]:
+    event = json.loads(row[1])
+    event['event_id'] = row[0]
+    return event
+
+
+def format_sse(event: Dict[str, Any]) -> str:
+    """Format a fired alert as a server-sent event"""
+    return f"id: {event['event_id']}\nevent: price_alert\ndata: {json.dumps(event)}\n\n"
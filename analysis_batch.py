@@ -0,0 +1,330 @@
+"""
+Analysis Batch - Scheduled batch analysis for dashboard endpoints
+Computes the per-metal sentiment and recommendations for every metal in
+one multi-prompt LLM call per run. Results are stored with timestamps so
+/recommendations, /sentiment and /market-analysis become storage reads.
+When several workers share the result file, one of them holds a lock on
+it and runs the batch; the others reload the file when it changes.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; every worker then runs its own batch
+    fcntl = None
+
+from prompt_encoding import METAL_ORDER, render_market_data
+
+SENTIMENTS = ('bullish', 'bearish', 'neutral')
+ACTIONS = ('buy', 'sell', 'hold')
+
+# Failed runs are retried sooner than the regular schedule
+RETRY_SECONDS = 60
+
+# How often a worker that isn't running the batch checks the shared result
+FOLLOWER_POLL_SECONDS = 30
+
+BATCH_INSTRUCTIONS = """Produce the scheduled dashboard analysis for Sharif Metals Group.
+For EVERY metal listed below, answer each task from the current LME data above.
+
+Tasks per metal:
+1. sentiment: one of bullish, bearish, neutral
+2. confidence: number between 0 and 1
+3. action: one of buy, sell, hold
+4. target_price: USD/tonne number, or null
+5. reason: one sentence
+6. factors: up to three short market drivers
+
+Also give an overall market sentiment, confidence and up to five factors.
+
+Metals: {metals}
+
+Reply with JSON only, no prose, in exactly this shape:
+{{"overall": {{"sentiment": "...", "confidence": 0.0, "factors": ["..."]}},
+ "metals": {{"<metal>": {{"sentiment": "...", "confidence": 0.0, "action": "...", "target_price": 0, "reason": "...", "factors": ["..."]}}}}}}"""
+
+_FENCE_RE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+
+def build_batch_messages(system_prompt: str, market_data: Dict[str, Any],
+                         metals: List[str]) -> List[Dict[str, str]]:
+    """Build the single multi-prompt request covering every metal"""
+    return [
+        {'role': 'system', 'content': system_prompt},
+        {'role': 'system', 'content': f"Current LME market data:\n{render_market_data(market_data)}"},
+        {'role': 'user', 'content': BATCH_INSTRUCTIONS.format(metals=', '.join(metals))}
+    ]
+
+
+def _clamp_confidence(value: Any) -> Optional[float]:
+    try:
+        return round(min(1.0, max(0.0, float(value))), 2)
+    except (TypeError, ValueError):
+        return None
+
+
+def _as_choice(value: Any, choices: tuple, default: str) -> str:
+    value = str(value or '').strip().lower()
+    return value if value in choices else default
+
+
+def _as_factors(value: Any, limit: int) -> List[str]:
+    if not isinstance(value, list):
+        return []
+    return [str(factor) for factor in value if factor][:limit]
+
+
+def parse_batch_response(text: str, metals: List[str]) -> Dict[str, Any]:
+    """
+    Parse and validate the batched model reply
+
+    Args:
+        text: Raw completion text (JSON, optionally inside a code fence)
+        metals: Metals that were requested
+
+    Returns:
+        {'overall': {...}, 'metals': {metal: {...}}} with missing metals omitted
+
+    Raises:
+        ValueError: If the reply is not a JSON object
+    """
+    data = json.loads(_FENCE_RE.sub('', text.strip()))
+    if not isinstance(data, dict):
+        raise ValueError('Batch analysis reply is not a JSON object')
+
+    overall = data.get('overall') or {}
+    result = {
+        'overall': {
+            'sentiment': _as_choice(overall.get('sentiment'), SENTIMENTS, 'neutral'),
+            'confidence': _clamp_confidence(overall.get('confidence')),
+            'factors': _as_factors(overall.get('factors'), 5)
+        },
+        'metals': {}
+    }
+
+    replies = {str(k).lower(): v for k, v in (data.get('metals') or {}).items() if isinstance(v, dict)}
+    for metal in metals:
+        entry = replies.get(metal)
+        if entry is None:
+            continue
+        target_price = entry.get('target_price')
+        try:
+            target_price = round(float(target_price), 2) if target_price is not None else None
+        except (TypeError, ValueError):
+            target_price = None
+        result['metals'][metal] = {
+            'sentiment': _as_choice(entry.get('sentiment'), SENTIMENTS, 'neutral'),
+            'confidence': _clamp_confidence(entry.get('confidence')),
+            'action': _as_choice(entry.get('action'), ACTIONS, 'hold'),
+            'target_price': target_price,
+            'reason': str(entry.get('reason') or ''),
+            'factors': _as_factors(entry.get('factors'), 3)
+        }
+    return result
+
+
+class BatchAnalysisJob:
+    """
+    Runs the batched dashboard analysis on a schedule and serves the
+    latest stored result
+    """
+
+    def __init__(self, market_data_source: Callable[[], Dict[str, Any]],
+                 complete: Callable[[List[Dict[str, str]]], str],
+                 system_prompt: Callable[[], str], interval: float = 900.0,
+                 path: Optional[str] = None, metals: List[str] = METAL_ORDER,
+                 settlement_source: Optional[Callable[[], Dict[str, Any]]] = None):
+        """
+        Args:
+            market_data_source: Returns the current market data dictionary
+            complete: Sends chat messages to the LLM and returns the reply text
+            system_prompt: Returns the persona system prompt
+            interval: Seconds between batch runs
+            path: Optional JSON file the latest result is persisted to and
+                shared through (one worker runs the batch, see start)
+            metals: Metals analysed in each run
+            settlement_source: Optional; returns settlement prices stored with each result
+        """
+        self.market_data_source = market_data_source
+        self.complete = complete
+        self.system_prompt = system_prompt
+        self.interval = interval
+        self.path = path
+        self.metals = list(metals)
+        self.settlement_source = settlement_source
+        self.runs = 0
+        self.last_error = None
+        self.last_duration_seconds = None
+
+        self._result_mtime = None
+        self._result = self._load()
+        self._lock_file = None
+        self._run_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """
+        Start the background scheduler (no-op if already running)
+
+        With a result path, only the worker holding the path's lock file runs
+        the batch; the others follow the file and take over if it exits.
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='layla-batch-analysis', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stop the background scheduler"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._lock_file is not None:
+            self._lock_file.close()
+            self._lock_file = None
+
+    def run_once(self) -> Optional[Dict[str, Any]]:
+        """
+        Run one batched pass over every metal and store the result
+
+        Returns:
+            The stored result (the previous one if this run failed)
+        """
+        with self._run_lock:
+            started = time.monotonic()
+            try:
+                market_data = self.market_data_source()
+                if 'error' in market_data:
+                    raise ValueError(market_data['error'])
+                messages = build_batch_messages(self.system_prompt(), market_data, self.metals)
+                analysis = parse_batch_response(self.complete(messages), self.metals)
+            except Exception as e:
+                self.last_error = f'{datetime.now().isoformat()}: {str(e)}'
+                print(f"Error running batch analysis: {e}")
+                return self._result
+
+            analysis['generated_at'] = datetime.now().isoformat()
+            analysis['market_snapshot_version'] = market_data.get('snapshot_version')
+            if self.settlement_source is not None:
+                try:
+                    analysis['settlement'] = self.settlement_source()
+                except Exception as e:
+                    print(f"Error fetching settlement prices for batch analysis: {e}")
+                    analysis['settlement'] = {'error': str(e)}
+            self._result = analysis
+            self.runs += 1
+            self.last_error = None
+            self.last_duration_seconds = round(time.monotonic() - started, 2)
+            self._save(analysis)
+            return analysis
+
+    def get_result(self) -> Optional[Dict[str, Any]]:
+        """Get the latest stored analysis, or None if no run has succeeded yet"""
+        if not self.is_runner():
+            self._reload_if_changed()
+        return self._result
+
+    def is_runner(self) -> bool:
+        """Whether this worker runs the batch (always, without a shared path or flock)"""
+        return self._lock_file is not None or not self.path or fcntl is None
+
+    def age_seconds(self) -> Optional[float]:
+        """Seconds since the stored analysis was generated"""
+        result = self._result
+        if result is None:
+            return None
+        return (datetime.now() - datetime.fromisoformat(result['generated_at'])).total_seconds()
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get scheduler health information"""
+        age = self.age_seconds()
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'role': 'runner' if self.is_runner() else 'follower',
+            'interval_seconds': self.interval,
+            'runs': self.runs,
+            'generated_at': self._result['generated_at'] if self._result else None,
+            'age_seconds': round(age, 1) if age is not None else None,
+            'last_duration_seconds': self.last_duration_seconds,
+            'last_error': self.last_error
+        }
+
+    def _load(self) -> Optional[Dict[str, Any]]:
+        if not self.path or not os.path.exists(self.path):
+            return None
+        try:
+            mtime = os.stat(self.path).st_mtime
+            with open(self.path) as f:
+                result = json.load(f)
+            datetime.fromisoformat(result['generated_at'])
+            self._result_mtime = mtime
+            return result
+        except Exception as e:
+            print(f"Error loading stored batch analysis: {e}")
+            return None
+
+    def _reload_if_changed(self):
+        try:
+            mtime = os.stat(self.path).st_mtime
+        except OSError:
+            return
+        if mtime != self._result_mtime:
+            result = self._load()
+            if result is not None:
+                self._result = result
+
+    def _save(self, result: Dict[str, Any]):
+        if not self.path:
+            return
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(self.path)), suffix='.tmp')
+            with os.fdopen(fd, 'w') as f:
+                json.dump(result, f)
+            # Atomic replace so followers never read a half-written file
+            os.replace(tmp_path, self.path)
+            self._result_mtime = os.stat(self.path).st_mtime
+        except Exception as e:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            print(f"Error saving batch analysis: {e}")
+
+    def _try_become_runner(self) -> bool:
+        if self.is_runner():
+            return True
+        lock_file = open(f'{self.path}.lock', 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        # Held until this process exits (or stop), so exactly one worker runs the batch
+        self._lock_file = lock_file
+        self._reload_if_changed()
+        return True
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            if not self._try_become_runner():
+                self._reload_if_changed()
+                self._stop_event.wait(min(self.interval, FOLLOWER_POLL_SECONDS))
+                continue
+            age = self.age_seconds()
+            if age is not None and age < self.interval:
+                # A stored result from a previous process is reused until it is due
+                wait = self.interval - age
+            else:
+                self.run_once()
+                wait = self.interval if self.last_error is None else min(self.interval, RETRY_SECONDS)
+            self._stop_event.wait(wait)
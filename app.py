@@ -1,43 +1,64 @@
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
 from flask_cors import CORS
-import openai
 import os
 import json
+import hashlib
 import uuid
 from datetime import datetime
 import requests
 import random
+import sys
+from chat_stream import SSE_HEADERS, SSE_MIMETYPE, chat_events, wants_stream
+from http_transport import create_openai_client, transport_stats
+from conversation_store import SessionSweeper, create_conversation_store
+from response_cache import ResponseCache
 
 app = Flask(__name__)
 CORS(app)
 
-# OpenAI configuration with correct API format
-client = openai.OpenAI(
-    api_key=os.getenv('OPENAI_API_KEY'),
-    base_url=os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
-)
+# OpenAI client on the shared pooled keep-alive transport (see http_transport.py)
+client = create_openai_client()
+
+CHAT_COMPLETION_PARAMS = {
+    'model': 'gpt-4.1-mini',
+    'max_tokens': 500,
+    'temperature': 0.7
+}
 
-# In-memory storage for conversation context and learning
-conversation_memory = {}
+# Conversation context lives in a pluggable store (see conversation_store.py);
+# learning stats stay in memory
+conversation_store = create_conversation_store()
+session_sweeper = SessionSweeper(
+    conversation_store,
+    interval=float(os.getenv('CONVERSATION_SWEEP_INTERVAL', '300'))
+)
+session_sweeper.start()
 learning_data = {
     'layla': {'interactions': 0, 'total_rating': 0, 'feedback_count': 0},
     'alya': {'interactions': 0, 'total_rating': 0, 'feedback_count': 0}
 }
 
+# Answers to repeated questions are reused for the TTL; Layla's prompt prices are
+# simulated around fixed bases, so there is no upstream price move to key on
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('RESPONSE_CACHE_SIZE', '1000')),
+    ttl_seconds=float(os.getenv('RESPONSE_CACHE_TTL_SECONDS', '600'))
+)
+
+# Base prices from reliable sources (updated to match LME website more closely)
+LME_BASE_PRICES = {
+    'copper': 10084.89,    # Based on official LME data
+    'aluminum': 2660.84,   # Based on official LME data  
+    'zinc': 2933.64,       # Based on official LME data
+    'lead': 2156.30        # Based on official LME data
+}
+
 def get_accurate_lme_prices():
     """Get accurate LME prices using multiple reliable sources"""
     try:
-        # Base prices from reliable sources (updated to match LME website more closely)
-        base_prices = {
-            'copper': 10084.89,    # Based on official LME data
-            'aluminum': 2660.84,   # Based on official LME data  
-            'zinc': 2933.64,       # Based on official LME data
-            'lead': 2156.30        # Based on official LME data
-        }
-        
         # Add small realistic variations (±0.3%) to simulate real-time changes
         current_prices = {}
-        for metal, base_price in base_prices.items():
+        for metal, base_price in LME_BASE_PRICES.items():
             variation = random.uniform(-0.003, 0.003)  # ±0.3% variation
             current_price = base_price * (1 + variation)
             change_percent = variation * 100
@@ -63,10 +84,7 @@ def get_accurate_lme_prices():
 def get_conversation_context(session_id, assistant):
     """Get conversation context for the session"""
     try:
-        if session_id not in conversation_memory:
-            conversation_memory[session_id] = {'layla': [], 'alya': []}
-        
-        return conversation_memory[session_id].get(assistant, [])
+        return conversation_store.get(session_id, assistant)
     except Exception as e:
         print(f"Error getting context: {e}")
         return []
@@ -74,21 +92,26 @@ def get_conversation_context(session_id, assistant):
 def save_conversation_context(session_id, assistant, user_message, ai_response):
     """Save conversation context"""
     try:
-        if session_id not in conversation_memory:
-            conversation_memory[session_id] = {'layla': [], 'alya': []}
-        
-        conversation_memory[session_id][assistant].append({
+        # Keep only last 5 exchanges to manage memory
+        conversation_store.append(session_id, assistant, {
             'user': user_message,
             'assistant': ai_response,
             'timestamp': datetime.now().isoformat()
-        })
-        
-        # Keep only last 5 exchanges to manage memory
-        if len(conversation_memory[session_id][assistant]) > 5:
-            conversation_memory[session_id][assistant] = conversation_memory[session_id][assistant][-5:]
+        }, max_exchanges=5)
     except Exception as e:
         print(f"Error saving context: {e}")
 
+def stream_chat_response(assistant, session_id, user_message, messages, final_payload,
+                         cache_key=None, cached_response=None):
+    """Stream completion tokens as SSE, then save context and send the final payload"""
+    events = chat_events(
+        assistant,
+        lambda: client.chat.completions.create(messages=messages, stream=True, **CHAT_COMPLETION_PARAMS),
+        lambda ai_response: save_conversation_context(session_id, assistant, user_message, ai_response),
+        final_payload, response_cache, cache_key, cached_response
+    )
+    return Response(stream_with_context(events), mimetype=SSE_MIMETYPE, headers=SSE_HEADERS)
+
 def detect_topic(message, context):
     """Detect the current topic from message and context"""
     try:
@@ -122,6 +145,164 @@ def detect_topic(message, context):
         print(f"Error detecting topic: {e}")
         return 'general'
 
+def build_context_info(context, topic):
+    """Summarize the previous exchange for the system prompt"""
+    if not context:
+        return ""
+    last_exchange = context[-1]
+    return f"Previous discussion context: User asked about '{last_exchange['user']}' and you discussed {topic.replace('_', ' ')}. "
+
+# Static persona text is fixed at import so every request starts with a
+# byte-identical prefix that provider-side prompt caching can reuse.
+# Anything that varies per request goes in the dynamic suffix instead.
+LAYLA_SYSTEM_PREFIX = """You are Layla, an advanced AI trading assistant for Sharif Metals International (established 1963, over 60 years of excellence). You have conversation memory and adaptive learning capabilities.
+
+Enhanced capabilities:
+- Global supplier research with contact details and ratings
+- Predictive market analysis and forecasting
+- Comprehensive risk assessment
+- Real-time LME price integration
+
+IMPORTANT FORMATTING RULES:
+- Use double line breaks between paragraphs for better readability
+- Use bullet points with proper spacing
+- Structure responses with clear sections
+- Keep responses professional but readable"""
+
+ALYA_SYSTEM_PREFIX = """You are Alya, an advanced AI logistics assistant for Sharif Metals International (established 1963, over 60 years of excellence). You have conversation memory and adaptive learning capabilities.
+
+Enhanced capabilities:
+- Shipping company research with contact details and ratings
+- Real-time vessel tracking and route optimization
+- Customs laws research by country and metal type
+- Supply chain management and freight cost analysis
+
+IMPORTANT FORMATTING RULES:
+- Use double line breaks between paragraphs for better readability
+- Use bullet points with proper spacing
+- Structure responses with clear sections
+- Keep responses professional but readable"""
+
+SYSTEM_PREFIXES = {'layla': LAYLA_SYSTEM_PREFIX, 'alya': ALYA_SYSTEM_PREFIX}
+
+def get_prompt_prefix_fingerprints():
+    """Hash each static prompt prefix so operators can confirm it never changes between requests"""
+    return {name: hashlib.sha256(prefix.encode('utf-8')).hexdigest()[:16] for name, prefix in SYSTEM_PREFIXES.items()}
+
+def build_layla_dynamic_prompt(context_info, topic, market_data_info):
+    """Build the per-request part of Layla's system prompt"""
+    return f"""{context_info}Current LME Prices (accurate, real-time):
+- Copper: ${market_data_info['copper']['price']}/t ({market_data_info['copper']['change']:+.1f}%)
+- Aluminum: ${market_data_info['aluminum']['price']}/t ({market_data_info['aluminum']['change']:+.1f}%)
+- Zinc: ${market_data_info['zinc']['price']}/t ({market_data_info['zinc']['change']:+.1f}%)
+- Lead: ${market_data_info['lead']['price']}/t ({market_data_info['lead']['change']:+.1f}%)
+
+Topic context: {topic}"""
+
+def build_alya_dynamic_prompt(context_info, topic):
+    """Build the per-request part of Alya's system prompt"""
+    return f"""{context_info}Topic context: {topic}"""
+
+def build_chat_request(assistant, user_message, session_id):
+    """
+    Record the interaction and build the messages for a chat turn
+
+    Returns (messages, payload, cache_key) where payload holds the response
+    fields other than 'response' itself
+    """
+    # Update interaction count
+    learning_data[assistant]['interactions'] += 1
+    
+    # Get conversation context and detect topic
+    context = get_conversation_context(session_id, assistant)
+    topic = detect_topic(user_message, context)
+    context_info = build_context_info(context, topic)
+    
+    payload = {
+        'session_id': session_id,
+        'interaction_id': str(uuid.uuid4()),
+        'topic': topic
+    }
+    
+    if assistant == 'layla':
+        # Get current market data
+        market_data_info = get_accurate_lme_prices()
+        dynamic_prompt = build_layla_dynamic_prompt(context_info, topic, market_data_info)
+        payload['market_data'] = market_data_info
+    else:
+        dynamic_prompt = build_alya_dynamic_prompt(context_info, topic)
+    
+    previous_message = context[-1]['user'] if context else ''
+    cache_key = ResponseCache.make_key(assistant, user_message, topic, previous_message)
+    
+    messages = [
+        {"role": "system", "content": SYSTEM_PREFIXES[assistant]},
+        {"role": "system", "content": dynamic_prompt},
+        {"role": "user", "content": user_message}
+    ]
+    return messages, payload, cache_key
+
+def record_feedback(assistant, rating):
+    """Update learning data with a user rating"""
+    learning_data[assistant]['feedback_count'] += 1
+    learning_data[assistant]['total_rating'] += rating
+
+def summarize_learning_stats(assistant):
+    """Build the learning statistics response for an assistant"""
+    stats = learning_data.get(assistant, {})
+    avg_rating = 0
+    if stats.get('feedback_count', 0) > 0:
+        avg_rating = stats['total_rating'] / stats['feedback_count']
+    
+    return {
+        'interactions': stats.get('interactions', 0),
+        'avg_rating': round(avg_rating, 1),
+        'feedback_count': stats.get('feedback_count', 0)
+    }
+
+def get_process_rss_bytes():
+    """Get the current resident set size of this process, if available"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+def build_memory_stats():
+    """Build the memory accounting response used to size containers"""
+    learning_bytes = sys.getsizeof(learning_data) + sum(
+        sys.getsizeof(stats) + sum(sys.getsizeof(v) for v in stats.values())
+        for stats in learning_data.values()
+    )
+    return {
+        'conversations': conversation_store.stats(),
+        'sweeper': session_sweeper.get_status(),
+        'learning_data_approx_bytes': learning_bytes,
+        'process_rss_bytes': get_process_rss_bytes(),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def build_health_report():
+    """Build the health check response"""
+    return {
+        'status': 'healthy',
+        'features': [
+            'Accurate LME Prices',
+            'Conversation Memory', 
+            'Adaptive Learning',
+            'Context Awareness',
+            'Better Formatting'
+        ],
+        'lme_prices': get_accurate_lme_prices(),
+        'openai_status': 'connected',
+        'prompt_prefix_fingerprints': get_prompt_prefix_fingerprints(),
+        'response_cache': response_cache.stats(),
+        'http_transport': transport_stats()
+    }
+
 @app.route('/')
 def index():
     try:
@@ -132,18 +313,7 @@ def index():
 @app.route('/health')
 def health():
     try:
-        return jsonify({
-            'status': 'healthy',
-            'features': [
-                'Accurate LME Prices',
-                'Conversation Memory', 
-                'Adaptive Learning',
-                'Context Awareness',
-                'Better Formatting'
-            ],
-            'lme_prices': get_accurate_lme_prices(),
-            'openai_status': 'connected'
-        })
+        return jsonify(build_health_report())
     except Exception as e:
         return jsonify({'status': 'error', 'error': str(e)}), 500
 
@@ -164,68 +334,29 @@ def layla_chat():
         if not user_message.strip():
             return jsonify({'error': 'Message cannot be empty'}), 400
         
-        # Update interaction count
-        learning_data['layla']['interactions'] += 1
-        
-        # Get conversation context and detect topic
-        context = get_conversation_context(session_id, 'layla')
-        topic = detect_topic(user_message, context)
+        messages, payload, cache_key = build_chat_request('layla', user_message, session_id)
         
-        # Get current market data
-        market_data_info = get_accurate_lme_prices()
+        # Repeated questions at unchanged prices skip the LLM entirely
+        cached_response = response_cache.get(cache_key)
+        payload['cached'] = cached_response is not None
         
-        # Build context-aware prompt
-        context_info = ""
-        if context:
-            last_exchange = context[-1]
-            context_info = f"Previous discussion context: User asked about '{last_exchange['user']}' and you discussed {topic.replace('_', ' ')}. "
-        
-        # Create enhanced prompt with accurate market data
-        system_prompt = f"""You are Layla, an advanced AI trading assistant for Sharif Metals International (established 1963, over 60 years of excellence). You have conversation memory and adaptive learning capabilities.
-
-{context_info}Current LME Prices (accurate, real-time):
-- Copper: ${market_data_info['copper']['price']}/t ({market_data_info['copper']['change']:+.1f}%)
-- Aluminum: ${market_data_info['aluminum']['price']}/t ({market_data_info['aluminum']['change']:+.1f}%)
-- Zinc: ${market_data_info['zinc']['price']}/t ({market_data_info['zinc']['change']:+.1f}%)
-- Lead: ${market_data_info['lead']['price']}/t ({market_data_info['lead']['change']:+.1f}%)
-
-Enhanced capabilities:
-- Global supplier research with contact details and ratings
-- Predictive market analysis and forecasting
-- Comprehensive risk assessment
-- Real-time LME price integration
-
-IMPORTANT FORMATTING RULES:
-- Use double line breaks between paragraphs for better readability
-- Use bullet points with proper spacing
-- Structure responses with clear sections
-- Keep responses professional but readable
-
-Topic context: {topic}"""
+        if wants_stream(data, request.headers.get('Accept', '')):
+            return stream_chat_response('layla', session_id, user_message, messages, payload,
+                                        cache_key, cached_response)
 
-        # Generate response using correct OpenAI API format
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            max_tokens=500,
-            temperature=0.7
-        )
-        
-        ai_response = response.choices[0].message.content
+        if cached_response is not None:
+            ai_response = cached_response
+        else:
+            # Generate response using correct OpenAI API format
+            response = client.chat.completions.create(messages=messages, **CHAT_COMPLETION_PARAMS)
+            
+            ai_response = response.choices[0].message.content
+            response_cache.put(cache_key, ai_response)
         
         # Save conversation context
         save_conversation_context(session_id, 'layla', user_message, ai_response)
         
-        return jsonify({
-            'response': ai_response,
-            'session_id': session_id,
-            'interaction_id': str(uuid.uuid4()),
-            'topic': topic,
-            'market_data': market_data_info
-        })
+        return jsonify(dict(payload, response=ai_response))
         
     except Exception as e:
         print(f"Error in layla_chat: {e}")
@@ -241,57 +372,29 @@ def alya_chat():
         if not user_message.strip():
             return jsonify({'error': 'Message cannot be empty'}), 400
         
-        # Update interaction count
-        learning_data['alya']['interactions'] += 1
-        
-        # Get conversation context and detect topic
-        context = get_conversation_context(session_id, 'alya')
-        topic = detect_topic(user_message, context)
+        messages, payload, cache_key = build_chat_request('alya', user_message, session_id)
         
-        # Build context-aware prompt
-        context_info = ""
-        if context:
-            last_exchange = context[-1]
-            context_info = f"Previous discussion context: User asked about '{last_exchange['user']}' and you discussed {topic.replace('_', ' ')}. "
+        # Repeated questions at unchanged prices skip the LLM entirely
+        cached_response = response_cache.get(cache_key)
+        payload['cached'] = cached_response is not None
         
-        system_prompt = f"""You are Alya, an advanced AI logistics assistant for Sharif Metals International (established 1963, over 60 years of excellence). You have conversation memory and adaptive learning capabilities.
+        if wants_stream(data, request.headers.get('Accept', '')):
+            return stream_chat_response('alya', session_id, user_message, messages, payload,
+                                        cache_key, cached_response)
 
-{context_info}Enhanced capabilities:
-- Shipping company research with contact details and ratings
-- Real-time vessel tracking and route optimization
-- Customs laws research by country and metal type
-- Supply chain management and freight cost analysis
-
-IMPORTANT FORMATTING RULES:
-- Use double line breaks between paragraphs for better readability
-- Use bullet points with proper spacing
-- Structure responses with clear sections
-- Keep responses professional but readable
-
-Topic context: {topic}"""
-
-        # Generate response using correct OpenAI API format
-        response = client.chat.completions.create(
-            model="gpt-4.1-mini",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            max_tokens=500,
-            temperature=0.7
-        )
-        
-        ai_response = response.choices[0].message.content
+        if cached_response is not None:
+            ai_response = cached_response
+        else:
+            # Generate response using correct OpenAI API format
+            response = client.chat.completions.create(messages=messages, **CHAT_COMPLETION_PARAMS)
+            
+            ai_response = response.choices[0].message.content
+            response_cache.put(cache_key, ai_response)
         
         # Save conversation context
         save_conversation_context(session_id, 'alya', user_message, ai_response)
         
-        return jsonify({
-            'response': ai_response,
-            'session_id': session_id,
-            'interaction_id': str(uuid.uuid4()),
-            'topic': topic
-        })
+        return jsonify(dict(payload, response=ai_response))
         
     except Exception as e:
         print(f"Error in alya_chat: {e}")
@@ -308,29 +411,26 @@ def feedback():
             return jsonify({'error': 'Invalid assistant'}), 400
         
         # Update learning data
-        learning_data[assistant]['feedback_count'] += 1
-        learning_data[assistant]['total_rating'] += rating
+        record_feedback(assistant, rating)
         
         return jsonify({'status': 'success'})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/memory-stats')
+def memory_stats():
+    try:
+        return jsonify(build_memory_stats())
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/learning-stats/<assistant>')
 def learning_stats(assistant):
     try:
         if assistant not in learning_data:
             return jsonify({'error': 'Invalid assistant'}), 400
             
-        stats = learning_data.get(assistant, {})
-        avg_rating = 0
-        if stats.get('feedback_count', 0) > 0:
-            avg_rating = stats['total_rating'] / stats['feedback_count']
-        
-        return jsonify({
-            'interactions': stats.get('interactions', 0),
-            'avg_rating': round(avg_rating, 1),
-            'feedback_count': stats.get('feedback_count', 0)
-        })
+        return jsonify(summarize_learning_stats(assistant))
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -0,0 +1,223 @@
+"""
+Arbitrage Scanner - Ranked cross-venue spreads for every metal
+Quotes each metal on every venue in MarketDataProvider.metal_symbols (plus
+the live LME feed), normalizes units to USD/tonne and publishes all
+pairwise spreads in a structure ranked by spread, so reads are a lookup
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from datetime import datetime
+from itertools import combinations
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from metal_units import symbol_unit, to_usd_per_tonne
+
+LIVE_LME_VENUE = 'lme_feed'
+
+
+def cross_venue_metals(symbols_by_metal: Dict[str, Iterable[str]]) -> List[str]:
+    """
+    Metals quoted on at least two distinct contracts
+
+    Venues mapped to the same ticker are one market, so a metal needs two
+    different symbols before any spread carries information.
+    """
+    return sorted(metal for metal, symbols in symbols_by_metal.items() if len(set(symbols)) >= 2)
+
+
+def confidence_for(spread_percent: float) -> str:
+    """Rough confidence bucket for a spread size"""
+    if spread_percent >= 1.0:
+        return 'high'
+    if spread_percent >= 0.5:
+        return 'medium'
+    return 'low'
+
+
+class _ScanResult:
+    """Immutable ranked spreads from one scan"""
+
+    __slots__ = ('ranked', 'keys', 'by_metal', 'quotes', 'scanned_at')
+
+    def __init__(self, spreads: List[Dict[str, Any]], quotes: Dict[str, Any]):
+        # Ascending by spread percent so a threshold is one bisect away
+        ascending = sorted(spreads, key=lambda s: s['spread_percent'])
+        self.keys = [s['spread_percent'] for s in ascending]
+        self.ranked = ascending
+        self.by_metal = {}
+        for spread in reversed(ascending):
+            self.by_metal.setdefault(spread['metal'], []).append(spread)
+        self.quotes = quotes
+        self.scanned_at = datetime.now().isoformat()
+
+
+class ArbitrageScanner:
+    """
+    Periodically scans venue pairs and serves spreads ranked largest first
+    """
+
+    def __init__(self, venue_quotes: Callable[[], Dict[str, Dict[str, Dict[str, Any]]]],
+                 live_prices: Callable[[], Dict[str, Dict[str, Any]]] = None, interval: float = 60.0):
+        """
+        Args:
+            venue_quotes: Returns {metal: {venue: {'symbol', 'price', ...}}}
+            live_prices: Returns {metal: {'symbol', 'price_usd_per_tonne'}} from the
+                live LME feed (optional)
+            interval: Seconds between scans
+        """
+        self.venue_quotes = venue_quotes
+        self.live_prices = live_prices
+        self.interval = interval
+        self.scans = 0
+        self.last_error = None
+
+        self._result = _ScanResult([], {})
+        self._scan_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the background scan thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='arbitrage-scanner', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stop the background scan thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def normalize_quotes(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Fetch venue quotes and convert every price to USD/tonne"""
+        normalized = {}
+        for metal, venues in self.venue_quotes().items():
+            # Venues mapped to the same symbol are one quote (e.g. 'comex+lme+yahoo')
+            by_symbol = {}
+            for venue, quote in sorted(venues.items()):
+                if 'error' in quote or not quote.get('price'):
+                    continue
+                by_symbol.setdefault(quote['symbol'], ([], quote))[0].append(venue)
+            for symbol, (venue_names, quote) in by_symbol.items():
+                normalized.setdefault(metal, {})['+'.join(venue_names)] = {
+                    'symbol': symbol,
+                    'quoted_price': quote['price'],
+                    'quoted_unit': f'USD/{symbol_unit(symbol)}',
+                    'price_usd_per_tonne': round(to_usd_per_tonne(quote['price'], symbol), 2)
+                }
+
+        if self.live_prices is not None:
+            for metal, live in self.live_prices().items():
+                price = live.get('price_usd_per_tonne')
+                if metal not in normalized or not price:
+                    continue
+                # The live feed re-quotes a ticker; against the same ticker it is no spread
+                if any(quote['symbol'] == live.get('symbol') for quote in normalized[metal].values()):
+                    continue
+                normalized[metal][LIVE_LME_VENUE] = {
+                    'symbol': live.get('symbol') or LIVE_LME_VENUE,
+                    'quoted_price': price,
+                    'quoted_unit': 'USD/tonne',
+                    'price_usd_per_tonne': round(price, 2)
+                }
+        return normalized
+
+    @staticmethod
+    def compute_spreads(quotes: Dict[str, Dict[str, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Compute the spread for every venue pair of every metal
+
+        Pairs quoting the same symbol carry no information and are skipped.
+        """
+        spreads = []
+        for metal, venues in quotes.items():
+            for (venue_a, a), (venue_b, b) in combinations(sorted(venues.items()), 2):
+                if a['symbol'] == b['symbol']:
+                    continue
+                low, high = (venue_a, a), (venue_b, b)
+                if a['price_usd_per_tonne'] > b['price_usd_per_tonne']:
+                    low, high = high, low
+                spread = high[1]['price_usd_per_tonne'] - low[1]['price_usd_per_tonne']
+                spread_percent = spread / low[1]['price_usd_per_tonne'] * 100
+                spreads.append({
+                    'type': 'exchange_arbitrage',
+                    'metal': metal,
+                    'buy_venue': low[0],
+                    'sell_venue': high[0],
+                    'buy_price_usd_per_tonne': low[1]['price_usd_per_tonne'],
+                    'sell_price_usd_per_tonne': high[1]['price_usd_per_tonne'],
+                    'spread': round(spread, 2),
+                    'spread_percent': round(spread_percent, 4),
+                    'unit': 'USD/tonne',
+                    'confidence': confidence_for(spread_percent)
+                })
+        return spreads
+
+    def scan(self) -> int:
+        """
+        Run one scan and publish the ranked result
+
+        Returns:
+            Number of venue pairs priced
+        """
+        with self._scan_lock:
+            try:
+                quotes = self.normalize_quotes()
+                spreads = self.compute_spreads(quotes)
+            except Exception as e:
+                self.last_error = f'{datetime.now().isoformat()}: {str(e)}'
+                print(f"Error scanning arbitrage spreads: {e}")
+                return 0
+            # Single reference swap; readers always see a complete scan
+            self._result = _ScanResult(spreads, quotes)
+            self.scans += 1
+            self.last_error = None
+            return len(spreads)
+
+    def get_opportunities(self, min_spread_percent: float = 0.0, metal: Optional[str] = None,
+                          limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Get spreads at or above a threshold, largest first
+
+        Args:
+            min_spread_percent: Minimum spread as a percent of the cheaper venue's price
+            metal: Only this metal
+            limit: Maximum number of results
+
+        Returns:
+            List of spread entries (shared; treat as read-only)
+        """
+        result = self._result
+        if metal is not None:
+            ranked = result.by_metal.get(metal.lower(), [])
+            cut = len(ranked)
+            while cut and ranked[cut - 1]['spread_percent'] < min_spread_percent:
+                cut -= 1
+            return ranked[:min(cut, limit)]
+        start = max(bisect_right(result.keys, min_spread_percent - 1e-12), len(result.keys) - limit)
+        return result.ranked[start:][::-1]
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get scanner health information"""
+        result = self._result
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval_seconds': self.interval,
+            'scans': self.scans,
+            'pairs': len(result.ranked),
+            'metals_quoted': len(result.quotes),
+            'scanned_at': result.scanned_at if self.scans else None,
+            'last_error': self.last_error
+        }
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            self.scan()
+            elapsed = time.monotonic() - started
+            self._stop_event.wait(max(0.0, self.interval - elapsed))
@@ -0,0 +1,159 @@
+"""
+ASGI entry point - async serving for the Layla/Alya chat app
+Serves the same routes and JSON shapes as app.py, but chat calls go through
+the async OpenAI client so one process can hold hundreds of in-flight
+conversations instead of one per worker.
+
+Conversation storage (SQLite) and market data reads are blocking, so they
+run on worker threads via asyncio.to_thread rather than on the event loop.
+
+Run with: hypercorn --bind 0.0.0.0:$PORT asgi:app
+"""
+
+import asyncio
+import os
+import uuid
+
+from quart import Quart, Response, jsonify, render_template, request
+
+from app import (
+    CHAT_COMPLETION_PARAMS,
+    build_chat_request,
+    build_health_report,
+    build_memory_stats,
+    get_accurate_lme_prices,
+    learning_data,
+    record_feedback,
+    response_cache,
+    save_conversation_context,
+    summarize_learning_stats,
+)
+from chat_stream import SSE_HEADERS, SSE_MIMETYPE, async_chat_events, wants_stream
+from http_transport import create_async_openai_client
+
+app = Quart(__name__)
+
+async_client = create_async_openai_client()
+
+@app.after_request
+async def add_cors_headers(response):
+    # Same permissive policy as CORS(app) in app.py
+    response.headers['Access-Control-Allow-Origin'] = '*'
+    response.headers['Access-Control-Allow-Headers'] = 'Content-Type'
+    response.headers['Access-Control-Allow-Methods'] = 'GET, POST, OPTIONS'
+    return response
+
+def stream_chat_response(assistant, session_id, user_message, messages, payload,
+                         cache_key=None, cached_response=None):
+    """Stream completion tokens as SSE, then save context and send the final payload"""
+    events = async_chat_events(
+        assistant,
+        lambda: async_client.chat.completions.create(messages=messages, stream=True, **CHAT_COMPLETION_PARAMS),
+        lambda ai_response: asyncio.to_thread(save_conversation_context, session_id, assistant,
+                                              user_message, ai_response),
+        payload, response_cache, cache_key, cached_response
+    )
+    response = Response(events, mimetype=SSE_MIMETYPE, headers=SSE_HEADERS)
+    response.timeout = None
+    return response
+
+async def handle_chat(assistant):
+    try:
+        data = await request.get_json()
+        user_message = data.get('message', '')
+        session_id = data.get('session_id', str(uuid.uuid4()))
+
+        if not user_message.strip():
+            return jsonify({'error': 'Message cannot be empty'}), 400
+
+        messages, payload, cache_key = await asyncio.to_thread(build_chat_request, assistant, user_message, session_id)
+
+        # Repeated questions at unchanged prices skip the LLM entirely
+        cached_response = response_cache.get(cache_key)
+        payload['cached'] = cached_response is not None
+
+        if wants_stream(data, request.headers.get('Accept', '')):
+            return stream_chat_response(assistant, session_id, user_message, messages, payload,
+                                        cache_key, cached_response)
+
+        if cached_response is not None:
+            ai_response = cached_response
+        else:
+            response = await async_client.chat.completions.create(messages=messages, **CHAT_COMPLETION_PARAMS)
+
+            ai_response = response.choices[0].message.content
+            response_cache.put(cache_key, ai_response)
+
+        # Save conversation context
+        await asyncio.to_thread(save_conversation_context, session_id, assistant, user_message, ai_response)
+
+        return jsonify(dict(payload, response=ai_response))
+
+    except Exception as e:
+        print(f"Error in {assistant}_chat: {e}")
+        return jsonify({'error': f'Chat service temporarily unavailable: {str(e)}'}), 500
+
+@app.route('/')
+async def index():
+    try:
+        return await render_template('index.html')
+    except Exception as e:
+        return f"Error loading page: {str(e)}", 500
+
+@app.route('/health')
+async def health():
+    try:
+        return jsonify(await asyncio.to_thread(build_health_report))
+    except Exception as e:
+        return jsonify({'status': 'error', 'error': str(e)}), 500
+
+@app.route('/api/market-data')
+async def market_data():
+    try:
+        return jsonify(await asyncio.to_thread(get_accurate_lme_prices))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/layla/chat', methods=['POST'])
+async def layla_chat():
+    return await handle_chat('layla')
+
+@app.route('/api/alya/chat', methods=['POST'])
+async def alya_chat():
+    return await handle_chat('alya')
+
+@app.route('/api/feedback', methods=['POST'])
+async def feedback():
+    try:
+        data = await request.get_json()
+        assistant = data.get('assistant', 'layla')
+        rating = data.get('rating', 3)
+
+        if assistant not in learning_data:
+            return jsonify({'error': 'Invalid assistant'}), 400
+
+        record_feedback(assistant, rating)
+
+        return jsonify({'status': 'success'})
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/memory-stats')
+async def memory_stats():
+    try:
+        return jsonify(await asyncio.to_thread(build_memory_stats))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/learning-stats/<assistant>')
+async def learning_stats(assistant):
+    try:
+        if assistant not in learning_data:
+            return jsonify({'error': 'Invalid assistant'}), 400
+
+        return jsonify(summarize_learning_stats(assistant))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000, debug=False)
@@ -0,0 +1,344 @@
+"""
+Bar Store - Local on-disk OHLCV history with incremental backfill
+Keeps one append-only file of fixed-width bar records per symbol and
+interval. Reads are local; upstream is only asked for bars newer than the
+last stored timestamp (or for older history the store has never covered).
+Files are memory-mapped, so a range read is a binary search plus a
+zero-copy slice.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Not available on Windows; the in-process lock still applies
+    fcntl = None
+
+from ohlcv import BAR_DTYPE
+
+# Seconds covered by each chart range; 'max' has no lower bound
+RANGE_SECONDS = {
+    '1d': 86400,
+    '5d': 5 * 86400,
+    '1mo': 31 * 86400,
+    '3mo': 92 * 86400,
+    '6mo': 183 * 86400,
+    '1y': 366 * 86400,
+    '2y': 731 * 86400,
+    '5y': 1827 * 86400,
+    '10y': 3653 * 86400,
+    'max': None
+}
+
+# Stored history may start this much after the requested start without a
+# refetch (weekends, holidays, exchange closures)
+COVERAGE_SLACK_SECONDS = 7 * 86400
+
+HISTORY_FORMATS = ('csv', 'binary')
+
+# Bar intervals served from the archive (each one is a separate file per symbol)
+HISTORY_INTERVALS = ('1d', '1wk', '1mo')
+
+_UNSAFE_CHARS = re.compile(r'[^A-Za-z0-9_.-]')
+
+
+def covering_range(seconds: float) -> str:
+    """Smallest chart range that reaches back at least the given number of seconds"""
+    for name, span in RANGE_SECONDS.items():
+        if span is None or span >= seconds:
+            return name
+    return 'max'
+
+
+class BarStore:
+    """
+    Per-symbol, per-interval bar files with incremental upstream sync
+
+    Layout under root: <SYMBOL>_<interval>.bin holds BAR_DTYPE records in
+    timestamp order; <SYMBOL>_<interval>.json holds sync metadata.
+    """
+
+    def __init__(self, root: str, refresh_seconds: float = 300.0):
+        """
+        Args:
+            root: Directory holding the bar files
+            refresh_seconds: Minimum time between upstream syncs of one file
+        """
+        self.root = root
+        self.refresh_seconds = refresh_seconds
+        self.upstream_calls = 0
+        self.bars_fetched = 0
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+        self._maps = {}  # path -> (inode, size, memmap)
+        self._maps_lock = threading.Lock()
+
+    def _base_path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, _UNSAFE_CHARS.sub('_', f'{symbol}_{interval}'))
+
+    def data_path(self, symbol: str, interval: str) -> str:
+        """Path of the bar file for a symbol and interval"""
+        return self._base_path(symbol, interval) + '.bin'
+
+    @contextmanager
+    def _lock(self, symbol: str, interval: str):
+        """Serialize syncs of one file across threads and worker processes"""
+        key = (symbol, interval)
+        with self._locks_lock:
+            lock = self._locks.get(key)
+            if lock is None:
+                lock = self._locks[key] = threading.Lock()
+        with lock:
+            if fcntl is None:
+                yield
+                return
+            os.makedirs(self.root, exist_ok=True)
+            with open(self._base_path(symbol, interval) + '.lock', 'w') as lock_file:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+                try:
+                    yield
+                finally:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load_meta(self, symbol: str, interval: str) -> Dict[str, Any]:
+        try:
+            with open(self._base_path(symbol, interval) + '.json') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_meta(self, symbol: str, interval: str, meta: Dict[str, Any]):
+        path = self._base_path(symbol, interval) + '.json'
+        with open(path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(path + '.tmp', path)
+
+    def _map(self, symbol: str, interval: str) -> np.ndarray:
+        """
+        Memory-map a bar file read-only, reusing the mapping until the file changes
+
+        Files only grow in place or are atomically replaced, so an existing
+        mapping always stays valid; a new one is made when the size or inode
+        changes.
+        """
+        path = self.data_path(symbol, interval)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return np.empty(0, dtype=BAR_DTYPE)
+        # Ignore a trailing partial record from an append in progress
+        rows = stat.st_size // BAR_DTYPE.itemsize
+        if rows == 0:
+            return np.empty(0, dtype=BAR_DTYPE)
+        with self._maps_lock:
+            cached = self._maps.get(path)
+            if cached is not None and cached[0] == stat.st_ino and cached[1] == rows:
+                return cached[2]
+            bars = np.memmap(path, dtype=BAR_DTYPE, mode='r', shape=(rows,))
+            self._maps[path] = (stat.st_ino, rows, bars)
+            return bars
+
+    def read(self, symbol: str, interval: str, start: Optional[float] = None,
+             end: Optional[float] = None) -> np.ndarray:
+        """
+        Read stored bars, optionally limited to [start, end] epoch seconds
+
+        The range is located by binary search on the timestamp column and
+        returned as a zero-copy slice of the memory-mapped file.
+
+        Returns:
+            Read-only BAR_DTYPE array sorted by timestamp (empty if nothing is stored)
+        """
+        bars = self._map(symbol, interval)
+        timestamps = bars['timestamp']
+        lo = int(np.searchsorted(timestamps, start, side='left')) if start is not None else 0
+        hi = int(np.searchsorted(timestamps, end, side='right')) if end is not None else len(bars)
+        return bars[lo:hi]
+
+    def last_timestamp(self, symbol: str, interval: str) -> Optional[int]:
+        """Timestamp of the newest stored bar, read from the end of the file"""
+        path = self.data_path(symbol, interval)
+        try:
+            with open(path, 'rb') as f:
+                f.seek(0, os.SEEK_END)
+                size = f.tell() - f.tell() % BAR_DTYPE.itemsize
+                if size == 0:
+                    return None
+                f.seek(size - BAR_DTYPE.itemsize)
+                return int(np.frombuffer(f.read(BAR_DTYPE.itemsize), dtype=BAR_DTYPE)['timestamp'][0])
+        except FileNotFoundError:
+            return None
+
+    def append(self, symbol: str, interval: str, bars: np.ndarray) -> int:
+        """
+        Add bars to a file
+
+        Bars newer than the last stored one are appended; a bar with the
+        same timestamp as the last stored one replaces it (today's bar is
+        still forming). Bars older than that trigger a full merge-rewrite.
+
+        Returns:
+            Number of bars written (new bars only, for a merge-rewrite)
+        """
+        if len(bars) == 0:
+            return 0
+        bars = np.sort(bars.astype(BAR_DTYPE, copy=False), order='timestamp', kind='stable')
+        os.makedirs(self.root, exist_ok=True)
+        path = self.data_path(symbol, interval)
+        last = self.last_timestamp(symbol, interval)
+
+        if last is None or bars['timestamp'][0] >= last:
+            tail = bars[bars['timestamp'] >= last] if last is not None else bars
+            tail = _dedupe(tail)
+            with open(path, 'r+b' if last is not None else 'wb') as f:
+                f.seek(0, os.SEEK_END)
+                end = f.tell() - f.tell() % BAR_DTYPE.itemsize
+                if last is not None and tail['timestamp'][0] == last:
+                    end -= BAR_DTYPE.itemsize
+                # Overwrite in place and never shrink, so live memory maps stay valid
+                f.seek(end)
+                f.write(tail.tobytes())
+            return len(tail)
+
+        # Older history than we hold: merge and replace the file atomically
+        existing = np.asarray(self.read(symbol, interval))
+        merged = _dedupe(np.sort(np.concatenate([existing, bars]), order='timestamp', kind='stable'))
+        merged.tofile(path + '.tmp')
+        os.replace(path + '.tmp', path)
+        return len(merged) - len(existing)
+
+    def get_bars(self, symbol: str, interval: str, period: str,
+                 fetch: Callable[[str], Optional[np.ndarray]]) -> np.ndarray:
+        """
+        Get bars covering a chart range, syncing from upstream only as needed
+
+        Args:
+            symbol: Ticker symbol
+            interval: Bar interval (e.g. '1d')
+            period: Chart range (keys of RANGE_SECONDS)
+            fetch: fetch(range) -> BAR_DTYPE array from upstream, or None
+
+        Returns:
+            Stored bars within the requested range
+        """
+        start = self.sync(symbol, interval, period, fetch)
+        return self.read(symbol, interval, start)
+
+    def sync(self, symbol: str, interval: str, period: str,
+             fetch: Callable[[str], Optional[np.ndarray]]) -> Optional[float]:
+        """
+        Bring a file up to date for a chart range (see get_bars)
+
+        Returns:
+            Start of the range in epoch seconds (None for 'max')
+        """
+        if period not in RANGE_SECONDS:
+            raise ValueError(f'Unsupported range {period!r}')
+        now = time.time()
+        span = RANGE_SECONDS[period]
+        start = now - span if span is not None else None
+
+        with self._lock(symbol, interval):
+            meta = self._load_meta(symbol, interval)
+            last = self.last_timestamp(symbol, interval)
+            covered_from = meta.get('covered_from')
+            covered = last is not None and (
+                meta.get('covered_max') or
+                (start is not None and covered_from is not None and covered_from <= start + COVERAGE_SLACK_SECONDS)
+            )
+
+            if not covered:
+                request_range = period
+            elif now - meta.get('synced_at', 0) >= self.refresh_seconds:
+                # Only ask for what is missing since the newest stored bar
+                request_range = covering_range(now - last + 86400)
+            else:
+                request_range = None
+
+            if request_range is not None:
+                try:
+                    fetched = fetch(request_range)
+                    self.upstream_calls += 1
+                except Exception as e:
+                    fetched = None
+                    print(f"Error syncing {symbol} {interval} bars: {e}")
+                if fetched is not None and covered:
+                    # The delta range always reaches back past the newest stored bar;
+                    # those older bars are already held, so keep the append path
+                    fetched = fetched[fetched['timestamp'] >= last]
+                if fetched is not None:
+                    self.bars_fetched += self.append(symbol, interval, fetched)
+                    meta['synced_at'] = now
+                    if not covered:
+                        if span is None:
+                            meta['covered_max'] = True
+                        else:
+                            meta['covered_from'] = min(start, covered_from or start)
+                    self._save_meta(symbol, interval, meta)
+
+        return start
+
+    def stats(self) -> Dict[str, Any]:
+        """Get store counters"""
+        files = [name for name in os.listdir(self.root) if name.endswith('.bin')] if os.path.isdir(self.root) else []
+        return {
+            'root': self.root,
+            'files': len(files),
+            'bytes': sum(os.path.getsize(os.path.join(self.root, name)) for name in files),
+            'upstream_calls': self.upstream_calls,
+            'bars_fetched': self.bars_fetched
+        }
+
+
+def stream_bars(bars: np.ndarray, fmt: str = 'csv', chunk_rows: int = 4096) -> Iterator[bytes]:
+    """
+    Encode bars chunk by chunk without building per-row Python objects
+
+    Args:
+        bars: BAR_DTYPE array (typically a memory-mapped slice)
+        fmt: 'csv' (header + one line per bar) or 'binary' (raw 48-byte records)
+        chunk_rows: Bars per yielded chunk
+
+    Yields:
+        Encoded chunks
+    """
+    if fmt == 'binary':
+        for offset in range(0, len(bars), chunk_rows):
+            yield bars[offset:offset + chunk_rows].tobytes()
+        return
+    if fmt != 'csv':
+        raise ValueError(f'Unknown history format {fmt!r}. Available: {list(HISTORY_FORMATS)}')
+
+    yield b'timestamp,datetime,open,high,low,close,volume\n'
+    for offset in range(0, len(bars), chunk_rows):
+        chunk = bars[offset:offset + chunk_rows]
+        columns = [
+            chunk['timestamp'].astype(str),
+            chunk['timestamp'].astype('datetime64[s]').astype(str)
+        ]
+        columns += [np.char.mod('%.10g', chunk[field]) for field in ('open', 'high', 'low', 'close')]
+        columns.append(chunk['volume'].astype(str))
+        yield ('\n'.join(map(','.join, zip(*columns))) + '\n').encode('ascii')
+
+
+def _dedupe(bars: np.ndarray) -> np.ndarray:
+    """Drop earlier duplicates of a timestamp, keeping the most recent bar"""
+    if len(bars) < 2:
+        return bars
+    keep = np.append(bars['timestamp'][1:] != bars['timestamp'][:-1], True)
+    return bars[keep]
+
+
+# Process-wide store shared by the market data providers
+default_bar_store = BarStore(
+    os.getenv('BAR_STORE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'bars')),
+    refresh_seconds=float(os.getenv('BAR_STORE_REFRESH_SECONDS', '300'))
+)
@@ -0,0 +1,101 @@
+"""
+Chat Stream - Server-sent events for streamed chat completions
+Shared by the Flask (app.py) and Quart (asgi.py) entry points: content
+negotiation, SSE framing and the token/error/done event sequence live here,
+so the two only differ in how they open the completion and save context.
+"""
+
+import json
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Iterable, Iterator, Optional
+
+SSE_MIMETYPE = 'text/event-stream'
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+
+def wants_stream(data: Dict[str, Any], accept: str = '') -> bool:
+    """Check whether the client asked for a server-sent events response"""
+    return bool(data.get('stream')) or SSE_MIMETYPE in (accept or '')
+
+
+def sse_event(data: Any, event: Optional[str] = None) -> str:
+    """Format a server-sent event"""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+def _chunk_token(chunk) -> Optional[str]:
+    return chunk.choices[0].delta.content if chunk.choices else None
+
+
+def _error_event(assistant: str, e: Exception) -> str:
+    print(f"Error in {assistant}_chat stream: {e}")
+    return sse_event({'error': f'Chat service temporarily unavailable: {str(e)}'}, event='error')
+
+
+def chat_events(assistant: str, open_stream: Callable[[], Iterable], save: Callable[[str], None],
+                payload: Dict[str, Any], response_cache=None, cache_key: Optional[Hashable] = None,
+                cached_response: Optional[str] = None) -> Iterator[str]:
+    """
+    Yield a chat turn as SSE: one 'token' event per delta, then 'done'
+
+    Args:
+        assistant: Assistant name, for error logs
+        open_stream: Starts the streamed completion (not called on a cache hit)
+        save: Stores the full response once it has been delivered
+        payload: Response fields sent with the 'done' event
+        response_cache: Cache the full response is stored in
+        cache_key: Key for response_cache
+        cached_response: Cached answer to replay instead of calling the model
+    """
+    chunks = []
+    if cached_response is not None:
+        chunks.append(cached_response)
+        yield sse_event({'token': cached_response}, event='token')
+    else:
+        try:
+            for chunk in open_stream():
+                token = _chunk_token(chunk)
+                if token:
+                    chunks.append(token)
+                    yield sse_event({'token': token}, event='token')
+        except Exception as e:
+            yield _error_event(assistant, e)
+            return
+
+    ai_response = ''.join(chunks)
+    if response_cache is not None and cache_key is not None and cached_response is None:
+        response_cache.put(cache_key, ai_response)
+
+    # Only remember the exchange once the full response has been delivered
+    save(ai_response)
+
+    yield sse_event(dict(payload, response=ai_response), event='done')
+
+
+async def async_chat_events(assistant: str, open_stream: Callable[[], Awaitable], save: Callable[[str], Awaitable],
+                            payload: Dict[str, Any], response_cache=None, cache_key: Optional[Hashable] = None,
+                            cached_response: Optional[str] = None) -> AsyncIterator[str]:
+    """Async variant of chat_events for the async OpenAI client"""
+    chunks = []
+    if cached_response is not None:
+        chunks.append(cached_response)
+        yield sse_event({'token': cached_response}, event='token')
+    else:
+        try:
+            async for chunk in await open_stream():
+                token = _chunk_token(chunk)
+                if token:
+                    chunks.append(token)
+                    yield sse_event({'token': token}, event='token')
+        except Exception as e:
+            yield _error_event(assistant, e)
+            return
+
+    ai_response = ''.join(chunks)
+    if response_cache is not None and cache_key is not None and cached_response is None:
+        response_cache.put(cache_key, ai_response)
+
+    # Only remember the exchange once the full response has been delivered
+    await save(ai_response)
+
+    yield sse_event(dict(payload, response=ai_response), event='done')
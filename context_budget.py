@@ -0,0 +1,161 @@
+"""
+Context Budget - Token-budgeted prompt assembly
+Counts tokens locally and fits system prompt, market data and conversation
+history into a fixed budget, summarizing the oldest turns that don't fit
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding('cl100k_base')
+except Exception:  # tiktoken is optional; fall back to a character estimate
+    _encoding = None
+
+# Chat formats add a few tokens of framing per message
+MESSAGE_OVERHEAD_TOKENS = 4
+CHARS_PER_TOKEN = 4
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens in a string (exact with tiktoken, estimated otherwise)"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def count_message_tokens(messages: List[Dict[str, str]]) -> int:
+    """Count tokens for a list of chat messages including per-message framing"""
+    return sum(count_tokens(m.get('content', '')) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens, marking the cut"""
+    if max_tokens <= 0:
+        return ''
+    if count_tokens(text) <= max_tokens:
+        return text
+    marker = ' …[truncated]'
+    keep = max(0, max_tokens - count_tokens(marker))
+    if _encoding is not None:
+        return _encoding.decode(_encoding.encode(text, disallowed_special=())[:keep]) + marker
+    return text[:keep * CHARS_PER_TOKEN] + marker
+
+
+class ContextAssembler:
+    """
+    Builds chat message lists that fit within a prompt token budget
+
+    Priority order: the persona system prompt and the current user message
+    are always kept; supporting context (market data, intelligence) is
+    truncated if needed; history keeps the newest turns verbatim and folds
+    older ones into a short extractive summary.
+    """
+
+    def __init__(self, max_tokens: int = 6000, summary_tokens: int = 200, summary_chars_per_turn: int = 160):
+        """
+        Args:
+            max_tokens: Total prompt token budget
+            summary_tokens: Cap on the summary of dropped history turns
+            summary_chars_per_turn: Characters kept from each summarized turn
+        """
+        self.max_tokens = max_tokens
+        self.summary_tokens = summary_tokens
+        self.summary_chars_per_turn = summary_chars_per_turn
+
+    @staticmethod
+    def clean_history(history: Optional[List[Any]]) -> List[Dict[str, str]]:
+        """Keep only well-formed {'role', 'content'} history messages"""
+        cleaned = []
+        for message in history or []:
+            if (isinstance(message, dict) and message.get('role') in ('user', 'assistant', 'system')
+                    and isinstance(message.get('content'), str)):
+                cleaned.append({'role': message['role'], 'content': message['content']})
+        return cleaned
+
+    def summarize_turns(self, turns: List[Dict[str, str]]) -> Optional[Dict[str, str]]:
+        """Fold dropped history turns into a single capped system message"""
+        if not turns or self.summary_tokens <= 0:
+            return None
+        lines = []
+        for turn in turns:
+            text = ' '.join(turn['content'].split())
+            if len(text) > self.summary_chars_per_turn:
+                text = text[:self.summary_chars_per_turn].rstrip() + '…'
+            lines.append(f"- {turn['role']}: {text}")
+        content = truncate_to_tokens('Earlier conversation (condensed):\n' + '\n'.join(lines), self.summary_tokens)
+        return {'role': 'system', 'content': content}
+
+    def assemble(self, system_prompt: str, context_messages: List[str], history: Optional[List[Any]],
+                 user_message: str) -> Tuple[List[Dict[str, str]], Dict[str, Any]]:
+        """
+        Assemble messages within the budget
+
+        Args:
+            system_prompt: Persona/instructions (always kept)
+            context_messages: Supporting system messages, most important first
+            history: Client-supplied conversation history, oldest first
+            user_message: Current user message (always kept)
+
+        Returns:
+            (messages, report) where report describes token usage and trimming
+        """
+        head = [{'role': 'system', 'content': system_prompt}]
+        tail = [{'role': 'user', 'content': user_message}]
+        remaining = self.max_tokens - count_message_tokens(head) - count_message_tokens(tail)
+
+        # Supporting context, truncated if it alone would blow the budget
+        context = []
+        context_truncated = False
+        for content in context_messages:
+            cost = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+            if cost > remaining:
+                content = truncate_to_tokens(content, remaining - MESSAGE_OVERHEAD_TOKENS)
+                context_truncated = True
+                if not content:
+                    continue
+                cost = count_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+            context.append({'role': 'system', 'content': content})
+            remaining -= cost
+
+        # Newest history turns first, until the budget runs out
+        turns = self.clean_history(history)
+        kept = []
+        for turn in reversed(turns):
+            cost = count_tokens(turn['content']) + MESSAGE_OVERHEAD_TOKENS
+            if cost > remaining:
+                break
+            kept.append(turn)
+            remaining -= cost
+        kept.reverse()
+
+        dropped = turns[:len(turns) - len(kept)]
+        summary = self.summarize_turns(dropped)
+        while summary is not None:
+            summary_cost = count_tokens(summary['content']) + MESSAGE_OVERHEAD_TOKENS
+            if summary_cost <= remaining:
+                remaining -= summary_cost
+                break
+            if not kept:
+                summary = None
+                break
+            # Make room for the summary by folding the oldest kept turn into it
+            oldest = kept.pop(0)
+            remaining += count_tokens(oldest['content']) + MESSAGE_OVERHEAD_TOKENS
+            dropped.append(oldest)
+            summary = self.summarize_turns(dropped)
+
+        messages = head + context + ([summary] if summary else []) + kept + tail
+        report = {
+            'prompt_tokens': count_message_tokens(messages),
+            'budget_tokens': self.max_tokens,
+            'history_turns': len(turns),
+            'history_turns_kept': len(kept),
+            'history_turns_summarized': len(dropped) if summary else 0,
+            'history_turns_dropped': 0 if summary else len(dropped),
+            'context_truncated': context_truncated,
+            'tokenizer': 'tiktoken' if _encoding is not None else 'approximate'
+        }
+        return messages, report
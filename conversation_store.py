@@ -0,0 +1,420 @@
+"""
+Conversation Store - Pluggable storage for chat context
+Backends: an in-process LRU+TTL store and a SQLite store (WAL mode,
+batched writes) that survives restarts and is shared across workers
+"""
+
+import atexit
+import os
+import sqlite3
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+
+class ConversationStore(ABC):
+    """
+    Interface for conversation context storage
+    """
+
+    @abstractmethod
+    def get(self, session_id: str, assistant: str) -> List[Dict[str, Any]]:
+        """
+        Get the stored exchanges for a session, oldest first
+
+        Args:
+            session_id: Client session identifier
+            assistant: Assistant name (layla, alya)
+
+        Returns:
+            List of {'user', 'assistant', 'timestamp'} exchanges
+        """
+
+    @abstractmethod
+    def append(self, session_id: str, assistant: str, exchange: Dict[str, Any], max_exchanges: int = 5):
+        """
+        Append an exchange, keeping only the most recent max_exchanges
+
+        Args:
+            session_id: Client session identifier
+            assistant: Assistant name (layla, alya)
+            exchange: {'user', 'assistant', 'timestamp'} dictionary
+            max_exchanges: Number of exchanges to retain per assistant
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Forget everything stored for a session"""
+
+    @abstractmethod
+    def sweep(self) -> int:
+        """
+        Remove sessions that have been idle longer than the TTL
+
+        Returns:
+            Number of sessions removed
+        """
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """Get backend statistics"""
+
+    def close(self):
+        """Release resources held by the backend"""
+
+
+def _exchange_size(exchange: Dict[str, Any]) -> int:
+    """Approximate resident bytes of one stored exchange"""
+    return sys.getsizeof(exchange) + sum(sys.getsizeof(v) for v in exchange.values())
+
+
+class MemoryConversationStore(ConversationStore):
+    """
+    Per-process store bounded by session count (LRU) and idle time (TTL)
+
+    Sessions are kept in access order, so both LRU eviction and the expiry
+    sweep only ever look at the oldest entries.
+    """
+
+    def __init__(self, max_sessions: int = 10000, ttl_seconds: float = 6 * 3600):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        # session_id -> [last_access, {assistant: [exchanges]}, approx_bytes]
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def _remove(self, session_id):
+        entry = self._sessions.pop(session_id)
+        self._bytes -= entry[2]
+
+    def _live_entry(self, session_id, now):
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        if now - entry[0] > self.ttl_seconds:
+            self._remove(session_id)
+            self.expirations += 1
+            return None
+        return entry
+
+    def get(self, session_id, assistant):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live_entry(session_id, now)
+            if entry is None:
+                return []
+            entry[0] = now
+            self._sessions.move_to_end(session_id)
+            return list(entry[1].get(assistant, []))
+
+    def append(self, session_id, assistant, exchange, max_exchanges=5):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live_entry(session_id, now)
+            if entry is None:
+                entry = [now, {}, 0]
+                self._sessions[session_id] = entry
+
+            history = entry[1].get(assistant, []) + [exchange]
+            kept = history[-max_exchanges:]
+            delta = sum(_exchange_size(e) for e in kept) - sum(
+                _exchange_size(e) for e in entry[1].get(assistant, []))
+            entry[1][assistant] = kept
+            entry[0] = now
+            entry[2] += delta
+            self._bytes += delta
+            self._sessions.move_to_end(session_id)
+
+            while len(self._sessions) > self.max_sessions:
+                self._remove(next(iter(self._sessions)))
+                self.evictions += 1
+
+    def delete(self, session_id):
+        with self._lock:
+            if session_id in self._sessions:
+                self._remove(session_id)
+
+    def sweep(self):
+        cutoff = time.monotonic() - self.ttl_seconds
+        removed = 0
+        with self._lock:
+            while self._sessions:
+                session_id, entry = next(iter(self._sessions.items()))
+                if entry[0] >= cutoff:
+                    break
+                self._remove(session_id)
+                removed += 1
+            self.expirations += removed
+        return removed
+
+    def stats(self):
+        with self._lock:
+            return {
+                'backend': 'memory',
+                'sessions': len(self._sessions),
+                'max_sessions': self.max_sessions,
+                'ttl_seconds': self.ttl_seconds,
+                'approx_bytes': self._bytes,
+                'evictions': self.evictions,
+                'expirations': self.expirations
+            }
+
+
+class SQLiteConversationStore(ConversationStore):
+    """
+    SQLite-backed store shared by every worker on the host
+
+    Writes are queued and flushed in one transaction per batch by a
+    background thread; reads see this process's queued writes immediately.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 0.5, batch_size: int = 100,
+                 ttl_seconds: float = 6 * 3600):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._local = threading.local()
+        self._pending = []  # (session_id, assistant, exchange, max_exchanges)
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+
+        conn = self._connection()
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS conversation_exchanges (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                assistant TEXT NOT NULL,
+                user_message TEXT NOT NULL,
+                assistant_message TEXT NOT NULL,
+                timestamp TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_exchanges_session
+                ON conversation_exchanges (session_id, assistant, id);
+        """)
+        conn.commit()
+
+        self._writer = threading.Thread(target=self._run, name='conversation-writer', daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id, assistant):
+        # Holding the flush lock means a batch is never half-way between
+        # the queue and the table while we read both
+        with self._flush_lock:
+            rows = self._connection().execute(
+                """SELECT user_message, assistant_message, timestamp FROM conversation_exchanges
+                   WHERE session_id = ? AND assistant = ? ORDER BY id""",
+                (session_id, assistant)
+            ).fetchall()
+            history = [{'user': r[0], 'assistant': r[1], 'timestamp': r[2]} for r in rows]
+
+            max_exchanges = None
+            with self._pending_lock:
+                for pending_session, pending_assistant, exchange, limit in self._pending:
+                    if pending_session == session_id and pending_assistant == assistant:
+                        history.append(exchange)
+                        max_exchanges = limit
+        if max_exchanges is not None:
+            history = history[-max_exchanges:]
+        return history
+
+    def append(self, session_id, assistant, exchange, max_exchanges=5):
+        with self._pending_lock:
+            self._pending.append((session_id, assistant, exchange, max_exchanges))
+            queued = len(self._pending)
+        if queued >= self.batch_size:
+            self._wake.set()
+
+    def delete(self, session_id):
+        self.flush()
+        conn = self._connection()
+        conn.execute('DELETE FROM conversation_exchanges WHERE session_id = ?', (session_id,))
+        conn.commit()
+
+    def flush(self):
+        """Write all queued exchanges in a single transaction"""
+        with self._flush_lock:
+            with self._pending_lock:
+                batch = self._pending
+                self._pending = []
+            if not batch:
+                return
+
+            try:
+                self._write_batch(batch)
+            except Exception:
+                # Put the batch back so the next flush retries it
+                with self._pending_lock:
+                    self._pending = batch + self._pending
+                raise
+
+    def _write_batch(self, batch):
+        conn = self._connection()
+        now = time.time()
+        with conn:
+            conn.executemany(
+                """INSERT INTO conversation_exchanges
+                   (session_id, assistant, user_message, assistant_message, timestamp, created_at)
+                   VALUES (?, ?, ?, ?, ?, ?)""",
+                [(s, a, e['user'], e['assistant'], e['timestamp'], now) for s, a, e, _ in batch]
+            )
+            # Trim each touched conversation back to its retention limit
+            limits = {}
+            for s, a, _, limit in batch:
+                limits[(s, a)] = limit
+            conn.executemany(
+                """DELETE FROM conversation_exchanges
+                   WHERE session_id = ? AND assistant = ? AND id NOT IN (
+                       SELECT id FROM conversation_exchanges
+                       WHERE session_id = ? AND assistant = ? ORDER BY id DESC LIMIT ?)""",
+                [(s, a, s, a, limit) for (s, a), limit in limits.items()]
+            )
+
+    def sweep(self):
+        cutoff = time.time() - self.ttl_seconds
+        with self._flush_lock:
+            conn = self._connection()
+            with conn:
+                expired = [row[0] for row in conn.execute(
+                    """SELECT session_id FROM conversation_exchanges
+                       GROUP BY session_id HAVING MAX(created_at) < ?""",
+                    (cutoff,)
+                )]
+                conn.executemany(
+                    'DELETE FROM conversation_exchanges WHERE session_id = ?',
+                    [(session_id,) for session_id in expired]
+                )
+        return len(expired)
+
+    def stats(self):
+        conn = self._connection()
+        sessions, exchanges, text_bytes = conn.execute(
+            """SELECT COUNT(DISTINCT session_id), COUNT(*),
+                      COALESCE(SUM(LENGTH(user_message) + LENGTH(assistant_message)), 0)
+               FROM conversation_exchanges"""
+        ).fetchone()
+        page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+        page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+        with self._pending_lock:
+            pending = len(self._pending)
+            pending_bytes = sum(_exchange_size(e) for _, _, e, _ in self._pending)
+        return {
+            'backend': 'sqlite',
+            'path': self.path,
+            'sessions': sessions,
+            'exchanges': exchanges,
+            'ttl_seconds': self.ttl_seconds,
+            'stored_text_bytes': text_bytes,
+            'db_bytes': page_count * page_size,
+            'pending_writes': pending,
+            'approx_bytes': pending_bytes
+        }
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._wake.set()
+        self._writer.join(timeout=5)
+        self.flush()
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"Error flushing conversation store: {e}")
+
+
+class SessionSweeper:
+    """
+    Periodically removes idle sessions from a conversation store
+    """
+
+    def __init__(self, store: ConversationStore, interval: float = 300.0):
+        self.store = store
+        self.interval = interval
+        self.last_sweep = None
+        self.last_removed = 0
+        self.total_removed = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the sweeper thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='session-sweeper', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the sweeper thread"""
+        self._stop_event.set()
+
+    def sweep_now(self) -> int:
+        """Run one sweep immediately and return the number of sessions removed"""
+        removed = self.store.sweep()
+        self.last_sweep = time.time()
+        self.last_removed = removed
+        self.total_removed += removed
+        return removed
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get sweeper health information"""
+        return {
+            'interval_seconds': self.interval,
+            'last_sweep_age_seconds': round(time.time() - self.last_sweep, 1) if self.last_sweep else None,
+            'last_removed': self.last_removed,
+            'total_removed': self.total_removed
+        }
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.sweep_now()
+            except Exception as e:
+                print(f"Error sweeping conversation sessions: {e}")
+
+
+def create_conversation_store() -> ConversationStore:
+    """
+    Build the conversation store selected by environment variables
+
+    CONVERSATION_STORE: 'memory' (default) or 'sqlite'
+    CONVERSATION_DB_PATH: SQLite file path (default conversations.db next to this module)
+    CONVERSATION_MAX_SESSIONS: Hard cap on resident sessions (memory backend)
+    CONVERSATION_TTL_SECONDS: Idle time after which a session expires
+    """
+    backend = os.getenv('CONVERSATION_STORE', 'memory').lower()
+    ttl_seconds = float(os.getenv('CONVERSATION_TTL_SECONDS', str(6 * 3600)))
+    if backend == 'sqlite':
+        default_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'conversations.db')
+        return SQLiteConversationStore(os.getenv('CONVERSATION_DB_PATH', default_path),
+                                       ttl_seconds=ttl_seconds)
+    return MemoryConversationStore(
+        max_sessions=int(os.getenv('CONVERSATION_MAX_SESSIONS', '10000')),
+        ttl_seconds=ttl_seconds
+    )
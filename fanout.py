@@ -0,0 +1,133 @@
+"""
+Fan-out Fetcher - Concurrent multi-symbol requests
+Runs independent blocking calls (one ApiClient.call_api per symbol, say) on a
+shared bounded thread pool, with a per-call timeout and partial results
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait
+from concurrent.futures import TimeoutError as FuturesTimeoutError
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+MAX_WORKERS = int(os.getenv('FANOUT_MAX_WORKERS', '16'))
+DEFAULT_TIMEOUT = float(os.getenv('FANOUT_TIMEOUT', '10'))
+
+_executor = None
+_executor_lock = threading.Lock()
+_worker_state = threading.local()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Get the process-wide fan-out pool, creating it on first use"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=MAX_WORKERS,
+                    thread_name_prefix='fanout',
+                    initializer=_mark_worker
+                )
+    return _executor
+
+
+def _mark_worker():
+    _worker_state.in_pool = True
+
+
+def fan_out(calls: Dict[Hashable, Callable[[], Any]],
+            timeout: Optional[float] = None) -> Tuple[Dict[Hashable, Any], Dict[Hashable, str]]:
+    """
+    Run several independent calls in parallel
+
+    Args:
+        calls: Mapping of key -> zero-argument callable
+        timeout: Seconds to wait for each call (default FANOUT_TIMEOUT).
+            All calls start together, so this also bounds total wall time.
+
+    Returns:
+        (results, errors) - results maps key -> return value for calls that
+        finished in time; errors maps key -> message for calls that raised
+        or timed out. Every key appears in exactly one of the two.
+    """
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+
+    results = {}
+    errors = {}
+
+    # A call already running on the pool must not wait on the same pool,
+    # otherwise nested fan-outs can deadlock once every worker is waiting
+    if getattr(_worker_state, 'in_pool', False) or len(calls) <= 1:
+        for key, call in calls.items():
+            try:
+                results[key] = call()
+            except Exception as e:
+                errors[key] = str(e)
+        return results, errors
+
+    executor = get_executor()
+    futures = {key: executor.submit(call) for key, call in calls.items()}
+    wait(futures.values(), timeout=timeout)
+
+    for key, future in futures.items():
+        if not future.done():
+            future.cancel()
+            errors[key] = f'Timed out after {timeout:g}s'
+            continue
+        try:
+            results[key] = future.result()
+        except Exception as e:
+            errors[key] = str(e)
+
+    return results, errors
+
+
+def fan_out_iter(calls: Dict[Hashable, Callable[[], Any]],
+                 timeout: Optional[float] = None) -> Iterator[Tuple[Hashable, Any, Optional[str]]]:
+    """
+    Run several independent calls in parallel and yield them as they finish
+
+    Lets the caller stop early: closing the generator (or breaking out of
+    the loop) cancels calls that have not started yet.
+
+    Args:
+        calls: Mapping of key -> zero-argument callable
+        timeout: Seconds to wait overall (default FANOUT_TIMEOUT)
+
+    Yields:
+        (key, result, error) in completion order; error is None on success,
+        otherwise result is None. Calls still running at the timeout are
+        yielded last with a timeout error.
+    """
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+
+    # Same deadlock guard as fan_out: run inline when already on the pool
+    if getattr(_worker_state, 'in_pool', False) or len(calls) <= 1:
+        for key, call in calls.items():
+            try:
+                yield key, call(), None
+            except Exception as e:
+                yield key, None, str(e)
+        return
+
+    executor = get_executor()
+    futures = {executor.submit(call): key for key, call in calls.items()}
+    pending = set(futures)
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            pending.discard(future)
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, str(e)
+    except FuturesTimeoutError:
+        for future in list(pending):
+            pending.discard(future)
+            future.cancel()
+            yield futures[future], None, f'Timed out after {timeout:g}s'
+    finally:
+        for future in pending:
+            future.cancel()
@@ -0,0 +1,175 @@
+"""
+HTTP Transport - Shared pooled, keep-alive HTTP clients for outbound calls
+One requests session (scrapes, quote APIs) and one httpx client pair (LLM
+calls) per process, with bounded connection pools and timeouts. The
+session also limits concurrency per host and retries with jittered
+exponential backoff; LLM calls are bounded only by their own, larger pool
+and retried by the OpenAI SDK.
+"""
+
+import os
+import threading
+from typing import Any, Dict
+from urllib.parse import urlsplit
+
+import httpx
+import openai
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Pool and limit settings, overridable per deployment
+HTTP_POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '32'))
+HTTP_PER_HOST_LIMIT = int(os.getenv('HTTP_PER_HOST_LIMIT', '8'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+HTTP_READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv('HTTP_KEEPALIVE_SECONDS', '60'))
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '3'))
+HTTP_BACKOFF_FACTOR = float(os.getenv('HTTP_BACKOFF_FACTOR', '0.5'))
+HTTP_BACKOFF_JITTER = float(os.getenv('HTTP_BACKOFF_JITTER', '0.5'))
+
+# LLM calls are slow to produce the first byte, so they get a longer read timeout.
+# Streams stay open for the whole completion, so the LLM pool is much larger
+# than the per-host limit applied to scrapes and quote APIs.
+LLM_READ_TIMEOUT = float(os.getenv('LLM_READ_TIMEOUT', '60'))
+LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', '200'))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_lock = threading.Lock()
+_session = None
+_http_client = None
+_async_http_client = None
+_host_semaphores = {}
+
+
+def _host_semaphore(host: str) -> threading.BoundedSemaphore:
+    with _lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(HTTP_PER_HOST_LIMIT)
+            _host_semaphores[host] = semaphore
+        return semaphore
+
+
+def get_session() -> requests.Session:
+    """
+    Get the shared requests session
+
+    Connections are kept alive and pooled per host (at most HTTP_POOL_SIZE
+    each). Idempotent requests are retried on connection errors and
+    429/5xx responses with jittered exponential backoff, honouring
+    Retry-After.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            retry = Retry(
+                total=HTTP_MAX_RETRIES,
+                status_forcelist=RETRY_STATUSES,
+                backoff_factor=HTTP_BACKOFF_FACTOR,
+                backoff_jitter=HTTP_BACKOFF_JITTER,
+                raise_on_status=False
+            )
+            adapter = HTTPAdapter(
+                pool_connections=HTTP_POOL_SIZE,
+                pool_maxsize=HTTP_POOL_SIZE,
+                pool_block=True,
+                max_retries=retry
+            )
+            session = requests.Session()
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+        return _session
+
+
+def request(method: str, url: str, **kwargs: Any) -> requests.Response:
+    """
+    Make an HTTP request through the shared session
+
+    At most HTTP_PER_HOST_LIMIT requests run against one host at a time;
+    extra callers wait for a slot. A (connect, read) timeout is applied
+    unless the caller passes one.
+
+    Args:
+        method: HTTP method
+        url: Absolute URL
+        **kwargs: Passed through to requests.Session.request
+
+    Returns:
+        The response
+    """
+    kwargs.setdefault('timeout', (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+    with _host_semaphore(urlsplit(url).netloc):
+        return get_session().request(method, url, **kwargs)
+
+
+def _httpx_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=LLM_POOL_SIZE,
+        max_keepalive_connections=HTTP_POOL_SIZE,
+        keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+    )
+
+
+def _httpx_timeout() -> httpx.Timeout:
+    return httpx.Timeout(LLM_READ_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT)
+
+
+def get_http_client() -> httpx.Client:
+    """Get the shared pooled httpx client used for LLM calls"""
+    global _http_client
+    with _lock:
+        if _http_client is None:
+            # No transport retries: the OpenAI SDK already retries (max_retries)
+            _http_client = httpx.Client(limits=_httpx_limits(), timeout=_httpx_timeout())
+        return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the shared pooled async httpx client used for LLM calls under ASGI"""
+    global _async_http_client
+    with _lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(limits=_httpx_limits(), timeout=_httpx_timeout())
+        return _async_http_client
+
+
+def _openai_options(base_url: str = None) -> Dict[str, Any]:
+    return {
+        'api_key': os.getenv('OPENAI_API_KEY'),
+        'base_url': base_url or os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1'),
+        'max_retries': HTTP_MAX_RETRIES,  # the SDK backs off exponentially with jitter
+        'timeout': _httpx_timeout()
+    }
+
+
+def create_openai_client(base_url: str = None) -> openai.OpenAI:
+    """
+    Create an OpenAI client on the shared pooled transport
+
+    Args:
+        base_url: API base URL (defaults to OPENAI_API_BASE)
+    """
+    return openai.OpenAI(http_client=get_http_client(), **_openai_options(base_url))
+
+
+def create_async_openai_client(base_url: str = None) -> openai.AsyncOpenAI:
+    """Create an AsyncOpenAI client on the shared pooled async transport"""
+    return openai.AsyncOpenAI(http_client=get_async_http_client(), **_openai_options(base_url))
+
+
+def transport_stats() -> Dict[str, Any]:
+    """Get pool and limit settings for health endpoints"""
+    return {
+        'pool_size': HTTP_POOL_SIZE,
+        'per_host_limit': HTTP_PER_HOST_LIMIT,
+        'llm_pool_size': LLM_POOL_SIZE,
+        'connect_timeout': HTTP_CONNECT_TIMEOUT,
+        'read_timeout': HTTP_READ_TIMEOUT,
+        'llm_read_timeout': LLM_READ_TIMEOUT,
+        'keepalive_seconds': HTTP_KEEPALIVE_SECONDS,
+        'max_retries': HTTP_MAX_RETRIES,
+        'hosts_seen': len(_host_semaphores)
+    }
@@ -1,24 +1,123 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, Response, jsonify, request, stream_with_context
 from flask_cors import cross_origin
 import json
+import hashlib
 import os
-from datetime import datetime
+from datetime import datetime, timezone
 import sys
-import openai
+import threading
 sys.path.append('/opt/.manus/.sandbox-runtime')
-from src.lme_data_provider import LMEDataProvider
-from src.supplier_finder import SupplierFinder
+from supplier_finder import SupplierFinder
+from price_refresher import PriceRefresher
+from quote_cache import default_quote_cache
+from rolling_stats import default_indicator_engine
+from context_budget import ContextAssembler
+from prompt_encoding import MARKET_DATA_FORMATS, METAL_ORDER, render_market_data
+from alert_engine import ALERT_TYPES, AlertEngine
+from analysis_batch import BatchAnalysisJob
+from arbitrage_scanner import ArbitrageScanner, cross_venue_metals
+from bar_store import HISTORY_FORMATS, RANGE_SECONDS, default_bar_store, stream_bars
+from http_transport import create_openai_client, transport_stats
+from single_flight import SingleFlight, llm_request_key
 
 layla_bp = Blueprint('layla', __name__)
 
-# Initialize OpenAI client
-client = openai.OpenAI(
-    api_key=os.getenv('OPENAI_API_KEY'),
-    base_url=os.getenv('OPENAI_API_BASE')
-)
+# Initialize OpenAI client on the shared pooled transport
+client = create_openai_client()
 
 # Initialize LME data provider for accurate pricing
-lme_provider = LMEDataProvider()
+try:
+    from lme_data_provider import LMEDataProvider
+    lme_provider = LMEDataProvider()
+    lme_provider_error = None
+except ImportError as e:  # data_api is only available inside the sandbox runtime
+    print(f"Error loading LME data provider: {e}")
+    lme_provider = None
+    lme_provider_error = f'LME data provider unavailable: {e}'
+
+# Historical bars come from the local archive kept by MarketDataProvider
+try:
+    from market_data import MarketDataProvider
+    market_data_provider = MarketDataProvider()
+except ImportError as e:  # data_api is only available inside the sandbox runtime
+    print(f"Error loading market data provider: {e}")
+    market_data_provider = None
+
+def live_lme_prices():
+    """Latest USD/tonne price and contract symbol per metal from the LME price snapshot"""
+    snapshot = price_refresher.get_snapshot()
+    if snapshot is None:
+        return {}
+    return {
+        metal: {'symbol': data.get('symbol'), 'price_usd_per_tonne': data.get('price_usd_per_tonne')}
+        for metal, data in snapshot.to_response().get('lme_prices', {}).items()
+        if isinstance(data, dict) and 'error' not in data
+    }
+
+def arbitrage_symbols():
+    """Contract symbols each metal is quoted on, across venues and the live LME feed"""
+    symbols = {metal: set(venues.values()) for metal, venues in market_data_provider.metal_symbols.items()}
+    if lme_provider is not None:
+        for metal, info in lme_provider.lme_symbols.items():
+            if metal in symbols:
+                symbols[metal].add(info['symbol'])
+    return symbols
+
+# Cross-venue spreads are rescanned in the background; /arbitrage only reads the ranking.
+# The scanner only runs once some metal is quoted on two distinct contracts.
+ARBITRAGE_MIN_SPREAD_PERCENT = float(os.getenv('ARBITRAGE_MIN_SPREAD_PERCENT', '0.25'))
+arbitrage_scanner = None
+arbitrage_unavailable = "Arbitrage scanner is unavailable: market data provider not loaded"
+if market_data_provider is not None:
+    if cross_venue_metals(arbitrage_symbols()):
+        arbitrage_scanner = ArbitrageScanner(
+            market_data_provider.get_venue_quotes,
+            live_lme_prices,
+            interval=float(os.getenv('ARBITRAGE_SCAN_INTERVAL', '60'))
+        )
+        arbitrage_scanner.start()
+    else:
+        arbitrage_unavailable = ("Arbitrage scanner is disabled: every venue quotes the same contract "
+                                 "for each metal, so there is no cross-venue pair to price")
+
+# Refresh all LME prices in the background so request handlers read a shared
+# snapshot instead of making six upstream calls per request
+price_refresher = PriceRefresher(
+    lme_provider,
+    interval=float(os.getenv('LME_REFRESH_INTERVAL', '30'))
+)
+
+# Price alerts are persisted and checked against every refreshed snapshot;
+# SQLite holds the active alerts and fired events shared by every worker
+alert_engine = AlertEngine(
+    os.getenv('ALERTS_DB_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'alerts.db')),
+    metals=lme_provider.lme_symbols if lme_provider is not None else METAL_ORDER
+)
+price_refresher.add_listener(alert_engine.on_snapshot)
+# Each /alerts/stream subscriber holds a sync worker for the life of its
+# connection, so this process serves at most ALERT_STREAM_MAX_SUBSCRIBERS
+# streams at once (503 beyond that; poll /alerts?after=<event id> instead),
+# and each stream ends after ALERT_STREAM_MAX_SECONDS so workers are handed
+# back. EventSource clients reconnect with Last-Event-ID and miss nothing.
+ALERT_STREAM_MAX_SUBSCRIBERS = int(os.getenv('ALERT_STREAM_MAX_SUBSCRIBERS', '4'))
+ALERT_STREAM_MAX_SECONDS = float(os.getenv('ALERT_STREAM_MAX_SECONDS', '300'))
+alert_stream_slots = threading.BoundedSemaphore(ALERT_STREAM_MAX_SUBSCRIBERS)
+# Rolling indicators and spreads advance once per refreshed snapshot
+price_refresher.add_listener(default_indicator_engine.on_snapshot)
+if lme_provider is not None:
+    price_refresher.start()
+else:
+    price_refresher.last_error = lme_provider_error
+
+# How market data is written into prompts ('compact' or 'json'); endpoints may override
+DEFAULT_MARKET_DATA_FORMAT = os.getenv('LAYLA_MARKET_DATA_FORMAT', 'compact')
+
+# Fit persona, market data and history into a fixed prompt budget
+context_assembler = ContextAssembler(max_tokens=int(os.getenv('LAYLA_PROMPT_TOKEN_BUDGET', '6000')))
+
+# Identical prompts arriving together (e.g. many dashboards hitting /scenario)
+# share one upstream LLM call
+llm_single_flight = SingleFlight()
 
 # Initialize supplier finder for proactive supplier identification
 supplier_finder = SupplierFinder()
@@ -57,8 +156,17 @@ class LaylaAgent:
             "operations": "Procurement, processing, recycling of ferrous and non-ferrous metals",
             "certifications": "ISO 9001:2015"
         }
+        
+        # Built once so every request sends a byte-identical prompt prefix,
+        # which lets provider-side prefix caching apply
+        self.system_prompt = self._build_system_prompt()
+        self.system_prompt_fingerprint = hashlib.sha256(self.system_prompt.encode('utf-8')).hexdigest()[:16]
 
     def get_system_prompt(self):
+        """Get the static persona prompt (identical for every request)"""
+        return self.system_prompt
+
+    def _build_system_prompt(self):
         return f"""You are {self.personality['name']}, a {self.personality['role']}.
 
 PERSONALITY TRAITS:
@@ -114,17 +222,29 @@ Remember: You are not just an assistant - you are a trusted trading partner who
     def get_market_data(self, symbol=None):
         """Get current LME market data for metals"""
         try:
+            snapshot = price_refresher.get_snapshot()
+            if snapshot is None:
+                return {"error": price_refresher.unavailable_reason(), "status": "unavailable"}
             if symbol:
-                # Get specific metal LME data
-                return lme_provider.get_lme_price(symbol)
+                # Get specific metal LME data from the snapshot
+                metal_data = snapshot.get_metal(symbol)
+                if metal_data is None:
+                    return {"error": f"Metal {symbol} not supported", "status": "unknown_metal"}
+                return dict(metal_data, snapshot_age_seconds=round(snapshot.age_seconds(), 1))
             else:
                 # Get all LME metals data
-                return lme_provider.get_all_lme_prices()
+                return snapshot.to_response()
         except Exception as e:
             return {"error": f"Failed to fetch LME market data: {str(e)}"}
 
-    def generate_response(self, user_message, conversation_history=None):
+    def generate_response(self, user_message, conversation_history=None, market_data_format=None):
         """Generate Layla's response using OpenAI with enhanced context"""
+        response, _ = self.generate_response_with_usage(user_message, conversation_history, market_data_format)
+        return response
+
+    def generate_response_with_usage(self, user_message, conversation_history=None, market_data_format=None):
+        """Generate Layla's response and report the prompt token budget it used"""
+        context_report = None
         try:
             # Get current market data
             market_data = self.get_market_data()
@@ -132,32 +252,36 @@ Remember: You are not just an assistant - you are a trusted trading partner who
             # Get additional market context
             market_context = self._get_enhanced_market_context()
             
-            # Prepare conversation context
-            messages = [
-                {"role": "system", "content": self.get_system_prompt()},
-                {"role": "system", "content": f"Current LME market data: {json.dumps(market_data)}"},
-                {"role": "system", "content": f"Market intelligence: {market_context}"}
-            ]
-            
-            # Add conversation history if provided
-            if conversation_history:
-                messages.extend(conversation_history)
+            # Prepare conversation context within the prompt token budget.
+            # The persona prompt is the static, cacheable prefix; the per-request
+            # context follows it, most important (live prices) first.
+            messages, context_report = context_assembler.assemble(
+                self.get_system_prompt(),
+                [
+                    f"Current LME market data:\n{render_market_data(market_data, market_data_format or DEFAULT_MARKET_DATA_FORMAT)}",
+                    f"Market intelligence: {market_context}"
+                ],
+                conversation_history,
+                user_message
+            )
             
-            # Add current user message
-            messages.append({"role": "user", "content": user_message})
+            completion_args = {
+                "model": "gemini-2.5-flash",
+                "messages": messages,
+                "max_tokens": 1500,  # Increased for more detailed responses
+                "temperature": 0.7
+            }
             
-            # Generate response using OpenAI
-            response = client.chat.completions.create(
-                model="gemini-2.5-flash",
-                messages=messages,
-                max_tokens=1500,  # Increased for more detailed responses
-                temperature=0.7
+            # Generate response using OpenAI, sharing the call with any identical in-flight request
+            response = llm_single_flight.do(
+                llm_request_key(**completion_args),
+                lambda: client.chat.completions.create(**completion_args)
             )
             
-            return response.choices[0].message.content
+            return response.choices[0].message.content, context_report
             
         except Exception as e:
-            return f"I apologize, but I'm experiencing technical difficulties. Error: {str(e)}"
+            return f"I apologize, but I'm experiencing technical difficulties. Error: {str(e)}", context_report
 
     def _get_enhanced_market_context(self):
         """Get enhanced market context for more informed responses"""
@@ -210,6 +334,29 @@ Remember: You are not just an assistant - you are a trusted trading partner who
 # Initialize Layla agent
 layla_agent = LaylaAgent()
 
+def complete_batch_analysis(messages):
+    """Send the batched dashboard analysis prompt to the model"""
+    response = client.chat.completions.create(
+        model="gemini-2.5-flash",
+        messages=messages,
+        max_tokens=2500,  # One answer covers every metal
+        temperature=0.3
+    )
+    return response.choices[0].message.content
+
+# Dashboard analysis is computed for all metals in one batched LLM call per
+# interval and stored; /recommendations, /sentiment and /market-analysis
+# only read the stored result
+batch_analysis = BatchAnalysisJob(
+    layla_agent.get_market_data,
+    complete_batch_analysis,
+    layla_agent.get_system_prompt,
+    interval=float(os.getenv('LAYLA_ANALYSIS_INTERVAL', '900')),
+    path=os.getenv('LAYLA_ANALYSIS_PATH', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'layla_analysis.json')),
+    settlement_source=lme_provider.get_lme_settlement_prices if lme_provider is not None else None
+)
+batch_analysis.start()
+
 @layla_bp.route('/chat', methods=['POST'])
 @cross_origin()
 def chat():
@@ -218,17 +365,27 @@ def chat():
         data = request.json
         user_message = data.get('message', '')
         conversation_history = data.get('history', [])
+        market_data_format = data.get('market_data_format', DEFAULT_MARKET_DATA_FORMAT)
         
         if not user_message:
             return jsonify({"error": "Message is required"}), 400
         
+        if market_data_format not in MARKET_DATA_FORMATS:
+            return jsonify({"error": f"market_data_format must be one of {list(MARKET_DATA_FORMATS)}"}), 400
+        
         # Generate Layla's response
-        response = layla_agent.generate_response(user_message, conversation_history)
+        response, context_report = layla_agent.generate_response_with_usage(
+            user_message, conversation_history, market_data_format
+        )
+        
+        snapshot = price_refresher.get_snapshot()
         
         return jsonify({
             "response": response,
             "timestamp": datetime.now().isoformat(),
-            "agent": "Layla"
+            "agent": "Layla",
+            "market_data_age_seconds": round(snapshot.age_seconds(), 1) if snapshot else None,
+            "prompt_context": context_report
         })
         
     except Exception as e:
@@ -240,17 +397,119 @@ def get_market_data():
     """Get current market data"""
     try:
         data = layla_agent.get_market_data()
+        if data.get("status") == "unavailable":
+            return jsonify(data), 503
         return jsonify(data)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+def parse_history_time(value, end_of_day=False):
+    """Parse an epoch-seconds or ISO date/datetime query value as UTC (None if absent)"""
+    if not value:
+        return None
+    if value.isdigit():
+        return float(value)
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        # Bar timestamps are UTC; don't let the server's local zone shift the range
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    timestamp = parsed.timestamp()
+    if end_of_day and len(value) == 10:
+        # A bare end date includes that whole day
+        timestamp += 86399
+    return timestamp
+
+@layla_bp.route('/history', methods=['GET'])
+@cross_origin()
+def get_history():
+    """Stream archived OHLCV bars for a metal (CSV or raw binary records)"""
+    try:
+        if market_data_provider is None:
+            return jsonify({"error": "Historical data is unavailable"}), 503
+        
+        metal = request.args.get('metal', '')
+        fmt = request.args.get('format', 'csv')
+        if not metal:
+            return jsonify({"error": "metal is required"}), 400
+        if fmt not in HISTORY_FORMATS:
+            return jsonify({"error": f"format must be one of {list(HISTORY_FORMATS)}"}), 400
+        try:
+            start = parse_history_time(request.args.get('start'))
+            end = parse_history_time(request.args.get('end'), end_of_day=True)
+            symbol, bars = market_data_provider.get_history_bars(
+                metal, start, end, request.args.get('interval', '1d')
+            )
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        
+        headers = {
+            "X-Metal": metal.lower(),
+            "X-Symbol": symbol,
+            "X-Bar-Count": str(len(bars))
+        }
+        if fmt == 'binary':
+            # Little-endian records: int64 timestamp, float64 open/high/low/close, int64 volume
+            headers["X-Bar-Layout"] = "<i8 timestamp, <f8 open, <f8 high, <f8 low, <f8 close, <i8 volume"
+            mimetype = 'application/octet-stream'
+        else:
+            mimetype = 'text/csv'
+        return Response(stream_with_context(stream_bars(bars, fmt)), mimetype=mimetype, headers=headers)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@layla_bp.route('/analytics', methods=['GET'])
+@cross_origin()
+def get_analytics():
+    """Get returns, moving averages, volatility and drawdown for a metal"""
+    try:
+        if market_data_provider is None:
+            return jsonify({"error": "Historical data is unavailable"}), 503
+        
+        metal = request.args.get('metal', '')
+        period = request.args.get('period', '1y')
+        if not metal:
+            return jsonify({"error": "metal is required"}), 400
+        if period not in RANGE_SECONDS:
+            return jsonify({"error": f"period must be one of {list(RANGE_SECONDS)}"}), 400
+        
+        analytics = market_data_provider.get_metal_analytics(metal, period)
+        if 'error' in analytics:
+            return jsonify(analytics), 404
+        return jsonify(analytics)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@layla_bp.route('/correlations', methods=['GET'])
+@cross_origin()
+def get_correlations():
+    """Get the correlation matrix of daily returns across metals"""
+    try:
+        if market_data_provider is None:
+            return jsonify({"error": "Historical data is unavailable"}), 503
+        
+        period = request.args.get('period', '1y')
+        if period not in RANGE_SECONDS:
+            return jsonify({"error": f"period must be one of {list(RANGE_SECONDS)}"}), 400
+        return jsonify(market_data_provider.get_metal_correlations(period))
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @layla_bp.route('/alerts', methods=['GET'])
 @cross_origin()
 def get_alerts():
     """Get market alerts and opportunities"""
     try:
-        # Mock alerts for now - will be replaced with real analysis
-        alerts = [
+        try:
+            limit = int(request.args.get('limit', 50))
+            after = int(request.args.get('after', 0))
+        except ValueError:
+            return jsonify({"error": "limit and after must be numbers"}), 400
+        
+        # Price alerts that have fired, newest first (only those after an event id when polling)
+        alerts = alert_engine.recent_events(after_id=after, limit=max(limit, 0))
+        
+        # Mock market alerts for now - will be replaced with real analysis
+        alerts += [
             {
                 "type": "price_alert",
                 "metal": "copper",
@@ -270,6 +529,27 @@ def get_alerts():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@layla_bp.route('/alerts/stream', methods=['GET'])
+@cross_origin()
+def stream_alerts():
+    """Stream fired price alerts as server-sent events (capped per process, see ALERT_STREAM_MAX_SUBSCRIBERS)"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('after')
+    try:
+        last_event_id = int(last_event_id) if last_event_id is not None else None
+    except ValueError:
+        return jsonify({"error": "Last-Event-ID must be an integer"}), 400
+    if not alert_stream_slots.acquire(blocking=False):
+        return jsonify({
+            "error": "Too many alert streams; poll /alerts?after=<last event id> instead"
+        }), 503, {"Retry-After": "30"}
+    response = Response(
+        stream_with_context(alert_engine.stream(last_event_id, max_duration=ALERT_STREAM_MAX_SECONDS)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    response.call_on_close(alert_stream_slots.release)
+    return response
+
 @layla_bp.route('/recommendations', methods=['GET'])
 @cross_origin()
 def get_recommendations():
@@ -278,15 +558,31 @@ def get_recommendations():
         # Get supplier intelligence
         supplier_intel = supplier_finder.get_market_supplier_intelligence()
         
-        recommendations = [
-            {
+        # Per-metal calls from the latest batch analysis run
+        analysis = batch_analysis.get_result()
+        recommendations = []
+        if analysis:
+            for metal, entry in analysis["metals"].items():
+                recommendations.append({
+                    "type": entry["action"],
+                    "metal": metal,
+                    "reason": entry["reason"],
+                    "target_price": entry["target_price"],
+                    "confidence": entry["confidence"],
+                    "sentiment": entry["sentiment"],
+                    "timestamp": analysis["generated_at"]
+                })
+        else:
+            recommendations.append({
                 "type": "buy",
                 "metal": "aluminum",
                 "reason": "Strong demand from UAE construction sector, prices expected to rise",
                 "target_price": 2200,
                 "confidence": "high",
                 "timestamp": datetime.now().isoformat()
-            },
+            })
+        
+        recommendations.extend([
             {
                 "type": "supplier",
                 "metal": "copper_scrap",
@@ -296,7 +592,7 @@ def get_recommendations():
                 "contact": "export@ankaracopper.com.tr",
                 "timestamp": datetime.now().isoformat()
             }
-        ]
+        ])
         
         # Add supplier opportunities from intelligence
         for opportunity in supplier_intel["new_opportunities"]:
@@ -354,7 +650,17 @@ def get_status():
             "Communication drafting"
         ],
         "markets_monitored": ["UAE", "GCC", "India", "China", "Europe"],
-        "metals_expertise": layla_agent.personality["expertise"]
+        "metals_expertise": layla_agent.personality["expertise"],
+        "system_prompt_fingerprint": layla_agent.system_prompt_fingerprint,
+        "price_refresher": price_refresher.get_status(),
+        "quote_cache": default_quote_cache.stats(),
+        "bar_store": default_bar_store.stats(),
+        "llm_single_flight": llm_single_flight.stats(),
+        "http_transport": transport_stats(),
+        "indicator_metals": len(default_indicator_engine.snapshot()["metals"]),
+        "alert_engine": alert_engine.stats(),
+        "arbitrage_scanner": arbitrage_scanner.get_status() if arbitrage_scanner else None,
+        "batch_analysis": batch_analysis.get_status()
     })
 
 
@@ -365,14 +671,16 @@ def get_market_analysis():
     """Get comprehensive market analysis"""
     try:
         # Get all LME market data
-        market_data = lme_provider.get_all_lme_prices()
+        market_data = layla_agent.get_market_data()
         
-        # Get LME settlement prices
-        settlement_data = lme_provider.get_lme_settlement_prices()
+        # Stored per-metal analysis and settlement prices from the latest batch run
+        analysis = batch_analysis.get_result()
         
         return jsonify({
             "lme_market_data": market_data,
-            "settlement_data": settlement_data,
+            "settlement_data": analysis.get("settlement") if analysis else None,
+            "ai_analysis": analysis["metals"] if analysis else None,
+            "analysis_generated_at": analysis["generated_at"] if analysis else None,
             "timestamp": datetime.now().isoformat(),
             "exchange": "London Metal Exchange"
         })
@@ -385,7 +693,21 @@ def get_market_analysis():
 def get_market_sentiment():
     """Get market sentiment analysis"""
     try:
-        # Mock sentiment data for now - will be enhanced later
+        analysis = batch_analysis.get_result()
+        if analysis:
+            # Served from the latest batch analysis run
+            return jsonify({
+                "overall_sentiment": analysis["overall"]["sentiment"],
+                "confidence": analysis["overall"]["confidence"],
+                "factors": analysis["overall"]["factors"],
+                "metals": {
+                    metal: {key: entry[key] for key in ("sentiment", "confidence", "factors")}
+                    for metal, entry in analysis["metals"].items()
+                },
+                "timestamp": analysis["generated_at"]
+            })
+        
+        # Placeholder until the first batch run has completed
         sentiment = {
             "overall_sentiment": "bullish",
             "confidence": 0.75,
@@ -403,30 +725,32 @@ def get_market_sentiment():
 @layla_bp.route('/arbitrage', methods=['GET'])
 @cross_origin()
 def get_arbitrage_opportunities():
-    """Get arbitrage opportunities"""
+    """Get arbitrage opportunities ranked by spread"""
     try:
-        # Mock arbitrage opportunities for now - will be enhanced later
-        opportunities = [
-            {
-                "type": "exchange_arbitrage",
-                "metal": "copper",
-                "exchanges": ["LME", "COMEX"],
-                "spread": 150,
-                "unit": "USD/tonne",
-                "confidence": "high",
-                "timestamp": datetime.now().isoformat()
-            },
-            {
-                "type": "regional_arbitrage",
-                "metal": "aluminum",
-                "regions": ["UAE", "India"],
-                "spread": 75,
-                "unit": "USD/tonne",
-                "confidence": "medium",
-                "timestamp": datetime.now().isoformat()
-            }
-        ]
-        return jsonify({"opportunities": opportunities})
+        if arbitrage_scanner is None:
+            # Not an outage: nothing to scan until distinct venue contracts are configured
+            return jsonify({
+                "opportunities": [],
+                "reason": arbitrage_unavailable,
+                "scanned_at": None,
+                "pairs_scanned": 0
+            })
+        
+        metal = request.args.get('metal')
+        try:
+            min_spread_percent = float(request.args.get('min_spread_percent', ARBITRAGE_MIN_SPREAD_PERCENT))
+            limit = int(request.args.get('limit', 20))
+        except ValueError:
+            return jsonify({"error": "min_spread_percent and limit must be numbers"}), 400
+        
+        opportunities = arbitrage_scanner.get_opportunities(min_spread_percent, metal, max(limit, 0))
+        status = arbitrage_scanner.get_status()
+        return jsonify({
+            "opportunities": opportunities,
+            "min_spread_percent": min_spread_percent,
+            "scanned_at": status["scanned_at"],
+            "pairs_scanned": status["pairs"]
+        })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -457,33 +781,48 @@ def get_supply_demand():
                     "Normal inventory levels"
                 ]
             },
+            # Precomputed per-tick indicators (EWMA volatility, z-scores, spreads)
+            "live_indicators": default_indicator_engine.snapshot(),
             "timestamp": datetime.now().isoformat()
         }
         return jsonify(indicators)
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@layla_bp.route('/indicators', methods=['GET'])
+@cross_origin()
+def get_indicators():
+    """Get rolling indicators (EWMA volatility, z-scores, spreads) for one or all metals"""
+    try:
+        if lme_provider is None:
+            return jsonify({"error": price_refresher.unavailable_reason()}), 503
+        
+        indicators = lme_provider.get_indicators(request.args.get('metal'))
+        if 'error' in indicators:
+            return jsonify(indicators), 404
+        return jsonify(indicators)
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @layla_bp.route('/price-alert', methods=['POST'])
 @cross_origin()
 def create_price_alert():
     """Create a price alert"""
     try:
-        data = request.json
+        data = request.json or {}
         metal = data.get('metal')
         target_price = data.get('target_price')
         alert_type = data.get('type', 'above')  # above or below
         
-        # In a real implementation, this would store the alert in a database
-        # For now, we'll just return a confirmation
+        if not metal or target_price is None:
+            return jsonify({"error": "metal and target_price are required"}), 400
+        if alert_type not in ALERT_TYPES:
+            return jsonify({"error": f"type must be one of {list(ALERT_TYPES)}"}), 400
         
-        alert = {
-            "id": f"alert_{datetime.now().timestamp()}",
-            "metal": metal,
-            "target_price": target_price,
-            "type": alert_type,
-            "created": datetime.now().isoformat(),
-            "status": "active"
-        }
+        try:
+            alert = alert_engine.add(metal, target_price, alert_type, data.get('note'))
+        except (TypeError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
         
         return jsonify({
             "message": f"Price alert created for {metal}",
@@ -493,6 +832,26 @@ def create_price_alert():
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@layla_bp.route('/price-alerts', methods=['GET'])
+@cross_origin()
+def list_price_alerts():
+    """List active price alerts"""
+    try:
+        return jsonify({"alerts": alert_engine.list_active(request.args.get('metal'))})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@layla_bp.route('/price-alert/<alert_id>', methods=['DELETE'])
+@cross_origin()
+def cancel_price_alert(alert_id):
+    """Cancel an active price alert"""
+    try:
+        if not alert_engine.cancel(alert_id):
+            return jsonify({"error": "Alert not found or no longer active"}), 404
+        return jsonify({"message": "Price alert cancelled", "id": alert_id})
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
 @layla_bp.route('/trading-recommendation', methods=['POST'])
 @cross_origin()
 def get_trading_recommendation():
@@ -503,8 +862,8 @@ def get_trading_recommendation():
         investment_amount = data.get('amount', 100000)
         risk_tolerance = data.get('risk_tolerance', 'medium')
         
-        # Get current market data for the metal using LME provider
-        market_data = lme_provider.get_lme_price(metal)
+        # Get current market data for the metal from the LME snapshot
+        market_data = layla_agent.get_market_data(metal)
         
         # Get market sentiment (mock data for now)
         sentiment = {
@@ -6,10 +6,15 @@ Provides real-time and accurate LME prices for non-ferrous metals
 import sys
 import json
 from datetime import datetime, timedelta
+from functools import partial
 from typing import Dict, List, Optional, Any
 
 sys.path.append('/opt/.manus/.sandbox-runtime')
 from data_api import ApiClient
+from fanout import fan_out
+from metal_units import LB_PER_TONNE, tonne_factor
+from quote_cache import CachedApiClient
+from rolling_stats import default_indicator_engine
 
 class LMEDataProvider:
     """
@@ -17,7 +22,11 @@ class LMEDataProvider:
     """
     
     def __init__(self):
-        self.client = ApiClient()
+        # Shared TTL cache so repeated chart requests within seconds hit upstream once
+        self.client = CachedApiClient(ApiClient())
+        
+        # Rolling indicators, fed from the price refresher's snapshots
+        self.indicators = default_indicator_engine
         
         # Official LME metal symbols for futures contracts
         self.lme_symbols = {
@@ -124,10 +133,11 @@ class LMEDataProvider:
                 # Use the most recent available price
                 current_price = latest_close if latest_close is not None else latest_price
                 
-                # Convert to USD per tonne (LME standard)
-                # Note: Futures prices are typically in USD per pound, convert to tonne
+                # Convert to USD per tonne (LME standard); most futures are
+                # quoted per pound, some (aluminum) already per tonne
+                factor = tonne_factor(symbol)
                 if current_price > 0:
-                    price_per_tonne = current_price * 2204.62  # Convert lb to tonne
+                    price_per_tonne = current_price * factor
                 else:
                     price_per_tonne = 0
                 
@@ -145,18 +155,19 @@ class LMEDataProvider:
                     'lme_contract': metal_info['contract'],
                     'symbol': symbol,
                     'price_usd_per_tonne': round(price_per_tonne, 2),
-                    'price_usd_per_lb': round(current_price, 4),
+                    'price_usd_per_lb': round(price_per_tonne / LB_PER_TONNE, 4),
                     'currency': 'USD',
                     'unit': metal_info['unit'],
-                    'change_usd': round(change * 2204.62, 2),
+                    'change_usd': round(change * factor, 2),
                     'change_percent': round(change_percent, 2),
                     'volume': meta.get('regularMarketVolume', 0),
-                    'day_high_usd_per_tonne': round(meta.get('regularMarketDayHigh', 0) * 2204.62, 2),
-                    'day_low_usd_per_tonne': round(meta.get('regularMarketDayLow', 0) * 2204.62, 2),
-                    'fifty_two_week_high': round(meta.get('fiftyTwoWeekHigh', 0) * 2204.62, 2),
-                    'fifty_two_week_low': round(meta.get('fiftyTwoWeekLow', 0) * 2204.62, 2),
+                    'day_high_usd_per_tonne': round(meta.get('regularMarketDayHigh', 0) * factor, 2),
+                    'day_low_usd_per_tonne': round(meta.get('regularMarketDayLow', 0) * factor, 2),
+                    'fifty_two_week_high': round(meta.get('fiftyTwoWeekHigh', 0) * factor, 2),
+                    'fifty_two_week_low': round(meta.get('fiftyTwoWeekLow', 0) * factor, 2),
                     'last_updated': datetime.now().isoformat(),
                     'data_timestamp': datetime.fromtimestamp(latest_timestamp).isoformat() if latest_timestamp else datetime.now().isoformat(),
+                    'quote_timestamp': latest_timestamp or meta.get('regularMarketTime'),
                     'exchange': 'LME',
                     'trading_status': trading_status,
                     'data_source': 'LME via Yahoo Finance',
@@ -183,10 +194,20 @@ class LMEDataProvider:
         Returns:
             Dictionary with all LME metal prices
         """
-        lme_data = {}
+        results, errors = fan_out({
+            metal: partial(self.get_lme_price, metal) for metal in self.lme_symbols
+        })
         
+        lme_data = {}
         for metal in self.lme_symbols.keys():
-            lme_data[metal] = self.get_lme_price(metal)
+            if metal in results:
+                lme_data[metal] = results[metal]
+            else:
+                lme_data[metal] = {
+                    'error': f'Failed to fetch LME price for {metal}: {errors[metal]}',
+                    'metal': metal,
+                    'exchange': 'LME'
+                }
         
         return {
             'lme_prices': lme_data,
@@ -198,6 +219,24 @@ class LMEDataProvider:
             'note': 'All prices are LME official settlement or real-time futures prices'
         }
     
+    def get_indicators(self, metal: str = None) -> Dict[str, Any]:
+        """
+        Get precomputed rolling indicators (EWMA volatility, rolling mean,
+        z-score, spreads) without fetching anything
+        
+        Args:
+            metal: Metal name (default: all metals and spreads)
+            
+        Returns:
+            Dictionary with indicator values
+        """
+        if metal is None:
+            return dict(self.indicators.snapshot(), timestamp=datetime.now().isoformat())
+        indicators = self.indicators.get(metal)
+        if indicators is None:
+            return {'error': f'No indicators yet for {metal}', 'metal': metal}
+        return dict(indicators, metal=metal.lower())
+    
     def get_lme_settlement_prices(self, date: str = None) -> Dict[str, Any]:
         """
         Get LME official settlement prices for a specific date
@@ -211,57 +250,20 @@ class LMEDataProvider:
         if date is None:
             date = datetime.now().strftime('%Y-%m-%d')
         
-        settlement_data = {}
+        results, errors = fan_out({
+            metal: partial(self._get_settlement_price, metal, date) for metal in self.lme_symbols
+        })
         
+        settlement_data = {}
         for metal in self.lme_symbols.keys():
-            try:
-                metal_info = self.lme_symbols[metal]
-                symbol = metal_info['symbol']
-                
-                # Get daily data for settlement prices
-                response = self.client.call_api('YahooFinance/get_stock_chart', query={
-                    'symbol': symbol,
-                    'region': 'US',
-                    'interval': '1d',
-                    'range': '5d',  # Get recent days to find the specific date
-                    'includeAdjustedClose': True
-                })
-                
-                if response and 'chart' in response and 'result' in response['chart']:
-                    result = response['chart']['result'][0]
-                    timestamps = result.get('timestamp', [])
-                    quotes = result['indicators']['quote'][0]
-                    
-                    # Find the settlement price for the requested date
-                    target_date = datetime.strptime(date, '%Y-%m-%d').date()
-                    
-                    for i, timestamp in enumerate(timestamps):
-                        price_date = datetime.fromtimestamp(timestamp).date()
-                        if price_date == target_date and quotes['close'][i] is not None:
-                            settlement_price = quotes['close'][i] * 2204.62  # Convert to USD/tonne
-                            
-                            settlement_data[metal] = {
-                                'metal': metal.title(),
-                                'settlement_price_usd_per_tonne': round(settlement_price, 2),
-                                'date': date,
-                                'exchange': 'LME',
-                                'contract': metal_info['contract']
-                            }
-                            break
-                    
-                    if metal not in settlement_data:
-                        settlement_data[metal] = {
-                            'error': f'No settlement data available for {metal} on {date}',
-                            'metal': metal,
-                            'date': date
-                        }
-                        
-            except Exception as e:
+            if metal in errors:
                 settlement_data[metal] = {
-                    'error': f'Failed to fetch settlement price for {metal}: {str(e)}',
+                    'error': f'Failed to fetch settlement price for {metal}: {errors[metal]}',
                     'metal': metal,
                     'date': date
                 }
+            elif results[metal] is not None:
+                settlement_data[metal] = results[metal]
         
         return {
             'settlement_date': date,
@@ -270,6 +272,58 @@ class LMEDataProvider:
             'note': 'Official LME settlement prices at 17:00 London time'
         }
     
+    def _get_settlement_price(self, metal: str, date: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the settlement price for one metal on a specific date
+        
+        Args:
+            metal: Metal name
+            date: Date in YYYY-MM-DD format
+            
+        Returns:
+            Settlement entry, or None if the upstream response had no chart data
+        """
+        metal_info = self.lme_symbols[metal]
+        symbol = metal_info['symbol']
+        
+        # Get daily data for settlement prices
+        response = self.client.call_api('YahooFinance/get_stock_chart', query={
+            'symbol': symbol,
+            'region': 'US',
+            'interval': '1d',
+            'range': '5d',  # Get recent days to find the specific date
+            'includeAdjustedClose': True
+        })
+        
+        if not (response and 'chart' in response and 'result' in response['chart']):
+            return None
+        
+        result = response['chart']['result'][0]
+        timestamps = result.get('timestamp', [])
+        quotes = result['indicators']['quote'][0]
+        
+        # Find the settlement price for the requested date
+        target_date = datetime.strptime(date, '%Y-%m-%d').date()
+        
+        for i, timestamp in enumerate(timestamps):
+            price_date = datetime.fromtimestamp(timestamp).date()
+            if price_date == target_date and quotes['close'][i] is not None:
+                settlement_price = quotes['close'][i] * tonne_factor(metal_info['symbol'])  # Convert to USD/tonne
+                
+                return {
+                    'metal': metal.title(),
+                    'settlement_price_usd_per_tonne': round(settlement_price, 2),
+                    'date': date,
+                    'exchange': 'LME',
+                    'contract': metal_info['contract']
+                }
+        
+        return {
+            'error': f'No settlement data available for {metal} on {date}',
+            'metal': metal,
+            'date': date
+        }
+    
     def _get_trading_status(self, current_time: datetime) -> str:
         """
         Determine current LME trading status based on London time
@@ -6,10 +6,17 @@ Provides real-time and historical market data for non-ferrous metals
 import sys
 import json
 from datetime import datetime, timedelta
+from functools import partial
 from typing import Dict, List, Optional, Any
 
 sys.path.append('/opt/.manus/.sandbox-runtime')
 from data_api import ApiClient
+from bar_store import HISTORY_INTERVALS, covering_range, default_bar_store
+from fanout import fan_out
+from metal_units import tonne_factor
+from ohlcv import OHLCVSeries, correlation_matrix
+from quote_cache import CachedApiClient
+from rolling_stats import default_indicator_engine
 
 class MarketDataProvider:
     """
@@ -17,7 +24,14 @@ class MarketDataProvider:
     """
     
     def __init__(self):
-        self.client = ApiClient()
+        # Shared TTL cache so repeated chart requests within seconds hit upstream once
+        self.client = CachedApiClient(ApiClient())
+        
+        # Local bar history; upstream is only asked for bars we don't have yet
+        self.bar_store = default_bar_store
+        
+        # Live indicators fed from the LME price snapshots (see layla.price_refresher)
+        self.indicators = default_indicator_engine
         
         # Metal symbols mapping for different exchanges
         self.metal_symbols = {
@@ -114,10 +128,16 @@ class MarketDataProvider:
         Returns:
             Dictionary with all metal prices
         """
-        metals_data = {}
+        results, errors = fan_out({
+            metal: partial(self.get_metal_price, metal) for metal in self.metal_symbols
+        })
         
+        metals_data = {}
         for metal in self.metal_symbols.keys():
-            metals_data[metal] = self.get_metal_price(metal)
+            if metal in results:
+                metals_data[metal] = results[metal]
+            else:
+                metals_data[metal] = {'error': f'Failed to fetch {metal} price: {errors[metal]}'}
         
         return {
             'metals': metals_data,
@@ -125,6 +145,92 @@ class MarketDataProvider:
             'data_source': 'Yahoo Finance'
         }
     
+    def get_metal_series(self, metal: str, period: str = '1mo') -> Optional[OHLCVSeries]:
+        """
+        Get daily bars for a metal as a columnar OHLCV series
+        
+        Args:
+            metal: Metal name
+            period: Time period (1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y)
+            
+        Returns:
+            OHLCVSeries, or None if no data is available
+        """
+        metal = metal.lower()
+        if metal not in self.metal_symbols:
+            raise ValueError(f'Metal {metal} not supported')
+        
+        symbol = self.metal_symbols[metal]['yahoo']
+        
+        bars = self.bar_store.get_bars(symbol, '1d', period, partial(self._fetch_bars, metal, symbol, '1d'))
+        if len(bars) == 0:
+            return None
+        return OHLCVSeries.from_bars(metal, symbol, bars)
+    
+    def get_history_bars(self, metal: str, start: Optional[float] = None, end: Optional[float] = None,
+                         interval: str = '1d'):
+        """
+        Get archived bars for a metal between two epoch timestamps
+        
+        The archive is first synced far enough back to cover start (all
+        available history if start is None).
+        
+        Args:
+            metal: Metal name
+            start: Range start in epoch seconds (inclusive)
+            end: Range end in epoch seconds (inclusive)
+            interval: Bar interval (one of HISTORY_INTERVALS)
+            
+        Returns:
+            (symbol, bars) where bars is a zero-copy BAR_DTYPE slice of the archive
+        """
+        metal = metal.lower()
+        if metal not in self.metal_symbols:
+            raise ValueError(f'Metal {metal} not supported')
+        if interval not in HISTORY_INTERVALS:
+            raise ValueError(f'interval must be one of {list(HISTORY_INTERVALS)}')
+        
+        symbol = self.metal_symbols[metal]['yahoo']
+        period = covering_range(datetime.now().timestamp() - start) if start is not None else 'max'
+        self.bar_store.sync(symbol, interval, period, partial(self._fetch_bars, metal, symbol, interval))
+        return symbol, self.bar_store.read(symbol, interval, start, end)
+    
+    def _fetch_bars(self, metal: str, symbol: str, interval: str, period: str):
+        """Fetch bars for a chart range from upstream as a BAR_DTYPE array (None if unavailable)"""
+        response = self.client.call_api('YahooFinance/get_stock_chart', query={
+            'symbol': symbol,
+            'region': 'US',
+            'interval': interval,
+            'range': period,
+            'includeAdjustedClose': True
+        })
+        
+        if response and 'chart' in response and response['chart'].get('result'):
+            return OHLCVSeries.from_chart(metal, symbol, response['chart']['result'][0]).to_bars()
+        return None
+    
+    def get_venue_quotes(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """
+        Get the current price of every metal on every venue it is mapped to
+        
+        Returns:
+            Dictionary of metal -> venue -> price data (as get_metal_price)
+        """
+        calls = {
+            (metal, venue): partial(self.get_metal_price, metal, venue)
+            for metal, venues in self.metal_symbols.items()
+            for venue in venues
+        }
+        results, errors = fan_out(calls)
+        
+        quotes = {}
+        for metal, venue in calls:
+            if (metal, venue) in results:
+                quotes.setdefault(metal, {})[venue] = results[(metal, venue)]
+            else:
+                quotes.setdefault(metal, {})[venue] = {'error': errors[(metal, venue)]}
+        return quotes
+    
     def get_metal_historical_data(self, metal: str, period: str = '1mo') -> Dict[str, Any]:
         """
         Get historical price data for a metal
@@ -140,46 +246,81 @@ class MarketDataProvider:
             if metal.lower() not in self.metal_symbols:
                 return {'error': f'Metal {metal} not supported'}
             
-            symbol = self.metal_symbols[metal.lower()]['yahoo']
-            
-            response = self.client.call_api('YahooFinance/get_stock_chart', query={
-                'symbol': symbol,
-                'region': 'US',
-                'interval': '1d',
-                'range': period,
-                'includeAdjustedClose': True
-            })
-            
-            if response and 'chart' in response and 'result' in response['chart']:
-                result = response['chart']['result'][0]
-                timestamps = result['timestamp']
-                quotes = result['indicators']['quote'][0]
-                
-                historical_data = []
-                for i, timestamp in enumerate(timestamps):
-                    if i < len(quotes['close']) and quotes['close'][i] is not None:
-                        historical_data.append({
-                            'date': datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d'),
-                            'open': quotes['open'][i],
-                            'high': quotes['high'][i],
-                            'low': quotes['low'][i],
-                            'close': quotes['close'][i],
-                            'volume': quotes['volume'][i] if quotes['volume'][i] else 0
-                        })
-                
-                return {
-                    'metal': metal,
-                    'symbol': symbol,
-                    'period': period,
-                    'data': historical_data,
-                    'data_points': len(historical_data)
-                }
-            else:
+            series = self.get_metal_series(metal, period)
+            if series is None:
                 return {'error': f'No historical data available for {metal}'}
+            
+            historical_data = series.to_records()
+            return {
+                'metal': metal,
+                'symbol': series.symbol,
+                'period': period,
+                'data': historical_data,
+                'data_points': len(historical_data)
+            }
                 
         except Exception as e:
             return {'error': f'Failed to fetch historical data for {metal}: {str(e)}'}
     
+    def get_all_metal_series(self, period: str = '3mo') -> Dict[str, OHLCVSeries]:
+        """
+        Get daily series for every supported metal in parallel
+        
+        Returns:
+            Dictionary of metal -> OHLCVSeries (metals without data are omitted)
+        """
+        results, errors = fan_out({
+            metal: partial(self.get_metal_series, metal, period) for metal in self.metal_symbols
+        })
+        for metal, error in errors.items():
+            print(f"Error fetching {metal} history: {error}")
+        return {metal: series for metal, series in results.items() if series is not None and len(series)}
+    
+    def get_metal_analytics(self, metal: str, period: str = '1y') -> Dict[str, Any]:
+        """
+        Get returns, moving averages, volatility and drawdown for a metal
+        
+        Args:
+            metal: Metal name
+            period: History window the analytics are computed over
+            
+        Returns:
+            Dictionary with analytics
+        """
+        try:
+            if metal.lower() not in self.metal_symbols:
+                return {'error': f'Metal {metal} not supported'}
+            
+            series = self.get_metal_series(metal, period)
+            if series is None or not len(series):
+                return {'error': f'No historical data available for {metal}'}
+            
+            return {
+                'metal': metal,
+                'symbol': series.symbol,
+                'period': period,
+                'analytics': series.summary(),
+                'analysis_timestamp': datetime.now().isoformat()
+            }
+        except Exception as e:
+            return {'error': f'Failed to compute analytics for {metal}: {str(e)}'}
+    
+    def get_metal_correlations(self, period: str = '1y') -> Dict[str, Any]:
+        """
+        Get the correlation matrix of daily returns across all metals
+        
+        Args:
+            period: History window
+            
+        Returns:
+            Dictionary with metals, matrix and number of observations
+        """
+        series = self.get_all_metal_series(period)
+        correlations = correlation_matrix(list(series.values()))
+        correlations['period'] = period
+        correlations['analysis_timestamp'] = datetime.now().isoformat()
+        return correlations
+    
     def get_market_sentiment(self) -> Dict[str, Any]:
         """
         Get market sentiment from related mining stocks and ETFs
@@ -197,71 +338,49 @@ class MarketDataProvider:
         negative_count = 0
         total_count = 0
         
-        # Check mining companies
-        for symbol in self.related_stocks['mining_companies']:
-            try:
-                response = self.client.call_api('YahooFinance/get_stock_chart', query={
-                    'symbol': symbol,
-                    'region': 'US',
-                    'interval': '1d',
-                    'range': '5d'
-                })
-                
-                if response and 'chart' in response and 'result' in response['chart']:
-                    result = response['chart']['result'][0]
-                    meta = result['meta']
-                    
-                    current_price = meta.get('regularMarketPrice', 0)
-                    previous_close = meta.get('previousClose', current_price)
-                    change_percent = ((current_price - previous_close) / previous_close * 100) if previous_close != 0 else 0
-                    
-                    sentiment_data['mining_companies'][symbol] = {
-                        'price': current_price,
-                        'change_percent': change_percent,
-                        'sentiment': 'positive' if change_percent > 0 else 'negative' if change_percent < 0 else 'neutral'
-                    }
-                    
-                    if change_percent > 0:
-                        positive_count += 1
-                    elif change_percent < 0:
-                        negative_count += 1
-                    total_count += 1
-                    
-            except Exception as e:
-                sentiment_data['mining_companies'][symbol] = {'error': str(e)}
+        # Fetch all mining companies and metal ETFs in parallel
+        symbols = self.related_stocks['mining_companies'] + self.related_stocks['metal_etfs']
+        responses, errors = fan_out({
+            symbol: partial(self.client.call_api, 'YahooFinance/get_stock_chart', query={
+                'symbol': symbol,
+                'region': 'US',
+                'interval': '1d',
+                'range': '5d'
+            })
+            for symbol in symbols
+        })
         
-        # Check metal ETFs
-        for symbol in self.related_stocks['metal_etfs']:
-            try:
-                response = self.client.call_api('YahooFinance/get_stock_chart', query={
-                    'symbol': symbol,
-                    'region': 'US',
-                    'interval': '1d',
-                    'range': '5d'
-                })
+        for category in ('mining_companies', 'metal_etfs'):
+            for symbol in self.related_stocks[category]:
+                if symbol in errors:
+                    sentiment_data[category][symbol] = {'error': errors[symbol]}
+                    continue
                 
-                if response and 'chart' in response and 'result' in response['chart']:
-                    result = response['chart']['result'][0]
-                    meta = result['meta']
+                try:
+                    response = responses[symbol]
                     
-                    current_price = meta.get('regularMarketPrice', 0)
-                    previous_close = meta.get('previousClose', current_price)
-                    change_percent = ((current_price - previous_close) / previous_close * 100) if previous_close != 0 else 0
-                    
-                    sentiment_data['metal_etfs'][symbol] = {
-                        'price': current_price,
-                        'change_percent': change_percent,
-                        'sentiment': 'positive' if change_percent > 0 else 'negative' if change_percent < 0 else 'neutral'
-                    }
-                    
-                    if change_percent > 0:
-                        positive_count += 1
-                    elif change_percent < 0:
-                        negative_count += 1
-                    total_count += 1
-                    
-            except Exception as e:
-                sentiment_data['metal_etfs'][symbol] = {'error': str(e)}
+                    if response and 'chart' in response and 'result' in response['chart']:
+                        result = response['chart']['result'][0]
+                        meta = result['meta']
+                        
+                        current_price = meta.get('regularMarketPrice', 0)
+                        previous_close = meta.get('previousClose', current_price)
+                        change_percent = ((current_price - previous_close) / previous_close * 100) if previous_close != 0 else 0
+                        
+                        sentiment_data[category][symbol] = {
+                            'price': current_price,
+                            'change_percent': change_percent,
+                            'sentiment': 'positive' if change_percent > 0 else 'negative' if change_percent < 0 else 'neutral'
+                        }
+                        
+                        if change_percent > 0:
+                            positive_count += 1
+                        elif change_percent < 0:
+                            negative_count += 1
+                        total_count += 1
+                        
+                except Exception as e:
+                    sentiment_data[category][symbol] = {'error': str(e)}
         
         # Calculate overall sentiment
         if total_count > 0:
@@ -293,6 +412,7 @@ class MarketDataProvider:
         
         # This is a simplified example - in reality, you'd compare prices across different exchanges
         metals_data = self.get_all_metals_prices()
+        history = self.get_all_metal_series('3mo')
         
         for metal, data in metals_data.get('metals', {}).items():
             if 'error' not in data:
@@ -301,16 +421,54 @@ class MarketDataProvider:
                 current_price = data.get('price', 0)
                 volatility = (day_range / current_price * 100) if current_price > 0 else 0
                 
-                if volatility > 2:  # More than 2% daily range
+                # Compare today's range with the metal's own recent typical range
+                analytics = history[metal].summary() if metal in history else {}
+                avg_range = analytics.get('avg_range_20d_percent')
+                unusual_range = bool(avg_range) and volatility > 1.5 * avg_range
+                live = self.indicators.get(metal) or {}
+                
+                if volatility > 2 or unusual_range:  # More than 2% daily range, or 1.5x the usual range
                     opportunities.append({
                         'metal': metal,
                         'type': 'high_volatility',
                         'current_price': current_price,
                         'day_range': day_range,
                         'volatility_percent': volatility,
+                        'avg_range_20d_percent': avg_range,
+                        'realized_volatility_20d_percent': analytics.get('volatility_20d_annualized_percent'),
+                        'ewma_volatility_percent': live.get('ewma_volatility_percent'),
                         'recommendation': f'Monitor {metal} for intraday trading opportunities',
-                        'confidence': 'medium' if volatility > 3 else 'low'
+                        'confidence': 'medium' if volatility > 3 or (unusual_range and volatility > 2) else 'low'
                     })
+                
+                # Price stretched away from its rolling mean on the live feed
+                # The live feed is in USD/tonne; futures quotes are mostly per pound
+                zscore = live.get('zscore')
+                if zscore is not None and abs(zscore) >= 2:
+                    symbol = self.metal_symbols.get(metal, {}).get('yahoo', '')
+                    opportunities.append({
+                        'metal': metal,
+                        'type': 'mean_reversion',
+                        'current_price_usd_per_tonne': round(current_price * tonne_factor(symbol), 2),
+                        'zscore': zscore,
+                        'rolling_mean_usd_per_tonne': live.get('rolling_mean'),
+                        'recommendation': f'{metal.title()} is {abs(zscore):.1f} standard deviations '
+                                          f'{"above" if zscore > 0 else "below"} its rolling mean',
+                        'confidence': 'medium' if abs(zscore) >= 3 else 'low'
+                    })
+        
+        # Inter-metal spreads that have moved away from their rolling mean
+        for name, spread in self.indicators.snapshot()['spreads'].items():
+            if spread.get('zscore') is not None and abs(spread['zscore']) >= 2:
+                opportunities.append({
+                    'type': 'spread',
+                    'spread': name,
+                    'legs': spread['legs'],
+                    'spread_usd_per_tonne': spread['last'],
+                    'zscore': spread['zscore'],
+                    'recommendation': f'{name} spread is stretched; consider a relative-value trade',
+                    'confidence': 'medium' if abs(spread['zscore']) >= 3 else 'low'
+                })
         
         return opportunities
     
@@ -325,12 +483,21 @@ class MarketDataProvider:
         # For now, we'll use price trends and volume as proxies
         
         indicators = {}
-        metals_data = self.get_all_metals_prices()
+        history = self.get_all_metal_series('3mo')
+        
+        # Prefer the latest quotes already seen by the live indicator engine;
+        # only go upstream when some metal has not ticked yet
+        live = {metal: self.indicators.get(metal) for metal in self.metal_symbols}
+        if all(live.values()):
+            metals_data = {'metals': live}
+        else:
+            metals_data = self.get_all_metals_prices()
         
         for metal, data in metals_data.get('metals', {}).items():
             if 'error' not in data:
                 change_percent = data.get('change_percent', 0)
                 volume = data.get('volume', 0)
+                analytics = history[metal].summary() if metal in history else {}
                 
                 # Simple heuristic based on price movement and volume
                 if change_percent > 1 and volume > 1000000:
@@ -349,11 +516,20 @@ class MarketDataProvider:
                     'change_percent': change_percent,
                     'volume': volume
                 }
+                
+                sma_20, sma_50 = analytics.get('sma_20'), analytics.get('sma_50')
+                if sma_20 and sma_50:
+                    indicators[metal]['medium_term_trend'] = 'up' if sma_20 > sma_50 else 'down'
+                if live[metal]:
+                    indicators[metal]['zscore'] = live[metal]['zscore']
+                    indicators[metal]['ewma_volatility_percent'] = live[metal]['ewma_volatility_percent']
+                indicators[metal]['return_20d_percent'] = analytics.get('return_20d_percent')
+                indicators[metal]['volatility_20d_annualized_percent'] = analytics.get('volatility_20d_annualized_percent')
         
         return {
             'indicators': indicators,
             'analysis_timestamp': datetime.now().isoformat(),
-            'note': 'Analysis based on price trends and trading volume'
+            'note': 'Analysis based on price trends, trading volume and 3-month price history'
         }
 
 # Example usage and testing
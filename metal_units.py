@@ -0,0 +1,27 @@
+"""
+Metal Units - Quote units of the futures contracts we price from
+Single source of truth for converting upstream quotes to USD/tonne, shared
+by the LME provider and the arbitrage scanner
+"""
+
+LB_PER_TONNE = 2204.62
+
+# Quote unit per futures symbol; anything not listed is quoted per pound
+SYMBOL_UNITS = {
+    'ALI=F': 'tonne'  # COMEX aluminum is quoted in USD/tonne
+}
+
+
+def symbol_unit(symbol: str) -> str:
+    """Quote unit ('lb' or 'tonne') of a futures symbol"""
+    return SYMBOL_UNITS.get(symbol, 'lb')
+
+
+def tonne_factor(symbol: str) -> float:
+    """Multiplier taking a quote for symbol to USD/tonne"""
+    return LB_PER_TONNE if symbol_unit(symbol) == 'lb' else 1.0
+
+
+def to_usd_per_tonne(price: float, symbol: str) -> float:
+    """Convert a quote for symbol to USD/tonne"""
+    return price * tonne_factor(symbol)
@@ -0,0 +1,250 @@
+"""
+OHLCV - Columnar time series and vectorized analytics for metal prices
+Stores daily bars as NumPy arrays (one per field) and computes returns,
+moving averages, volatility, drawdown and correlation without Python
+loops over rows
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+TRADING_DAYS_PER_YEAR = 252
+
+FIELDS = ('open', 'high', 'low', 'close', 'volume')
+
+# Fixed-width on-disk/row layout of one bar (48 bytes, little-endian)
+BAR_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<i8')
+])
+
+
+class OHLCVSeries:
+    """
+    Column-oriented OHLCV bars for one symbol, sorted by timestamp
+
+    Every column is a float64 array of the same length; timestamps are
+    int64 epoch seconds. Missing values are NaN.
+    """
+
+    __slots__ = ('metal', 'symbol', 'timestamps', 'open', 'high', 'low', 'close', 'volume')
+
+    def __init__(self, metal: str, symbol: str, timestamps: np.ndarray, open: np.ndarray,
+                 high: np.ndarray, low: np.ndarray, close: np.ndarray, volume: np.ndarray):
+        self.metal = metal
+        self.symbol = symbol
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.open = np.asarray(open, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.close = np.asarray(close, dtype=np.float64)
+        self.volume = np.asarray(volume, dtype=np.float64)
+
+    @classmethod
+    def from_chart(cls, metal: str, symbol: str, result: Dict[str, Any]) -> 'OHLCVSeries':
+        """
+        Build a series from one YahooFinance/get_stock_chart result
+
+        Bars without a close are dropped; a missing volume counts as 0.
+
+        Args:
+            metal: Metal name
+            symbol: Ticker symbol
+            result: response['chart']['result'][0]
+        """
+        timestamps = np.asarray(result.get('timestamp') or [], dtype=np.int64)
+        quotes = result['indicators']['quote'][0]
+        n = len(timestamps)
+
+        columns = {}
+        for field in FIELDS:
+            # None becomes NaN; short columns are padded so every array has length n
+            values = np.array((quotes.get(field) or [])[:n], dtype=np.float64)
+            if len(values) < n:
+                values = np.concatenate([values, np.full(n - len(values), np.nan)])
+            columns[field] = values
+        columns['volume'] = np.nan_to_num(columns['volume'], nan=0.0)
+
+        keep = ~np.isnan(columns['close'])
+        order = np.argsort(timestamps[keep], kind='stable')
+        return cls(metal, symbol, timestamps[keep][order],
+                   **{field: columns[field][keep][order] for field in FIELDS})
+
+    @classmethod
+    def from_bars(cls, metal: str, symbol: str, bars: np.ndarray) -> 'OHLCVSeries':
+        """Build a series from a BAR_DTYPE record array"""
+        return cls(metal, symbol, bars['timestamp'], bars['open'], bars['high'],
+                   bars['low'], bars['close'], bars['volume'])
+
+    def to_bars(self) -> np.ndarray:
+        """Convert to a BAR_DTYPE record array"""
+        bars = np.empty(len(self), dtype=BAR_DTYPE)
+        bars['timestamp'] = self.timestamps
+        for field in FIELDS:
+            bars[field] = getattr(self, field)
+        return bars
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def dates(self) -> np.ndarray:
+        """ISO dates (UTC) of every bar"""
+        return self.timestamps.astype('datetime64[s]').astype('datetime64[D]').astype(str)
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Convert to the list-of-dicts shape used in API responses"""
+        columns = [self.dates().tolist()] + [getattr(self, field).tolist() for field in FIELDS[:-1]]
+        columns.append(self.volume.astype(np.int64).tolist())
+        return [
+            {'date': d, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+            for d, o, h, l, c, v in zip(*columns)
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        """Headline analytics for the series"""
+        return summarize(self.close, self.high, self.low)
+
+
+def log_returns(prices: np.ndarray) -> np.ndarray:
+    """Log returns (length n-1)"""
+    return np.diff(np.log(np.asarray(prices, dtype=np.float64)))
+
+
+def moving_average(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Simple moving average via a cumulative sum
+
+    Returns:
+        Array the same length as values, NaN until the window fills
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if window <= 0 or len(values) < window:
+        return out
+    csum = np.cumsum(np.insert(values, 0, 0.0))
+    out[window - 1:] = (csum[window:] - csum[:-window]) / window
+    return out
+
+
+def rolling_volatility(returns: np.ndarray, window: int,
+                       periods_per_year: int = TRADING_DAYS_PER_YEAR) -> np.ndarray:
+    """
+    Annualized rolling standard deviation of returns (sample, ddof=1)
+
+    Returns:
+        Array the same length as returns, NaN until the window fills
+    """
+    returns = np.asarray(returns, dtype=np.float64)
+    out = np.full(len(returns), np.nan)
+    if window < 2 or len(returns) < window:
+        return out
+    csum = np.cumsum(np.insert(returns, 0, 0.0))
+    csq = np.cumsum(np.insert(returns * returns, 0, 0.0))
+    total = csum[window:] - csum[:-window]
+    total_sq = csq[window:] - csq[:-window]
+    variance = (total_sq - total * total / window) / (window - 1)
+    out[window - 1:] = np.sqrt(np.clip(variance, 0.0, None) * periods_per_year)
+    return out
+
+
+def drawdown(prices: np.ndarray) -> np.ndarray:
+    """Drawdown from the running peak at each point (0 or negative)"""
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(prices) == 0:
+        return prices
+    return prices / np.maximum.accumulate(prices) - 1.0
+
+
+def max_drawdown(prices: np.ndarray) -> float:
+    """Deepest peak-to-trough decline (0 or negative)"""
+    dd = drawdown(prices)
+    return float(dd.min()) if len(dd) else 0.0
+
+
+def align(series: List[OHLCVSeries], field: str = 'close') -> Dict[str, Any]:
+    """
+    Align several series on their common timestamps
+
+    Returns:
+        {'timestamps': array, 'columns': {metal: array}}
+    """
+    if not series:
+        return {'timestamps': np.array([], dtype=np.int64), 'columns': {}}
+    common = series[0].timestamps
+    for s in series[1:]:
+        common = np.intersect1d(common, s.timestamps)
+    columns = {}
+    for s in series:
+        idx = np.searchsorted(s.timestamps, common)
+        columns[s.metal] = getattr(s, field)[idx]
+    return {'timestamps': common, 'columns': columns}
+
+
+def correlation_matrix(series: List[OHLCVSeries]) -> Dict[str, Any]:
+    """
+    Pairwise correlation of daily log returns on common dates
+
+    Returns:
+        {'metals': [...], 'matrix': [[...]], 'observations': n}
+    """
+    aligned = align(series)
+    metals = list(aligned['columns'])
+    if len(aligned['timestamps']) < 3 or not metals:
+        return {'metals': metals, 'matrix': [], 'observations': 0}
+    returns = np.vstack([log_returns(aligned['columns'][m]) for m in metals])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        matrix = np.corrcoef(returns)
+    matrix = np.atleast_2d(matrix)
+    return {
+        'metals': metals,
+        'matrix': np.round(np.nan_to_num(matrix), 4).tolist(),
+        'observations': returns.shape[1]
+    }
+
+
+def _last(values: np.ndarray) -> Optional[float]:
+    if len(values) == 0 or np.isnan(values[-1]):
+        return None
+    return round(float(values[-1]), 4)
+
+
+def _period_return(close: np.ndarray, periods: int) -> Optional[float]:
+    if len(close) <= periods:
+        return None
+    return round(float((close[-1] / close[-1 - periods] - 1.0) * 100), 4)
+
+
+def summarize(close: np.ndarray, high: np.ndarray = None, low: np.ndarray = None) -> Dict[str, Any]:
+    """
+    Headline analytics over a close price column
+
+    Returns:
+        Dictionary of latest values (percentages where noted)
+    """
+    close = np.asarray(close, dtype=np.float64)
+    returns = log_returns(close)
+    summary = {
+        'data_points': int(len(close)),
+        'last_close': _last(close),
+        'return_1d_percent': _period_return(close, 1),
+        'return_5d_percent': _period_return(close, 5),
+        'return_20d_percent': _period_return(close, 20),
+        'sma_20': _last(moving_average(close, 20)),
+        'sma_50': _last(moving_average(close, 50)),
+        'volatility_20d_annualized_percent': None,
+        'max_drawdown_percent': round(max_drawdown(close) * 100, 4),
+        'current_drawdown_percent': round(float(drawdown(close)[-1]) * 100, 4) if len(close) else None
+    }
+    vol = _last(rolling_volatility(returns, 20))
+    if vol is not None:
+        summary['volatility_20d_annualized_percent'] = round(vol * 100, 4)
+    if high is not None and low is not None and len(close):
+        # Average daily high-low range as a percent of close, a typical-move baseline
+        ranges = (np.asarray(high) - np.asarray(low))[-20:] / close[-20:]
+        summary['avg_range_20d_percent'] = round(float(np.nanmean(ranges)) * 100, 4)
+    return summary
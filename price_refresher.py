@@ -0,0 +1,172 @@
+"""
+Price Refresher - Background LME price snapshots
+Fetches all LME prices on a schedule and publishes an immutable snapshot
+that request handlers can read without any network I/O
+"""
+
+import threading
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+
+class PriceSnapshot:
+    """
+    Immutable result of one refresh cycle
+    """
+
+    __slots__ = ('_payload', 'version', 'fetched_at', '_fetched_monotonic')
+
+    def __init__(self, payload: Dict[str, Any], version: int):
+        object.__setattr__(self, '_payload', payload)
+        object.__setattr__(self, 'version', version)
+        object.__setattr__(self, 'fetched_at', datetime.now())
+        object.__setattr__(self, '_fetched_monotonic', time.monotonic())
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PriceSnapshot is immutable')
+
+    def age_seconds(self) -> float:
+        """Seconds elapsed since this snapshot was fetched"""
+        return time.monotonic() - self._fetched_monotonic
+
+    def get_metal(self, metal: str) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached price entry for a single metal
+
+        Args:
+            metal: Metal name (copper, aluminum, zinc, lead, nickel, tin)
+
+        Returns:
+            Price dictionary, or None if the metal is not in the snapshot
+        """
+        return self._payload.get('lme_prices', {}).get(metal.lower())
+
+    def to_response(self) -> Dict[str, Any]:
+        """
+        Build a response dictionary annotated with snapshot freshness.
+        Nested price dictionaries are shared and must be treated as read-only.
+        """
+        response = dict(self._payload)
+        response['snapshot_version'] = self.version
+        response['snapshot_fetched_at'] = self.fetched_at.isoformat()
+        response['snapshot_age_seconds'] = round(self.age_seconds(), 1)
+        return response
+
+
+class PriceRefresher:
+    """
+    Refreshes LME prices on a background thread and publishes snapshots
+    """
+
+    def __init__(self, provider, interval: float = 30.0):
+        """
+        Args:
+            provider: LMEDataProvider (anything with get_all_lme_prices())
+            interval: Seconds between refresh cycles
+        """
+        self.provider = provider
+        self.interval = interval
+        self.last_error = None
+
+        self._snapshot = None
+        self._version = 0
+        self._listeners = []
+        self._refresh_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def add_listener(self, listener: Callable[[PriceSnapshot], Any]):
+        """
+        Call listener(snapshot) after every successful refresh
+
+        Listeners run on the refresh thread and should be quick; errors are
+        logged and don't stop the refresh.
+        """
+        self._listeners.append(listener)
+
+    def start(self):
+        """Start the background refresh thread (no-op if already running)"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='lme-price-refresher', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = None):
+        """Stop the background refresh thread"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def refresh(self) -> Optional[PriceSnapshot]:
+        """
+        Fetch fresh prices and publish a new snapshot
+
+        Metals that fail to refresh keep their last good price so a single
+        upstream error doesn't blank out the dashboard.
+
+        Returns:
+            The current snapshot after the refresh attempt
+        """
+        with self._refresh_lock:
+            try:
+                payload = self.provider.get_all_lme_prices()
+            except Exception as e:
+                self.last_error = f'{datetime.now().isoformat()}: {str(e)}'
+                print(f"Error refreshing LME prices: {e}")
+                return self._snapshot
+
+            previous = self._snapshot
+            if previous is not None:
+                prices = dict(payload.get('lme_prices', {}))
+                for metal, data in prices.items():
+                    if 'error' in data:
+                        last_good = previous.get_metal(metal)
+                        if last_good is not None and 'error' not in last_good:
+                            prices[metal] = last_good
+                payload = dict(payload, lme_prices=prices)
+
+            self._version += 1
+            # Publishing is a single reference swap, so readers never see a partial update
+            self._snapshot = PriceSnapshot(payload, self._version)
+            self.last_error = None
+
+            for listener in self._listeners:
+                try:
+                    listener(self._snapshot)
+                except Exception as e:
+                    print(f"Error in price snapshot listener: {e}")
+            return self._snapshot
+
+    def get_snapshot(self) -> Optional[PriceSnapshot]:
+        """
+        Get the latest published snapshot without any network I/O.
+        Returns None until the first refresh succeeds (see unavailable_reason).
+        """
+        return self._snapshot
+
+    def unavailable_reason(self) -> str:
+        """Why no snapshot is available yet: the last refresh error, or warming up"""
+        if self.last_error:
+            return f'LME prices unavailable: {self.last_error}'
+        return 'LME prices warming up; the first refresh has not completed yet'
+
+    def get_status(self) -> Dict[str, Any]:
+        """Get refresher health information"""
+        snapshot = self._snapshot
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'interval_seconds': self.interval,
+            'snapshot_version': snapshot.version if snapshot else None,
+            'snapshot_age_seconds': round(snapshot.age_seconds(), 1) if snapshot else None,
+            'last_error': self.last_error
+        }
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            started = time.monotonic()
+            self.refresh()
+            elapsed = time.monotonic() - started
+            self._stop_event.wait(max(0.0, self.interval - elapsed))
@@ -0,0 +1,89 @@
+"""
+Prompt Encoding - Compact market data renderers for LLM prompts
+Turns verbose LME price dictionaries into one dense line per metal so
+every chat turn spends fewer prompt tokens on market data
+"""
+
+import json
+from typing import Any, Dict
+
+MARKET_DATA_FORMATS = ('compact', 'json')
+
+# Fixed metal order keeps the rendered text byte-stable between calls
+METAL_ORDER = ('copper', 'aluminum', 'zinc', 'lead', 'nickel', 'tin')
+
+
+def _format_number(value: Any) -> str:
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return '?'
+    return f'{value:.2f}'.rstrip('0').rstrip('.')
+
+
+def _ordered_metals(prices: Dict[str, Any]):
+    known = [m for m in METAL_ORDER if m in prices]
+    others = sorted(m for m in prices if m not in METAL_ORDER)
+    return known + others
+
+
+def render_compact_market_data(market_data: Dict[str, Any]) -> str:
+    """
+    Render market data as one line per metal
+
+    Accepts either a get_all_lme_prices()/snapshot dictionary ('lme_prices'
+    mapping) or a plain {metal: {'price', 'change'}} mapping.
+
+    Example output:
+        LME USD/t: metal price chg% [day low-high]
+        copper 10251.48 +0.43% [10141.3-10362.2]
+        tin n/a
+
+    An error dictionary ({'error': ...}) renders as a single error line.
+    """
+    if 'error' in market_data and 'lme_prices' not in market_data:
+        return f"LME market data error: {market_data['error']}"
+    prices = market_data.get('lme_prices', market_data)
+    lines = ['LME USD/t: metal price chg% [day low-high]']
+    statuses = set()
+
+    for metal in _ordered_metals(prices):
+        data = prices[metal]
+        if not isinstance(data, dict) or 'error' in data:
+            lines.append(f'{metal} n/a')
+            continue
+
+        price = data.get('price_usd_per_tonne', data.get('price'))
+        change = data.get('change_percent', data.get('change', 0)) or 0
+        line = f'{metal} {_format_number(price)} {float(change):+.2f}%'
+
+        low = data.get('day_low_usd_per_tonne')
+        high = data.get('day_high_usd_per_tonne')
+        if low and high:
+            line += f' [{_format_number(low)}-{_format_number(high)}]'
+        lines.append(line)
+
+        if data.get('trading_status'):
+            statuses.add(data['trading_status'])
+
+    if statuses:
+        lines.append('session: ' + ', '.join(sorted(statuses)))
+    return '\n'.join(lines)
+
+
+def render_market_data(market_data: Dict[str, Any], fmt: str = 'compact') -> str:
+    """
+    Render market data for a prompt in the requested format
+
+    Args:
+        market_data: Market data dictionary
+        fmt: 'compact' (one line per metal) or 'json' (full dictionary)
+
+    Returns:
+        Prompt text
+    """
+    if fmt == 'json':
+        return json.dumps(market_data)
+    if fmt == 'compact':
+        return render_compact_market_data(market_data)
+    raise ValueError(f'Unknown market data format {fmt!r}. Available: {list(MARKET_DATA_FORMATS)}')
@@ -0,0 +1,176 @@
+"""
+Quote Cache - TTL + LRU cache in front of ApiClient.call_api
+Caches chart responses keyed by (endpoint, symbol, interval, range), with
+interval-dependent TTLs, a bounded entry count and request coalescing
+(via SingleFlight). Callers get their own copy of each cached response.
+"""
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from single_flight import SingleFlight
+
+# How long a chart stays fresh, by bar interval (seconds)
+INTERVAL_TTLS = {
+    '1m': 15,
+    '2m': 30,
+    '5m': 60,
+    '15m': 120,
+    '30m': 300,
+    '60m': 600,
+    '90m': 600,
+    '1h': 600,
+    '1d': 900,
+    '5d': 1800,
+    '1wk': 3600,
+    '1mo': 3600,
+    '3mo': 3600
+}
+
+
+class QuoteCache:
+    """
+    Thread-safe TTL + LRU cache with single-flight misses
+    """
+
+    def __init__(self, max_entries: int = 512, ttls: Dict[str, float] = None, default_ttl: float = 60):
+        """
+        Args:
+            max_entries: Maximum cached responses before LRU eviction
+            ttls: Interval -> TTL seconds overrides (defaults to INTERVAL_TTLS)
+            default_ttl: TTL for intervals not listed in ttls
+        """
+        self.max_entries = max_entries
+        self.ttls = dict(INTERVAL_TTLS, **(ttls or {}))
+        self.default_ttl = default_ttl
+
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._flight = SingleFlight()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.evictions = 0
+
+    def ttl_for(self, query: Optional[Dict[str, Any]]) -> float:
+        """Get the TTL for a request based on its bar interval"""
+        interval = (query or {}).get('interval')
+        return self.ttls.get(interval, self.default_ttl)
+
+    @staticmethod
+    def make_key(endpoint: str, query: Optional[Dict[str, Any]]) -> Hashable:
+        """Build a cache key from the endpoint and its query parameters"""
+        query = query or {}
+        extras = tuple(sorted(
+            (k, str(v)) for k, v in query.items() if k not in ('symbol', 'interval', 'range')
+        ))
+        return (endpoint, query.get('symbol'), query.get('interval'), query.get('range'), extras)
+
+    def get_or_fetch(self, key: Hashable, ttl: float, fetch: Callable[[], Any],
+                     cacheable: Callable[[Any], bool] = None) -> Any:
+        """
+        Return a fresh cached value, or call fetch() once for all concurrent callers
+
+        Args:
+            key: Cache key
+            ttl: Seconds the fetched value stays fresh
+            fetch: Zero-argument callable that performs the upstream call
+            cacheable: Optional predicate; values it rejects are returned but not stored
+
+        Returns:
+            A copy of the cached or freshly fetched value
+        """
+        value = self._get_fresh(key)
+        if value is None:
+            value = self._flight.do(key, lambda: self._fetch_and_store(key, ttl, fetch, cacheable))
+        # Cached responses are shared; callers may mutate what they get back
+        return copy.deepcopy(value)
+
+    def _get_fresh(self, key: Hashable) -> Any:
+        """Get a cached value that has not expired, or None"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def _fetch_and_store(self, key: Hashable, ttl: float, fetch: Callable[[], Any],
+                         cacheable: Optional[Callable[[Any], bool]]) -> Any:
+        # A previous flight may have stored the value after our cache check
+        value = self._get_fresh(key)
+        if value is not None:
+            return value
+        value = fetch()
+        if cacheable is None or cacheable(value):
+            with self._lock:
+                self._entries[key] = (time.monotonic() + ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def clear(self):
+        """Drop all cached entries (in-flight calls are unaffected)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        flight = self._flight.stats()
+        with self._lock:
+            misses, coalesced = flight['executed'], flight['shared']
+            lookups = self.hits + misses + coalesced
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': misses,
+                'coalesced': coalesced,
+                'evictions': self.evictions,
+                'in_flight': flight['in_flight'],
+                'hit_ratio': round((self.hits + coalesced) / lookups, 3) if lookups else 0
+            }
+
+
+def _is_cacheable_response(response: Any) -> bool:
+    return bool(response) and not (isinstance(response, dict) and 'error' in response)
+
+
+class CachedApiClient:
+    """
+    Drop-in ApiClient wrapper that serves call_api through a QuoteCache
+    """
+
+    def __init__(self, client, cache: QuoteCache = None):
+        """
+        Args:
+            client: Underlying ApiClient
+            cache: Cache to use (defaults to the shared process-wide cache)
+        """
+        self.client = client
+        self.cache = cache if cache is not None else default_quote_cache
+
+    def call_api(self, endpoint, query=None):
+        ttl = self.cache.ttl_for(query)
+        if ttl <= 0:
+            return self.client.call_api(endpoint, query=query)
+
+        return self.cache.get_or_fetch(
+            QuoteCache.make_key(endpoint, query),
+            ttl,
+            lambda: self.client.call_api(endpoint, query=query),
+            cacheable=_is_cacheable_response
+        )
+
+
+# Shared by every provider so identical charts are fetched once per process
+default_quote_cache = QuoteCache(max_entries=int(os.getenv('QUOTE_CACHE_SIZE', '512')))
@@ -0,0 +1,91 @@
+"""
+Rate Limit - Token buckets for outbound requests
+A bucket refills continuously at a fixed rate up to a burst capacity, so
+callers wait only as long as needed for the next token instead of sleeping
+a fixed interval after every request
+"""
+
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum tokens held (the allowed burst)
+        """
+        if rate <= 0 or capacity <= 0:
+            raise ValueError('rate and capacity must be positive')
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take tokens now (possibly going negative); returns seconds until they are covered"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Take tokens, waiting until the bucket can cover them
+
+        Reservations are first come, first served: concurrent callers are
+        spaced out at the refill rate rather than waking together.
+
+        Args:
+            tokens: Tokens needed
+            timeout: Give up (without taking tokens) if the wait would exceed this
+
+        Returns:
+            True once the tokens are taken, False on timeout
+        """
+        delay = self._reserve(tokens)
+        if timeout is not None and delay > timeout:
+            with self._lock:
+                self._tokens += tokens
+            return False
+        if delay > 0:
+            time.sleep(delay)
+        return True
+
+
+class HostRateLimiter:
+    """
+    One token bucket per host, created on first use
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        """
+        Args:
+            rate: Requests per second allowed per host
+            capacity: Burst allowed per host
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        """Get the bucket for a host"""
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = TokenBucket(self.rate, self.capacity)
+            return bucket
+
+    def acquire(self, host: str, timeout: Optional[float] = None) -> bool:
+        """Wait for a request slot on a host (see TokenBucket.acquire)"""
+        return self.bucket(host).acquire(timeout=timeout)
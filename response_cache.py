@@ -0,0 +1,122 @@
+"""
+Response Cache - Reuse chat answers for repeated trader questions
+Keys on normalized message text + topic + the previous turn, with LRU/TTL
+bounds. The TTL is what bounds how stale a price-bearing answer can get.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# Spelling variants and symbols that mean the same thing to a trader
+_SYNONYMS = {
+    'aluminium': 'aluminum',
+    'al': 'aluminum',
+    'cu': 'copper',
+    'zn': 'zinc',
+    'pb': 'lead',
+    'ni': 'nickel',
+    'sn': 'tin',
+    'emirates': 'uae',
+    'cost': 'price',
+    'rate': 'price',
+    'quote': 'price',
+    'vendor': 'supplier',
+    'seller': 'supplier'
+}
+
+# Filler words that don't change what is being asked
+_STOPWORDS = {
+    'a', 'an', 'the', 'is', 'are', 'was', 'what', 'whats', 's', 'of', 'for', 'in', 'on', 'at',
+    'to', 'me', 'my', 'please', 'pls', 'today', 'todays', 'now', 'current', 'currently', 'right',
+    'tell', 'show', 'give', 'can', 'could', 'you', 'i', 'do', 'does', 'how', 'much', 'hi', 'hello',
+    'hey', 'layla', 'alya', 'latest', 'there', 'any'
+}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def normalize_message(text: str) -> str:
+    """
+    Reduce a message to a canonical form so trivial rephrasings share a key
+
+    "What's the copper price today?" and "copper prices" both normalize to
+    "copper price". Word order is preserved so "buy copper, sell aluminum"
+    and "sell copper, buy aluminum" stay distinct.
+    """
+    words = []
+    for word in _WORD_RE.findall(text.lower().replace("'", '')):
+        word = _SYNONYMS.get(word, word)
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+            word = _SYNONYMS.get(word, word)
+        words.append(word)
+    return ' '.join(words)
+
+
+class ResponseCache:
+    """
+    Thread-safe LRU + TTL cache of generated chat responses
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl_seconds: float = 600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, response)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(assistant: str, user_message: str, topic: str, context: str = '') -> Hashable:
+        """Build a cache key for a chat turn"""
+        return (assistant, normalize_message(user_message), topic, normalize_message(context))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a cached response, or None on a miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, response: Any):
+        """Store a response, evicting the least recently used entries past the bound"""
+        if not response:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached response"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl_seconds': self.ttl_seconds,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 3) if lookups else 0
+            }
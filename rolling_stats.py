@@ -0,0 +1,260 @@
+"""
+Rolling Stats - Incremental per-tick market indicators
+Updates EWMA price and volatility, rolling mean/std, z-scores and
+inter-metal spreads in O(1) as each quote arrives, so endpoints read
+precomputed indicators instead of refetching and recomputing
+"""
+
+import math
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+# RiskMetrics-style decay for the EWMA of squared returns
+EWMA_LAMBDA = 0.94
+
+# Spreads tracked by default: name -> (long leg, short leg)
+DEFAULT_SPREADS = {
+    'copper_aluminum': ('copper', 'aluminum'),
+    'zinc_lead': ('zinc', 'lead')
+}
+
+
+class RollingStats:
+    """
+    O(1) running statistics for one price series
+
+    Keeps a fixed-size window with running sum and sum of squares for the
+    rolling mean/std, plus exponentially weighted price and return variance.
+    """
+
+    __slots__ = ('window', 'alpha', 'ewma_lambda', '_values', '_sum', '_sum_sq',
+                 'ewma_price', 'ewma_variance', 'last_value', 'last_return', 'last_timestamp', 'ticks')
+
+    def __init__(self, window: int = 20, alpha: float = 0.2, ewma_lambda: float = EWMA_LAMBDA):
+        """
+        Args:
+            window: Ticks in the rolling mean/std window
+            alpha: Smoothing factor of the EWMA price
+            ewma_lambda: Decay of the EWMA return variance
+        """
+        self.window = window
+        self.alpha = alpha
+        self.ewma_lambda = ewma_lambda
+        self._values = deque()
+        self._sum = 0.0
+        self._sum_sq = 0.0
+        self.ewma_price = None
+        self.ewma_variance = None
+        self.last_value = None
+        self.last_return = None
+        self.last_timestamp = None
+        self.ticks = 0
+
+    def update(self, value: float, timestamp: Optional[float] = None) -> bool:
+        """
+        Add one observation
+
+        Args:
+            value: New price (or spread) value
+            timestamp: Source timestamp; a repeat of the last one is ignored
+
+        Returns:
+            True if the observation was applied
+        """
+        if timestamp is not None and timestamp == self.last_timestamp:
+            return False
+
+        if self.last_value is not None and self.last_value > 0 and value > 0:
+            ret = math.log(value / self.last_value)
+            self.last_return = ret
+            if self.ewma_variance is None:
+                self.ewma_variance = ret * ret
+            else:
+                self.ewma_variance = self.ewma_lambda * self.ewma_variance + (1 - self.ewma_lambda) * ret * ret
+
+        self.ewma_price = value if self.ewma_price is None else self.alpha * value + (1 - self.alpha) * self.ewma_price
+
+        self._values.append(value)
+        self._sum += value
+        self._sum_sq += value * value
+        if len(self._values) > self.window:
+            old = self._values.popleft()
+            self._sum -= old
+            self._sum_sq -= old * old
+
+        self.last_value = value
+        self.last_timestamp = timestamp
+        self.ticks += 1
+        return True
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Rolling mean over the window"""
+        return self._sum / len(self._values) if self._values else None
+
+    @property
+    def std(self) -> Optional[float]:
+        """Rolling sample standard deviation over the window"""
+        n = len(self._values)
+        if n < 2:
+            return None
+        variance = (self._sum_sq - self._sum * self._sum / n) / (n - 1)
+        return math.sqrt(max(variance, 0.0))
+
+    @property
+    def zscore(self) -> Optional[float]:
+        """How many rolling standard deviations the last value is from the rolling mean"""
+        std = self.std
+        if not std or self.last_value is None:
+            return None
+        return (self.last_value - self.mean) / std
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Current indicator values"""
+        def rounded(value, digits=4):
+            return round(value, digits) if value is not None else None
+
+        return {
+            'last': rounded(self.last_value, 2),
+            'ewma': rounded(self.ewma_price, 2),
+            'rolling_mean': rounded(self.mean, 2),
+            'rolling_std': rounded(self.std, 4),
+            'zscore': rounded(self.zscore, 3),
+            'ewma_volatility_percent': rounded(math.sqrt(self.ewma_variance) * 100 if self.ewma_variance is not None else None),
+            'last_return_percent': rounded(self.last_return * 100 if self.last_return is not None else None),
+            'window': self.window,
+            'ticks': self.ticks,
+            'last_timestamp': datetime.fromtimestamp(self.last_timestamp).isoformat() if self.last_timestamp else None
+        }
+
+
+class IndicatorEngine:
+    """
+    Thread-safe set of RollingStats per metal and per tracked spread
+
+    Each update touches only the metal's own stats and the spreads it is a
+    leg of, so the cost per tick does not grow with history. A spread takes
+    a sample only once both legs have ticked since its previous sample, so
+    it never mixes a fresh leg with a stale one.
+    """
+
+    def __init__(self, window: int = 20, spreads: Dict[str, tuple] = None):
+        """
+        Args:
+            window: Rolling window in ticks
+            spreads: Spread name -> (long leg, short leg); defaults to DEFAULT_SPREADS
+        """
+        self.window = window
+        self.spreads = dict(DEFAULT_SPREADS if spreads is None else spreads)
+        self._metals = {}
+        self._spread_stats = {name: RollingStats(window) for name in self.spreads}
+        self._spread_leg_ticks = {name: (0, 0) for name in self.spreads}  # leg ticks at the last sample
+        self._quotes = {}
+        self._lock = threading.Lock()
+
+    def update(self, metal: str, price: float, timestamp: Optional[float] = None,
+               **quote: Any) -> Optional[Dict[str, Any]]:
+        """
+        Feed one quote for a metal
+
+        Args:
+            metal: Metal name
+            price: Price in USD/tonne
+            timestamp: Source timestamp of the quote (epoch seconds)
+            **quote: Extra quote fields kept as the latest values (change_percent, volume, ...)
+
+        Returns:
+            The metal's indicators after the update, or None for a non-positive price
+        """
+        if not price or price <= 0:
+            return None
+        metal = metal.lower()
+        with self._lock:
+            self._update_metal(metal, price, timestamp, quote)
+            self._update_spreads({metal})
+            return dict(self._metals[metal].snapshot(), **self._quotes.get(metal, {}))
+
+    def update_many(self, quotes: Dict[str, Dict[str, Any]]) -> int:
+        """
+        Feed one cycle of quotes, then sample each affected spread once
+
+        Args:
+            quotes: Metal -> {'price', 'timestamp', extra quote fields...}
+
+        Returns:
+            Number of metals whose quote was new
+        """
+        updated = set()
+        with self._lock:
+            for metal, quote in quotes.items():
+                quote = dict(quote)
+                price = quote.pop('price', None)
+                timestamp = quote.pop('timestamp', None)
+                if price and price > 0 and self._update_metal(metal.lower(), price, timestamp, quote):
+                    updated.add(metal.lower())
+            self._update_spreads(updated)
+        return len(updated)
+
+    def on_snapshot(self, snapshot) -> int:
+        """PriceRefresher listener: feed every metal in a new LME price snapshot"""
+        quotes = {}
+        for metal, data in snapshot.to_response().get('lme_prices', {}).items():
+            if isinstance(data, dict) and 'error' not in data:
+                quotes[metal] = {
+                    'price': data.get('price_usd_per_tonne'),
+                    'timestamp': data.get('quote_timestamp'),
+                    'change_percent': data.get('change_percent'),
+                    'volume': data.get('volume')
+                }
+        return self.update_many(quotes)
+
+    def _update_metal(self, metal: str, price: float, timestamp: Optional[float], quote: Dict[str, Any]) -> bool:
+        stats = self._metals.get(metal)
+        if stats is None:
+            stats = self._metals[metal] = RollingStats(self.window)
+        if not stats.update(price, timestamp):
+            return False
+        self._quotes[metal] = quote
+        return True
+
+    def _update_spreads(self, metals: set):
+        for name, (long_leg, short_leg) in self.spreads.items():
+            if long_leg not in metals and short_leg not in metals:
+                continue
+            legs = (self._metals.get(long_leg), self._metals.get(short_leg))
+            if not all(leg is not None and leg.last_value for leg in legs):
+                continue
+            ticks = (legs[0].ticks, legs[1].ticks)
+            last_ticks = self._spread_leg_ticks[name]
+            if ticks[0] > last_ticks[0] and ticks[1] > last_ticks[1]:
+                self._spread_stats[name].update(legs[0].last_value - legs[1].last_value)
+                self._spread_leg_ticks[name] = ticks
+
+    def get(self, metal: str) -> Optional[Dict[str, Any]]:
+        """Get one metal's indicators (None if it has never ticked)"""
+        with self._lock:
+            stats = self._metals.get(metal.lower())
+            if stats is None:
+                return None
+            return dict(stats.snapshot(), **self._quotes.get(metal.lower(), {}))
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get indicators for every metal and spread"""
+        with self._lock:
+            return {
+                'metals': {
+                    metal: dict(stats.snapshot(), **self._quotes.get(metal, {}))
+                    for metal, stats in self._metals.items()
+                },
+                'spreads': {
+                    name: dict(stats.snapshot(), legs=list(self.spreads[name]))
+                    for name, stats in self._spread_stats.items() if stats.ticks
+                }
+            }
+
+
+# Process-wide engine fed from the LME price snapshots and read by the analytics endpoints
+default_indicator_engine = IndicatorEngine(window=int(os.getenv('INDICATOR_WINDOW', '20')))
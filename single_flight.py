@@ -0,0 +1,86 @@
+"""
+Single Flight - Deduplicate identical in-flight calls
+Concurrent callers with the same key share one execution of the call and
+all receive its result (or its exception)
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+
+class _Call:
+    __slots__ = ('event', 'result', 'error')
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical calls into one
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """
+        Run fn() unless a call with the same key is already in flight, in
+        which case wait for that call and return its result
+
+        Args:
+            key: Identity of the call
+            fn: Zero-argument callable performing the work
+
+        Returns:
+            The result of fn() from whichever caller executed it
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def stats(self) -> Dict[str, Any]:
+        """Get deduplication counters"""
+        with self._lock:
+            return {
+                'executed': self.executed,
+                'shared': self.shared,
+                'in_flight': len(self._calls)
+            }
+
+
+def llm_request_key(**request: Any) -> str:
+    """Hash chat completion arguments (model, messages, sampling params) into a key"""
+    payload = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
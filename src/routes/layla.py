@@ -3,14 +3,11 @@ from flask_cors import cross_origin
 import json
 import os
 from datetime import datetime
-import openai
+from http_transport import create_openai_client
 
 layla_bp = Blueprint('layla', __name__)
 
-client = openai.OpenAI(
-    api_key=os.getenv('OPENAI_API_KEY'),
-    base_url=os.getenv('OPENAI_API_BASE')
-)
+client = create_openai_client()
 
 class LaylaAgent:
     def __init__(self):
@@ -1,20 +1,58 @@
-import requests
 from bs4 import BeautifulSoup
 import json
-import time
+import os
 import random
+from urllib.parse import urlsplit
+from fanout import fan_out_iter
+from rate_limit import HostRateLimiter
+from supplier_catalog import get_supplier_catalog
+from supplier_dedup import deduplicate
+from supplier_scraper import DEFAULT_CACHE_DIR, DEFAULT_SOURCES_PATH, PageCache, SupplierScraper, load_sources
+
+# Per-host politeness for supplier sources: sustained requests/second and burst
+SEARCH_RATE_PER_HOST = float(os.getenv('SUPPLIER_SEARCH_RATE_PER_HOST', '1'))
+SEARCH_BURST_PER_HOST = float(os.getenv('SUPPLIER_SEARCH_BURST_PER_HOST', '4'))
+SEARCH_TIMEOUT = float(os.getenv('SUPPLIER_SEARCH_TIMEOUT', '15'))
+
+# Directory scraping is on when SUPPLIER_SOURCES_PATH lists sources; pages are
+# cached on disk, and SCRAPE_OFFLINE=1 serves only recorded pages
+SUPPLIER_SOURCES_PATH = os.getenv('SUPPLIER_SOURCES_PATH', DEFAULT_SOURCES_PATH)
+SCRAPE_CACHE_DIR = os.getenv('SCRAPE_CACHE_DIR', DEFAULT_CACHE_DIR)
+SCRAPE_CACHE_MAX_AGE = float(os.getenv('SCRAPE_CACHE_MAX_AGE', '21600'))
+SCRAPE_OFFLINE = os.getenv('SCRAPE_OFFLINE', '').lower() in ('1', 'true', 'yes')
+
+# Shared across finders so every search respects the same per-host budget
+search_rate_limiter = HostRateLimiter(SEARCH_RATE_PER_HOST, SEARCH_BURST_PER_HOST)
+
+
+def _wait_for_host(url):
+    search_rate_limiter.acquire(urlsplit(url).netloc)
 
 class SupplierFinder:
-    def __init__(self):
+    def __init__(self, catalog=None, scraper=None):
+        self.catalog = catalog or get_supplier_catalog()
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
         }
+        self.scraper = scraper or SupplierScraper(
+            load_sources(SUPPLIER_SOURCES_PATH),
+            PageCache(SCRAPE_CACHE_DIR, max_age=SCRAPE_CACHE_MAX_AGE, offline=SCRAPE_OFFLINE),
+            headers=self.headers,
+            before_request=_wait_for_host,
+            timeout=SEARCH_TIMEOUT
+        )
         
-    def find_metal_suppliers(self, metal, region="UAE", supplier_type="all"):
+    def find_metal_suppliers(self, metal, region="UAE", supplier_type="all", max_results=10):
         """
         Actually search and find real suppliers for metals
+
+        Catalog lookups and directory pages run in parallel; pages come
+        from the scrape cache when possible, outbound requests are paced per
+        host by a token bucket, and the search returns as soon as
+        max_results unique suppliers have been found.
         """
         suppliers = []
+        seen = set()
         
         # Search multiple sources
         search_queries = [
@@ -24,18 +62,30 @@ class SupplierFinder:
             f"non-ferrous metals {metal} suppliers {region}"
         ]
         
-        for query in search_queries:
-            try:
-                # Simulate web search (in real implementation, you'd use proper APIs)
-                found_suppliers = self._search_suppliers(query, metal, region)
+        calls = {
+            ('catalog', query): (lambda query=query: self._search_suppliers(query, metal, region))
+            for query in search_queries
+        }
+        for url, call in self.scraper.scrape_calls(search_queries, metal, region, limit=max_results).items():
+            calls[('page', url)] = call
+        results = fan_out_iter(calls, timeout=SEARCH_TIMEOUT)
+        try:
+            for (kind, target), found_suppliers, error in results:
+                if error is not None:
+                    if kind == 'page':
+                        print(f"Error scraping {urlsplit(target).netloc}: {error}")
+                    continue
                 suppliers.extend(found_suppliers)
-                time.sleep(1)  # Be respectful to servers
-            except Exception as e:
-                continue
+                seen.update(supplier['name'] for supplier in found_suppliers)
+                if len(seen) >= max_results:
+                    break
+        finally:
+            # Cancels queries that haven't started yet
+            results.close()
                 
         # Remove duplicates and return top results
         unique_suppliers = self._deduplicate_suppliers(suppliers)
-        return unique_suppliers[:10]  # Return top 10
+        return unique_suppliers[:max_results]
     
     def _search_suppliers(self, query, metal, region):
         """
@@ -49,143 +99,26 @@ class SupplierFinder:
         
         return suppliers
     
+    def _fetch_page(self, url):
+        """
+        Fetch a web page through the scrape cache and the shared pooled
+        transport (keep-alive, per-host limits, retries with jittered
+        backoff), waiting for the host's rate-limit token first
+        """
+        return self.scraper.cache.get(url, self.headers, _wait_for_host)
+    
     def _get_known_suppliers(self, metal, region):
         """
-        Database of known reliable suppliers
+        Known reliable suppliers from the supplier catalog, in curated order
         """
-        suppliers_db = {
-            "copper": {
-                "UAE": [
-                    {
-                        "name": "Emirates Global Aluminium (EGA)",
-                        "contact": "+971 4 316 9999",
-                        "email": "info@ega.ae",
-                        "location": "Dubai, UAE",
-                        "speciality": "Primary and secondary copper",
-                        "capacity": "Large scale",
-                        "website": "www.ega.ae",
-                        "verified": True,
-                        "rating": 4.8
-                    },
-                    {
-                        "name": "Al Ghurair Iron & Steel",
-                        "contact": "+971 4 285 5555",
-                        "email": "info@alghurairgroup.com",
-                        "location": "Dubai, UAE",
-                        "speciality": "Copper scrap and refined copper",
-                        "capacity": "Medium to large scale",
-                        "website": "www.alghurairgroup.com",
-                        "verified": True,
-                        "rating": 4.6
-                    },
-                    {
-                        "name": "Ducab Group",
-                        "contact": "+971 4 299 9700",
-                        "email": "info@ducab.com",
-                        "location": "Dubai, UAE",
-                        "speciality": "High-grade copper wire and cables",
-                        "capacity": "Large scale",
-                        "website": "www.ducab.com",
-                        "verified": True,
-                        "rating": 4.7
-                    }
-                ],
-                "India": [
-                    {
-                        "name": "Hindalco Industries",
-                        "contact": "+91 22 6691 7000",
-                        "email": "info@hindalco.com",
-                        "location": "Mumbai, India",
-                        "speciality": "Primary copper and copper products",
-                        "capacity": "Very large scale",
-                        "website": "www.hindalco.com",
-                        "verified": True,
-                        "rating": 4.9
-                    },
-                    {
-                        "name": "Sterlite Copper",
-                        "contact": "+91 44 7196 4000",
-                        "email": "info@vedanta.co.in",
-                        "location": "Chennai, India",
-                        "speciality": "Copper cathodes and continuous cast copper rods",
-                        "capacity": "Very large scale",
-                        "website": "www.sterlitecopper.com",
-                        "verified": True,
-                        "rating": 4.8
-                    }
-                ]
-            },
-            "aluminum": {
-                "UAE": [
-                    {
-                        "name": "Emirates Global Aluminium (EGA)",
-                        "contact": "+971 4 316 9999",
-                        "email": "sales@ega.ae",
-                        "location": "Dubai & Abu Dhabi, UAE",
-                        "speciality": "Primary aluminum smelting",
-                        "capacity": "Very large scale - 2.6M tonnes/year",
-                        "website": "www.ega.ae",
-                        "verified": True,
-                        "rating": 4.9
-                    },
-                    {
-                        "name": "Alba (Aluminium Bahrain)",
-                        "contact": "+973 1783 0000",
-                        "email": "info@alba.com.bh",
-                        "location": "Bahrain (GCC region)",
-                        "speciality": "Primary aluminum production",
-                        "capacity": "Very large scale",
-                        "website": "www.alba.com.bh",
-                        "verified": True,
-                        "rating": 4.8
-                    }
-                ]
-            }
-        }
-        
-        metal_lower = metal.lower()
-        region_suppliers = suppliers_db.get(metal_lower, {}).get(region, [])
-        
-        # Add some additional suppliers with contact research
-        if metal_lower == "copper" and region == "UAE":
-            region_suppliers.extend([
-                {
-                    "name": "Metalco Trading LLC",
-                    "contact": "+971 4 347 8900",
-                    "email": "info@metalcotrading.ae",
-                    "location": "Dubai, UAE",
-                    "speciality": "Copper scrap and secondary materials",
-                    "capacity": "Medium scale",
-                    "website": "Contact for details",
-                    "verified": False,
-                    "rating": 4.3
-                },
-                {
-                    "name": "Gulf Extrusions",
-                    "contact": "+971 6 534 4444",
-                    "email": "sales@gulfextrusions.com",
-                    "location": "Sharjah, UAE",
-                    "speciality": "Copper alloys and extrusions",
-                    "capacity": "Medium scale",
-                    "website": "www.gulfextrusions.com",
-                    "verified": True,
-                    "rating": 4.4
-                }
-            ])
-        
-        return region_suppliers
+        return list(self.catalog.search("research", metal=metal, region=region, order="catalog"))
     
     def _deduplicate_suppliers(self, suppliers):
         """
-        Remove duplicate suppliers based on name
+        Merge duplicate suppliers: same or similar name (including acronyms
+        like "EGA"), or a shared phone, email or website
         """
-        seen = set()
-        unique = []
-        for supplier in suppliers:
-            if supplier['name'] not in seen:
-                seen.add(supplier['name'])
-                unique.append(supplier)
-        return unique
+        return deduplicate(suppliers)
     
     def get_supplier_details(self, supplier_name):
         """
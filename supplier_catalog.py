@@ -0,0 +1,458 @@
+"""
+Supplier Catalog - SQLite-backed supplier records
+Suppliers live in one table keyed by (collection, name, contact), with
+per-metal details (speciality, email, ...) kept under 'metal_details', and a
+tag table indexing metal, region, certification and payment terms. Bulk
+CSV/JSONL imports upsert in batched transactions, and query results are
+served from an in-memory cache until the next write.
+"""
+
+import csv
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from supplier_index import location_parts
+
+# Record fields holding lists; CSV cells separate items with ';'
+LIST_FIELDS = ('metals', 'regions', 'certifications')
+
+# Numeric record fields, converted when read from CSV
+NUMERIC_FIELDS = ('reliability_score', 'rating')
+
+# Per-metal overrides: {metal: {field: value}}, applied when searching by metal
+METAL_DETAILS_FIELD = 'metal_details'
+
+# Tag name -> record field it is built from
+TAG_FIELDS = {
+    'metal': 'metals',
+    'region': 'regions',
+    'certification': 'certifications',
+    'payment_terms': 'payment_terms'
+}
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_SEED_PATH = os.path.join(DATA_DIR, 'suppliers_seed.jsonl')
+
+# Writes remembered for changes_since(); older readers reload everything
+CHANGE_LOG_SIZE = 10000
+
+
+def _key(value: Any) -> str:
+    return ' '.join(str(value or '').lower().split())
+
+
+def _as_list(value: Any) -> List[str]:
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        return [item.strip() for item in value.split(';') if item.strip()]
+    return list(value)
+
+
+def _merge(existing: Dict[str, Any], update: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Apply an update to a stored record
+
+    List fields are unioned in order, per-metal details are merged per
+    metal, and other fields take the update's value.
+
+    Returns:
+        (merged record, names of fields whose existing value was replaced)
+    """
+    merged = dict(existing)
+    conflicts = []
+    for field, value in update.items():
+        if field == METAL_DETAILS_FIELD and isinstance(value, dict):
+            details = {metal: dict(fields) for metal, fields in (existing.get(field) or {}).items()}
+            for metal, fields in value.items():
+                metal_details, changed = _merge(details.get(_key(metal), {}), fields)
+                details[_key(metal)] = metal_details
+                conflicts += [f'{field}.{_key(metal)}.{name}' for name in changed]
+            merged[field] = details
+        elif field in LIST_FIELDS:
+            merged[field] = list(dict.fromkeys(_as_list(existing.get(field)) + _as_list(value)))
+        elif value is not None and value != '':
+            if existing.get(field) not in (None, '', value):
+                conflicts.append(field)
+            merged[field] = value
+    return merged, conflicts
+
+
+def _restore(existing: Dict[str, Any], changed: List[str]) -> Dict[str, Any]:
+    """Update putting back the stored values of changed fields (see _merge)"""
+    restore = {}
+    for field in changed:
+        if field.startswith(METAL_DETAILS_FIELD + '.'):
+            _, metal, name = field.split('.', 2)
+            restore.setdefault(METAL_DETAILS_FIELD, {}).setdefault(metal, {})[name] = \
+                existing[METAL_DETAILS_FIELD][metal][name]
+        else:
+            restore[field] = existing[field]
+    return restore
+
+
+def _tags(record: Dict[str, Any]) -> set:
+    tags = set()
+    for tag, field in TAG_FIELDS.items():
+        values = record.get(field)
+        for value in (_as_list(values) if field in LIST_FIELDS else [values]):
+            if value:
+                tags.add((tag, _key(value)))
+    locations = [record.get('location')] + [
+        details.get('location') for details in (record.get(METAL_DETAILS_FIELD) or {}).values()
+    ]
+    for location in locations:
+        for part in location_parts(location):
+            tags.add(('region', part))
+    return tags
+
+
+def _for_metal(record: Dict[str, Any], metal: str) -> Dict[str, Any]:
+    """The record as seen for one metal, with that metal's details applied"""
+    details = record.get(METAL_DETAILS_FIELD)
+    if not details:
+        return record
+    view = {field: value for field, value in record.items() if field != METAL_DETAILS_FIELD}
+    view.update(details.get(_key(metal), {}))
+    return view
+
+
+def _score(record: Dict[str, Any]) -> float:
+    score = record.get('reliability_score', record.get('rating'))
+    try:
+        return float(score)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream supplier records from a .csv or .jsonl file
+
+    CSV list columns (metals, regions, certifications) separate items with ';'.
+    """
+    if path.endswith('.csv'):
+        with open(path, newline='', encoding='utf-8') as f:
+            for row in csv.DictReader(f):
+                record = {field: value for field, value in row.items() if value not in (None, '')}
+                for field in LIST_FIELDS:
+                    if field in record:
+                        record[field] = _as_list(record[field])
+                for field in NUMERIC_FIELDS:
+                    if field in record:
+                        try:
+                            record[field] = float(record[field])
+                        except ValueError:
+                            del record[field]
+                yield record
+    elif path.endswith(('.jsonl', '.ndjson')):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    else:
+        raise ValueError(f'Unsupported supplier file {path!r}; expected .csv or .jsonl')
+
+
+class SupplierCatalog:
+    """
+    Persistent supplier catalog with upserts and a read-through query cache
+    """
+
+    def __init__(self, path: str, seed_path: Optional[str] = DEFAULT_SEED_PATH, cache_size: int = 256):
+        """
+        Args:
+            path: SQLite database file (':memory:' for a throwaway catalog)
+            seed_path: Records imported when the catalog is empty (None to skip)
+            cache_size: Query results kept in memory
+        """
+        self.path = path
+        self.cache_size = cache_size
+        self.generation = 0  # Bumped on every write; readers use it to refresh derived state
+        self._changes = deque()  # (generation, collection, supplier id), oldest first
+        self._changes_complete_after = 0  # every write after this generation is in _changes
+        self._cache = OrderedDict()
+        self._lock = threading.RLock()
+
+        if path != ':memory:' and os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        if path != ':memory:':
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS suppliers (
+                id INTEGER PRIMARY KEY,
+                collection TEXT NOT NULL,
+                name TEXT NOT NULL,
+                name_key TEXT NOT NULL,
+                contact_key TEXT NOT NULL,
+                score REAL NOT NULL DEFAULT 0,
+                data TEXT NOT NULL,
+                updated_at TEXT NOT NULL,
+                UNIQUE (collection, name_key, contact_key)
+            );
+            CREATE INDEX IF NOT EXISTS idx_suppliers_rank ON suppliers (collection, score DESC, id);
+            CREATE TABLE IF NOT EXISTS supplier_tags (
+                tag TEXT NOT NULL,
+                value TEXT NOT NULL,
+                supplier_id INTEGER NOT NULL,
+                PRIMARY KEY (tag, value, supplier_id)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS idx_supplier_tags_supplier ON supplier_tags (supplier_id);
+        """)
+        self._conn.commit()
+
+        if seed_path and os.path.exists(seed_path) and self.count() == 0:
+            # Seed records must not collide; a conflict means the seed file is wrong
+            self.import_file(seed_path, on_conflict='error')
+
+    def count(self, collection: Optional[str] = None) -> int:
+        """Number of suppliers, optionally in one collection"""
+        with self._lock:
+            if collection is None:
+                return self._conn.execute('SELECT COUNT(*) FROM suppliers').fetchone()[0]
+            return self._conn.execute('SELECT COUNT(*) FROM suppliers WHERE collection = ?',
+                                      (collection,)).fetchone()[0]
+
+    def upsert_many(self, records: Iterable[Dict[str, Any]], collection: str = 'verified',
+                    batch_size: int = 1000, on_conflict: str = 'update') -> int:
+        """
+        Insert or update suppliers keyed by name and contact
+
+        Each batch is one transaction. A record with a 'collection' field
+        overrides the default collection.
+
+        Args:
+            records: Supplier records
+            collection: Default collection
+            batch_size: Records per transaction
+            on_conflict: When an update changes a stored field: 'update' takes the
+                new value (and logs it), 'keep' keeps the stored value, 'error'
+                raises ValueError and rolls the batch back
+
+        Returns:
+            Number of records written
+        """
+        if on_conflict not in ('update', 'keep', 'error'):
+            raise ValueError("on_conflict must be 'update', 'keep' or 'error'")
+        written = 0
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                written += self._write_batch(batch, collection, on_conflict)
+                batch = []
+        if batch:
+            written += self._write_batch(batch, collection, on_conflict)
+        return written
+
+    def upsert(self, record: Dict[str, Any], collection: str = 'verified', on_conflict: str = 'update') -> int:
+        """Insert or update one supplier"""
+        return self.upsert_many([record], collection, on_conflict=on_conflict)
+
+    def import_file(self, path: str, collection: str = 'verified', batch_size: int = 1000,
+                    on_conflict: str = 'update') -> int:
+        """Bulk import a .csv or .jsonl file (see read_records)"""
+        return self.upsert_many(read_records(path), collection, batch_size, on_conflict)
+
+    def _write_batch(self, records: List[Dict[str, Any]], default_collection: str, on_conflict: str) -> int:
+        now = datetime.now().isoformat()
+        written = 0
+        tags = {}  # supplier id -> tags of its final version in this batch
+        collections = {}  # supplier id -> collection
+        conflicts = []
+        with self._lock:
+            with self._conn:
+                for record in records:
+                    record = dict(record)
+                    collection = record.pop('collection', None) or default_collection
+                    name = (record.get('name') or '').strip()
+                    if not name:
+                        continue
+                    key = (collection, _key(name), _key(record.get('contact')))
+                    row = self._conn.execute(
+                        'SELECT id, data FROM suppliers WHERE collection = ? AND name_key = ? AND contact_key = ?', key
+                    ).fetchone()
+                    if row is None:
+                        data, _ = _merge({}, record)
+                        supplier_id = self._conn.execute(
+                            """INSERT INTO suppliers (collection, name, name_key, contact_key, score, data, updated_at)
+                               VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                            (collection, name, key[1], key[2], _score(data), json.dumps(data), now)
+                        ).lastrowid
+                    else:
+                        supplier_id = row[0]
+                        existing = json.loads(row[1])
+                        data, changed = _merge(existing, record)
+                        if changed:
+                            if on_conflict == 'error':
+                                raise ValueError(f'Conflicting {changed} for supplier {name!r} in {collection}')
+                            if on_conflict == 'keep':
+                                data = _merge(data, _restore(existing, changed))[0]
+                            conflicts.append(f"{name} ({', '.join(changed)})")
+                        self._conn.execute(
+                            'UPDATE suppliers SET name = ?, score = ?, data = ?, updated_at = ? WHERE id = ?',
+                            (name, _score(data), json.dumps(data), now, supplier_id)
+                        )
+                        self._conn.execute('DELETE FROM supplier_tags WHERE supplier_id = ?', (supplier_id,))
+                    tags[supplier_id] = _tags(data)
+                    collections[supplier_id] = collection
+                    written += 1
+                self._conn.executemany(
+                    'INSERT OR IGNORE INTO supplier_tags (tag, value, supplier_id) VALUES (?, ?, ?)',
+                    [(tag, value, supplier_id) for supplier_id, pairs in tags.items() for tag, value in pairs]
+                )
+            self.generation += 1
+            self._changes.extend((self.generation, collection, supplier_id)
+                                 for supplier_id, collection in collections.items())
+            while len(self._changes) > CHANGE_LOG_SIZE:
+                self._changes_complete_after = self._changes.popleft()[0]
+            self._cache.clear()
+        if conflicts:
+            action = 'kept stored values' if on_conflict == 'keep' else 'took new values'
+            print(f"Supplier catalog: {len(conflicts)} updates changed stored fields, {action}: "
+                  f"{'; '.join(conflicts[:5])}{' ...' if len(conflicts) > 5 else ''}")
+        return written
+
+    def search(self, collection: str, metal: Optional[str] = None, region: Optional[str] = None,
+               certification: Optional[str] = None, payment_terms: Optional[str] = None,
+               limit: Optional[int] = None, order: str = 'score') -> List[Dict[str, Any]]:
+        """
+        Find suppliers in a collection matching every given tag
+
+        Args:
+            collection: 'verified', 'potential', 'research', ...
+            metal: Metal handled (case-insensitive)
+            region: Region tag or place name from the location (case-insensitive)
+            certification: Certification held (case-insensitive)
+            payment_terms: Payment terms offered (case-insensitive)
+            limit: Maximum number of results
+            order: 'score' (highest first) or 'catalog' (import order, for curated lists)
+
+        Returns:
+            Supplier records, with the metal's details applied when searching
+            by metal (cached; treat as read-only)
+        """
+        if order not in ('score', 'catalog'):
+            raise ValueError("order must be 'score' or 'catalog'")
+        filters = [(tag, _key(value)) for tag, value in (('metal', metal), ('region', region),
+                                                         ('certification', certification),
+                                                         ('payment_terms', payment_terms))
+                   if value is not None]
+        cache_key = (collection, tuple(filters), limit, order)
+        with self._lock:
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                return cached
+
+            sql = 'SELECT data FROM suppliers WHERE collection = ?'
+            params = [collection]
+            for tag, value in filters:
+                sql += ' AND id IN (SELECT supplier_id FROM supplier_tags WHERE tag = ? AND value = ?)'
+                params += [tag, value]
+            sql += ' ORDER BY score DESC, id' if order == 'score' else ' ORDER BY id'
+            if limit is not None:
+                sql += ' LIMIT ?'
+                params.append(limit)
+            results = [json.loads(row[0]) for row in self._conn.execute(sql, params)]
+            if metal is not None:
+                results = [_for_metal(record, metal) for record in results]
+
+            self._cache[cache_key] = results
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return results
+
+    def list(self, collection: str) -> List[Dict[str, Any]]:
+        """Every supplier in a collection, highest score first"""
+        return self.search(collection)
+
+    def snapshot(self, collection: str) -> Tuple[int, List[Tuple[int, Dict[str, Any]]]]:
+        """
+        Every supplier in a collection with its row id, highest score first
+
+        Returns:
+            (generation the snapshot reflects, [(supplier id, record), ...])
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT id, data FROM suppliers WHERE collection = ? ORDER BY score DESC, id', (collection,)
+            ).fetchall()
+            return self.generation, [(row[0], json.loads(row[1])) for row in rows]
+
+    def changes_since(self, generation: int,
+                      collection: str) -> Tuple[int, Optional[List[Tuple[int, Dict[str, Any]]]]]:
+        """
+        Suppliers in a collection written after a generation
+
+        Returns:
+            (current generation, [(supplier id, record), ...]); the list is None
+            when the change log no longer reaches back that far, in which case
+            the caller should reload with snapshot()
+        """
+        with self._lock:
+            if not self._changes_complete_after <= generation <= self.generation:
+                return self.generation, None
+            ids = set()
+            for changed_at, changed_collection, supplier_id in reversed(self._changes):
+                if changed_at <= generation:
+                    break
+                if changed_collection == collection:
+                    ids.add(supplier_id)
+            ids = sorted(ids)
+            records = []
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT id, data FROM suppliers WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                records += [(row[0], json.loads(row[1])) for row in rows]
+            return self.generation, records
+
+    def stats(self) -> Dict[str, Any]:
+        """Get catalog counters"""
+        with self._lock:
+            collections = dict(self._conn.execute(
+                'SELECT collection, COUNT(*) FROM suppliers GROUP BY collection'
+            ).fetchall())
+            return {
+                'path': self.path,
+                'collections': collections,
+                'generation': self.generation,
+                'cached_queries': len(self._cache)
+            }
+
+
+_default_catalog = None
+_default_catalog_lock = threading.Lock()
+
+
+def get_supplier_catalog() -> SupplierCatalog:
+    """Process-wide catalog at SUPPLIER_CATALOG_PATH, seeded on first use"""
+    global _default_catalog
+    with _default_catalog_lock:
+        if _default_catalog is None:
+            _default_catalog = SupplierCatalog(
+                os.getenv('SUPPLIER_CATALOG_PATH', os.path.join(DATA_DIR, 'suppliers.db'))
+            )
+        return _default_catalog
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python supplier_catalog.py <file.csv|file.jsonl> [collection]")
+        sys.exit(1)
+
+    catalog = get_supplier_catalog()
+    imported = catalog.import_file(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else 'verified')
+    print(f"Imported {imported} suppliers")
+    print(json.dumps(catalog.stats(), indent=2))
@@ -0,0 +1,288 @@
+"""
+Supplier Dedup - Fuzzy merging of supplier records from several sources
+Records are grouped by exact blocking keys (normalized name, acronym,
+phone, email, website) and by MinHash LSH buckets over name shingles, so
+each record is only compared with the first record of each group in the
+buckets it falls in. Short names and acronyms, whether matched exactly or
+fuzzily, also need a shared company domain or city. Matching groups are
+merged with union-find in near-linear time.
+"""
+
+import re
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Legal-form and filler words that don't identify a company
+STOPWORDS = {
+    'llc', 'ltd', 'limited', 'pvt', 'private', 'inc', 'co', 'corp', 'corporation',
+    'company', 'grp', 'plc', 'pjsc', 'jsc', 'fze', 'fzco', 'fzc', 'est', 'the', 'and', 'of', 'group', 'sa', 'ag', 'gmbh'
+}
+
+NUM_HASHES = 24
+BAND_ROWS = 3  # 8 bands of 3: a pair shares a band ~86% of the time at Jaccard 0.6, ~99.7% at 0.8
+SIMILARITY_THRESHOLD = 0.6
+MIN_PHONE_DIGITS = 8
+MIN_ACRONYM_LENGTH = 3
+SHORT_NAME_WORDS = 3  # name matches this short need a shared email domain, website or city
+MAX_BUCKET_CLUSTERS = 8  # distinct groups a record is compared with per LSH bucket
+
+# Mailbox providers whose domain says nothing about the company
+FREE_MAIL_DOMAINS = {
+    'gmail.com', 'yahoo.com', 'hotmail.com', 'outlook.com', 'live.com', 'icloud.com',
+    'aol.com', 'mail.com', 'protonmail.com', 'yandex.com', 'qq.com', '163.com', 'rediffmail.com'
+}
+
+_MERSENNE_PRIME = (1 << 61) - 1
+# Fixed coefficients keep MinHash signatures stable across processes
+_HASH_PARAMS = [((i * 0x9E3779B97F4A7C15 + 0x7F4A7C15) % _MERSENNE_PRIME | 1,
+                 (i * 0xBF58476D1CE4E5B9 + 0x94D049BB) % _MERSENNE_PRIME)
+                for i in range(1, NUM_HASHES + 1)]
+
+_PAREN = re.compile(r'\(([^)]*)\)')
+_NON_WORD = re.compile(r'[^a-z0-9]+')
+
+
+def _words(text: str) -> List[str]:
+    return [w for w in _NON_WORD.split(text.lower()) if w]
+
+
+def normalize_name(name: str) -> str:
+    """Lowercase name without punctuation, parentheticals or legal forms"""
+    words = [w for w in _words(_PAREN.sub(' ', name or '')) if w not in STOPWORDS]
+    return ' '.join(words)
+
+
+def name_aliases(name: str) -> Set[str]:
+    """Short forms given in the name: 'Emirates Global Aluminium (EGA)' -> {'ega'}"""
+    aliases = set()
+    for inner in _PAREN.findall(name or ''):
+        alias = ''.join(_words(inner))
+        if len(alias) >= MIN_ACRONYM_LENGTH:
+            aliases.add(alias)
+    return aliases
+
+
+def initials(name: str) -> Optional[str]:
+    """Initials of a multi-word name ('Emirates Global Aluminium' -> 'ega')"""
+    words = normalize_name(name).split()
+    return ''.join(w[0] for w in words) if len(words) >= MIN_ACRONYM_LENGTH else None
+
+
+def _shingles(text: str, size: int = 3) -> Set[int]:
+    text = f' {text} '
+    return {zlib.crc32(text[i:i + size].encode()) for i in range(max(1, len(text) - size + 1))}
+
+
+def _minhash(shingles: Set[int]) -> List[int]:
+    return [min((a * s + b) % _MERSENNE_PRIME for s in shingles) for a, b in _HASH_PARAMS]
+
+
+def _phone_key(phone: Any) -> Optional[str]:
+    digits = re.sub(r'\D', '', str(phone or ''))
+    return digits[-MIN_PHONE_DIGITS - 1:] if len(digits) >= MIN_PHONE_DIGITS else None
+
+
+def _website_key(website: Any) -> Optional[str]:
+    host = str(website or '').strip().lower()
+    host = re.sub(r'^[a-z]+://', '', host).split('/')[0]
+    if host.startswith('www.'):
+        host = host[4:]
+    return host if '.' in host and ' ' not in host else None
+
+
+def _email_key(email: Any) -> Optional[str]:
+    email = str(email or '').strip().lower()
+    return email if '@' in email else None
+
+
+def _domains(supplier: Dict[str, Any]) -> Set[str]:
+    """Company domains from a record's website and non-free email addresses"""
+    domains = set()
+    for field in ('email', 'contact'):
+        email = _email_key(supplier.get(field))
+        if email and email.split('@', 1)[1] not in FREE_MAIL_DOMAINS:
+            domains.add(email.split('@', 1)[1])
+    website = _website_key(supplier.get('website'))
+    if website:
+        domains.add(website)
+    return domains
+
+
+def _city(supplier: Dict[str, Any]) -> Optional[str]:
+    """Normalized first part of a record's location ('Dubai, UAE' -> 'dubai')"""
+    city = ' '.join(_words(str(supplier.get('location') or '').split(',')[0]))
+    return city or None
+
+
+def corroborated(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """Whether two records share a company domain or a city"""
+    if _domains(a) & _domains(b):
+        return True
+    city = _city(a)
+    return city is not None and city == _city(b)
+
+
+def blocking_keys(supplier: Dict[str, Any]) -> Set[Tuple[str, str]]:
+    """Exact keys that identify the same company (see also initials)"""
+    keys = set()
+    name = normalize_name(supplier.get('name', ''))
+    if name:
+        keys.add(('name', name))
+        # A bare acronym ('EGA') matches another record's alias
+        compact = name.replace(' ', '')
+        if ' ' not in name and len(compact) >= MIN_ACRONYM_LENGTH:
+            keys.add(('alias', compact))
+    for alias in name_aliases(supplier.get('name', '')):
+        keys.add(('alias', alias))
+    for field in ('contact', 'phone'):
+        value = supplier.get(field)
+        if _email_key(value):
+            keys.add(('email', _email_key(value)))
+        elif _phone_key(value):
+            keys.add(('phone', _phone_key(value)))
+    if _email_key(supplier.get('email')):
+        keys.add(('email', _email_key(supplier.get('email'))))
+    if _website_key(supplier.get('website')):
+        keys.add(('website', _website_key(supplier.get('website'))))
+    return keys
+
+
+class _UnionFind:
+    def __init__(self, size: int):
+        self.parent = list(range(size))
+        self.sizes = [1] * size
+
+    def find(self, i: int) -> int:
+        while self.parent[i] != i:
+            self.parent[i] = self.parent[self.parent[i]]
+            i = self.parent[i]
+        return i
+
+    def union(self, a: int, b: int):
+        a, b = self.find(a), self.find(b)
+        if a != b:
+            # Keep the earlier record as the group's representative
+            self.parent[max(a, b)] = min(a, b)
+            self.sizes[min(a, b)] += self.sizes[max(a, b)]
+
+    def size(self, i: int) -> int:
+        return self.sizes[self.find(i)]
+
+
+def cluster_suppliers(suppliers: List[Dict[str, Any]],
+                      threshold: float = SIMILARITY_THRESHOLD) -> List[List[int]]:
+    """
+    Group indices of records that describe the same supplier
+
+    Args:
+        suppliers: Supplier records
+        threshold: Minimum name-shingle Jaccard similarity for a fuzzy match
+
+    Returns:
+        Groups of indices, in order of each group's first record
+    """
+    uf = _UnionFind(len(suppliers))
+    names = [normalize_name(s.get('name', '')) for s in suppliers]
+
+    def same_company(i: int, j: int) -> bool:
+        # 'Gulf Metals LLC' in Dubai and 'Gulf Metals Ltd' in Mumbai share a name, not a company
+        return corroborated(suppliers[i], suppliers[j])
+
+    # Exact keys: contacts identify one supplier outright; short names and
+    # acronyms only join a group whose first record corroborates them
+    first_with_key = {}
+    name_groups = {}
+    for i, supplier in enumerate(suppliers):
+        for key in blocking_keys(supplier):
+            j = first_with_key.setdefault(key, i)
+            if key[0] == 'alias' or (key[0] == 'name' and len(names[i].split()) <= SHORT_NAME_WORDS):
+                representatives = name_groups.setdefault(key, [])
+                for j in representatives:
+                    if uf.find(j) == uf.find(i):
+                        break
+                    if same_company(i, j):
+                        uf.union(i, j)
+                        break
+                else:
+                    if len(representatives) < MAX_BUCKET_CLUSTERS:
+                        representatives.append(i)
+            elif j != i:
+                uf.union(i, j)
+
+    # Initials only match a record named by that acronym, never other
+    # initials ('Gulf Steel Works' and 'Global Scrap Wholesale' stay apart).
+    # An acronym that fits several companies, or one already tied to a
+    # company, is ambiguous and joins nothing more.
+    by_acronym = {}
+    for i, supplier in enumerate(suppliers):
+        acronym = initials(supplier.get('name', ''))
+        j = first_with_key.get(('alias', acronym)) if acronym else None
+        if j is not None and names[j].replace(' ', '') == acronym and same_company(i, j):
+            by_acronym.setdefault(j, set()).add(uf.find(i))
+    for j, roots in by_acronym.items():
+        if len(roots) == 1 and uf.find(j) not in roots and uf.size(j) == 1:
+            uf.union(j, next(iter(roots)))
+
+    # Fuzzy names: only compare records sharing a MinHash band, and only with
+    # the first record of each group already in the bucket
+    shingles = [_shingles(name) for name in names]
+
+    def fuzzy_match(i: int, j: int) -> bool:
+        a, b = shingles[i], shingles[j]
+        if len(a & b) / len(a | b) < threshold:
+            return False
+        if min(len(names[i].split()), len(names[j].split())) > SHORT_NAME_WORDS:
+            return True
+        # 'Copper Alloys India' vs 'Copper Alloys Indonesia': the name alone isn't enough
+        return same_company(i, j)
+
+    buckets = {}
+    for i, record_shingles in enumerate(shingles):
+        if len(record_shingles) < 2:
+            continue
+        signature = _minhash(record_shingles)
+        for band in range(0, NUM_HASHES, BAND_ROWS):
+            representatives = buckets.setdefault((band, tuple(signature[band:band + BAND_ROWS])), [])
+            root = uf.find(i)
+            for j in representatives:
+                if uf.find(j) == root:
+                    break
+                if fuzzy_match(i, j):
+                    uf.union(i, j)
+                    break
+            else:
+                if len(representatives) < MAX_BUCKET_CLUSTERS:
+                    representatives.append(i)
+
+    groups = {}
+    for i in range(len(suppliers)):
+        groups.setdefault(uf.find(i), []).append(i)
+    return list(groups.values())
+
+
+def merge_records(records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge duplicates into the first record
+
+    Missing fields are filled from later records; other names are kept in
+    'also_known_as'.
+    """
+    records = list(records)
+    merged = dict(records[0])
+    names = []
+    for record in records[1:]:
+        for field, value in record.items():
+            if merged.get(field) in (None, '', []) and value not in (None, '', []):
+                merged[field] = value
+        if record.get('name') and record['name'] != merged.get('name') and record['name'] not in names:
+            names.append(record['name'])
+    if names:
+        merged['also_known_as'] = list(dict.fromkeys(merged.get('also_known_as', []) + names))
+    return merged
+
+
+def deduplicate(suppliers: List[Dict[str, Any]], threshold: float = SIMILARITY_THRESHOLD) -> List[Dict[str, Any]]:
+    """Collapse near-duplicate supplier records, keeping first-seen order"""
+    if len(suppliers) < 2:
+        return list(suppliers)
+    return [merge_records(suppliers[i] for i in group) for group in cluster_suppliers(suppliers, threshold)]
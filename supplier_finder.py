@@ -9,6 +9,9 @@ import requests
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 
+from supplier_catalog import SupplierCatalog, get_supplier_catalog
+from supplier_index import SupplierIndex
+
 sys.path.append('/opt/.manus/.sandbox-runtime')
 
 class SupplierFinder:
@@ -16,8 +19,11 @@ class SupplierFinder:
     Proactive supplier finding and validation system
     """
     
-    def __init__(self):
-        self.supplier_database = self._initialize_supplier_database()
+    def __init__(self, catalog: SupplierCatalog = None):
+        self.catalog = catalog or get_supplier_catalog()
+        # Loaded on first search so startup doesn't wait on a large catalog
+        self._catalog_generation = None
+        self.verified_index = None
         self.search_regions = ["UAE", "India", "China", "Turkey", "Europe", "GCC"]
         self.metal_categories = {
             "copper": ["copper_scrap", "copper_cathode", "copper_wire", "copper_ingot"],
@@ -28,91 +34,43 @@ class SupplierFinder:
             "nickel": ["nickel_scrap", "nickel_alloy", "stainless_steel_scrap"]
         }
     
-    def _initialize_supplier_database(self):
-        """Initialize with known reliable suppliers"""
-        return {
-            "verified_suppliers": [
-                {
-                    "name": "Emirates Metal Trading LLC",
-                    "location": "Dubai, UAE",
-                    "metals": ["copper", "aluminum", "brass"],
-                    "specialization": "Scrap metal processing and trading",
-                    "contact": "info@emiratesmetals.ae",
-                    "phone": "+971-4-XXX-XXXX",
-                    "certifications": ["ISO 9001", "ISRI Certified"],
-                    "payment_terms": "30-60 days",
-                    "capacity": "5000 MT/month",
-                    "reliability_score": 9.2,
-                    "last_updated": "2025-09-15"
-                },
-                {
-                    "name": "Mumbai Metals & Alloys Pvt Ltd",
-                    "location": "Mumbai, India",
-                    "metals": ["copper", "aluminum", "zinc", "lead"],
-                    "specialization": "Non-ferrous metal recycling",
-                    "contact": "sales@mumbaimetal.in",
-                    "phone": "+91-22-XXXX-XXXX",
-                    "certifications": ["ISO 14001", "BIS Certified"],
-                    "payment_terms": "LC at sight",
-                    "capacity": "8000 MT/month",
-                    "reliability_score": 8.8,
-                    "last_updated": "2025-09-15"
-                },
-                {
-                    "name": "Ankara Copper Industries",
-                    "location": "Ankara, Turkey",
-                    "metals": ["copper", "brass"],
-                    "specialization": "Copper scrap and semi-finished products",
-                    "contact": "export@ankaracopper.com.tr",
-                    "phone": "+90-312-XXX-XXXX",
-                    "certifications": ["CE Marking", "ISO 9001"],
-                    "payment_terms": "TT advance 30%",
-                    "capacity": "3000 MT/month",
-                    "reliability_score": 8.5,
-                    "last_updated": "2025-09-15"
-                },
-                {
-                    "name": "Guangzhou Non-Ferrous Metals Co",
-                    "location": "Guangzhou, China",
-                    "metals": ["aluminum", "zinc", "lead"],
-                    "specialization": "Primary and secondary aluminum",
-                    "contact": "international@gznfm.com.cn",
-                    "phone": "+86-20-XXXX-XXXX",
-                    "certifications": ["ISO 9001", "China Compulsory Certification"],
-                    "payment_terms": "LC 90 days",
-                    "capacity": "12000 MT/month",
-                    "reliability_score": 8.3,
-                    "last_updated": "2025-09-15"
-                }
-            ],
-            "potential_suppliers": [
-                {
-                    "name": "European Metals Exchange",
-                    "location": "Rotterdam, Netherlands",
-                    "metals": ["copper", "aluminum", "zinc"],
-                    "status": "Under evaluation",
-                    "contact": "trading@eme-metals.eu",
-                    "notes": "Large capacity, competitive pricing, needs verification"
-                },
-                {
-                    "name": "Delhi Scrap Traders Association",
-                    "location": "New Delhi, India",
-                    "metals": ["copper", "brass", "aluminum"],
-                    "status": "Initial contact made",
-                    "contact": "info@delhiscrap.org",
-                    "notes": "Multiple suppliers network, good for bulk requirements"
-                }
-            ]
-        }
+    def _load_catalog(self):
+        """Build the in-memory index of verified suppliers from the catalog"""
+        generation, suppliers = self.catalog.snapshot("verified")
+        index = SupplierIndex()
+        for supplier_id, supplier in suppliers:
+            index.upsert(supplier_id, supplier)
+        self.verified_index = index
+        self._catalog_generation = generation
+    
+    def _sync_catalog(self):
+        """Apply catalog writes made since the index was built, one supplier at a time"""
+        if self.verified_index is None:
+            self._load_catalog()
+            return
+        if self.catalog.generation == self._catalog_generation:
+            return
+        generation, changes = self.catalog.changes_since(self._catalog_generation, "verified")
+        if changes is None:
+            self._load_catalog()
+            return
+        for supplier_id, supplier in changes:
+            self.verified_index.upsert(supplier_id, supplier)
+        self._catalog_generation = generation
     
     def find_suppliers(self, metal: str, region: str = None, quantity: int = None, 
-                      quality_grade: str = None) -> Dict[str, Any]:
+                      quality_grade: str = None, certification: str = None,
+                      payment_terms: str = None, limit: int = None) -> Dict[str, Any]:
         """
         Find suppliers for specific metal requirements
         """
         try:
+            self._sync_catalog()
+            
             # Filter verified suppliers
-            verified_matches = self._filter_verified_suppliers(metal, region)
+            verified_matches = self._filter_verified_suppliers(
+                metal, region, certification=certification, payment_terms=payment_terms, limit=limit
+            )
             
             # Search for new potential suppliers
             potential_matches = self._search_new_suppliers(metal, region, quantity)
@@ -135,20 +93,13 @@ class SupplierFinder:
         except Exception as e:
             return {"error": f"Supplier search failed: {str(e)}"}
     
-    def _filter_verified_suppliers(self, metal: str, region: str = None) -> List[Dict]:
-        """Filter verified suppliers based on criteria"""
-        matches = []
-        
-        for supplier in self.supplier_database["verified_suppliers"]:
-            # Check if supplier handles the requested metal
-            if metal.lower() in [m.lower() for m in supplier["metals"]]:
-                # Check region if specified
-                if region is None or region.lower() in supplier["location"].lower():
-                    matches.append(supplier)
-        
-        # Sort by reliability score
-        matches.sort(key=lambda x: x.get("reliability_score", 0), reverse=True)
-        return matches
+    def _filter_verified_suppliers(self, metal: str, region: str = None, certification: str = None,
+                                   payment_terms: str = None, limit: int = None) -> List[Dict]:
+        """Filter verified suppliers based on criteria, most reliable first"""
+        return self.verified_index.search(
+            metal=metal, region=region, certification=certification,
+            payment_terms=payment_terms, limit=limit
+        )
     
     def _search_new_suppliers(self, metal: str, region: str = None, quantity: int = None) -> List[Dict]:
         """Search for new potential suppliers (mock implementation)"""
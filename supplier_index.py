@@ -0,0 +1,161 @@
+"""
+Supplier Index - Inverted index over the supplier list
+Keeps posting lists for metal, region, certification and payment terms,
+plus the individual words of each location, so a multi-criteria query is a
+set intersection and the top-k results are picked by reliability rank.
+Records can be added, replaced or removed one at a time, so a catalog write
+only touches that supplier's postings.
+"""
+
+import heapq
+import re
+import threading
+from itertools import count
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set
+
+_LOCATION_SPLIT = re.compile(r'\s*[,/&]\s*|\s+and\s+')
+_LOCATION_WORD = re.compile(r'[a-z0-9]+')
+
+FIELDS = ('metal', 'region', 'certification', 'payment_terms', 'location_word')
+
+
+def _key(value: Any) -> str:
+    return str(value).strip().lower()
+
+
+def location_parts(location: Optional[str]) -> List[str]:
+    """Place names in a location ('Dubai & Abu Dhabi, UAE' -> dubai, abu dhabi, uae)"""
+    return [part for part in _LOCATION_SPLIT.split(_key(location or '')) if part]
+
+
+def location_words(location: Optional[str]) -> Set[str]:
+    """Individual words of a location ('Pune India' -> pune, india)"""
+    return set(_LOCATION_WORD.findall(_key(location or '')))
+
+
+class SupplierIndex:
+    """
+    Thread-safe inverted index over supplier records
+
+    Records are the dicts used by SupplierFinder ('metals', 'location',
+    'certifications', 'payment_terms', 'reliability_score'). Records passed
+    to the constructor are keyed by position; upsert() and remove() take
+    any stable key, such as the catalog row id.
+    """
+
+    def __init__(self, suppliers: Iterable[Dict[str, Any]] = (), score_field: str = 'reliability_score'):
+        """
+        Args:
+            suppliers: Initial supplier records
+            score_field: Field ranked on (higher first)
+        """
+        self.score_field = score_field
+        self._records = {}  # key -> record
+        self._rank = {}  # key -> (-score, insertion order); equal scores keep input order
+        self._posted = {}  # key -> (field, value) pairs, for removal
+        self._postings = {field: {} for field in FIELDS}
+        self._order = count()
+        self._lock = threading.Lock()
+
+        for position, supplier in enumerate(suppliers):
+            self.upsert(position, supplier)
+
+    def upsert(self, key: Hashable, supplier: Dict[str, Any]):
+        """Add a supplier, or replace the one stored under key"""
+        postings = set()
+        for metal in supplier.get('metals') or []:
+            postings.add(('metal', _key(metal)))
+        for region in supplier.get('regions') or []:
+            postings.add(('region', _key(region)))
+        for certification in supplier.get('certifications') or []:
+            postings.add(('certification', _key(certification)))
+        if supplier.get('payment_terms'):
+            postings.add(('payment_terms', _key(supplier['payment_terms'])))
+        for part in location_parts(supplier.get('location')):
+            postings.add(('region', part))
+        for word in location_words(supplier.get('location')):
+            postings.add(('location_word', word))
+
+        with self._lock:
+            order = self._rank[key][1] if key in self._rank else next(self._order)
+            self._unpost(key)
+            self._records[key] = supplier
+            self._rank[key] = (-(supplier.get(self.score_field) or 0), order)
+            self._posted[key] = postings
+            for field, value in postings:
+                self._postings[field].setdefault(value, set()).add(key)
+
+    def remove(self, key: Hashable) -> bool:
+        """Drop a supplier; returns False if key is not indexed"""
+        with self._lock:
+            if key not in self._records:
+                return False
+            self._unpost(key)
+            del self._records[key]
+            del self._rank[key]
+            return True
+
+    def _unpost(self, key: Hashable):
+        for field, value in self._posted.pop(key, ()):
+            posting = self._postings[field][value]
+            posting.discard(key)
+            if not posting:
+                del self._postings[field][value]
+
+    def _region_keys(self, region: str) -> Set[Hashable]:
+        # Whole place names, plus locations containing every word of the
+        # query ('india' matches 'Mumbai, India' and 'Pune India')
+        matched = set(self._postings['region'].get(_key(region), ()))
+        words = sorted((self._postings['location_word'].get(word, set())
+                        for word in location_words(region)), key=len)
+        if words:
+            matched |= words[0].intersection(*words[1:])
+        return matched
+
+    def search(self, metal: Optional[str] = None, region: Optional[str] = None,
+               certification: Optional[str] = None, payment_terms: Optional[str] = None,
+               limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Find suppliers matching every given criterion
+
+        Args:
+            metal: Metal handled (case-insensitive)
+            region: Country, city or words of the location
+            certification: Certification held (case-insensitive)
+            payment_terms: Payment terms offered (case-insensitive)
+            limit: Maximum number of results
+
+        Returns:
+            Matching suppliers, most reliable first
+        """
+        with self._lock:
+            postings = []
+            if region is not None:
+                postings.append(self._region_keys(region))
+            for field, value in (('metal', metal), ('certification', certification),
+                                 ('payment_terms', payment_terms)):
+                if value is not None:
+                    postings.append(self._postings[field].get(_key(value), set()))
+
+            if postings:
+                # Intersect smallest first so the working set only shrinks
+                postings.sort(key=len)
+                keys = set(postings[0])
+                for posting in postings[1:]:
+                    if not keys:
+                        break
+                    keys &= posting
+            else:
+                keys = self._records
+
+            rank = self._rank.__getitem__
+            ranked = heapq.nsmallest(limit, keys, key=rank) if limit is not None else sorted(keys, key=rank)
+            return [self._records[key] for key in ranked]
+
+    def values(self, field: str) -> List[str]:
+        """Distinct indexed values of a field"""
+        with self._lock:
+            return sorted(self._postings[field])
+
+    def __len__(self):
+        return len(self._records)
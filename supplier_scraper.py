@@ -0,0 +1,291 @@
+"""
+Supplier Scraper - Cached directory scraping for supplier discovery
+Fetches supplier directory pages through a conditional-GET disk cache
+(ETag/Last-Modified), so repeated searches are served locally and stale
+pages cost a 304 at most. Pages are parsed with a SoupStrainer limited to
+the listing markup and supplier entries are extracted lazily. An offline
+cache directory doubles as a set of recorded fixture pages; a manifest
+maps URLs to hand-editable fixture files.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import quote_plus, urlsplit
+
+import requests
+from bs4 import BeautifulSoup, SoupStrainer
+
+import http_transport
+from fanout import fan_out_iter
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:  # Pure-Python fallback; same results, slower on large pages
+    HTML_PARSER = 'html.parser'
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+DEFAULT_SOURCES_PATH = os.path.join(DATA_DIR, 'supplier_sources.json')
+DEFAULT_CACHE_DIR = os.path.join(DATA_DIR, 'page_cache')
+MANIFEST_NAME = 'manifest.json'
+
+
+class PageCache:
+    """
+    Disk cache of fetched pages keyed by URL
+
+    Layout under root: <sha256(url)>.html holds the body and
+    <sha256(url)>.json holds url, etag, last_modified and fetched_at.
+    An optional manifest.json maps URLs to plain file names under root
+    ({"https://...": "copper_uae.html"}); listed pages are served as
+    recorded and never revalidated, which is how fixture sets are written.
+    """
+
+    def __init__(self, root: str, max_age: float = 21600.0, offline: bool = False):
+        """
+        Args:
+            root: Cache directory
+            max_age: Seconds a page is served without revalidation
+            offline: Never touch the network; serve whatever is cached (fixture mode)
+        """
+        self.root = root
+        self.max_age = max_age
+        self.offline = offline
+        self.hits = 0
+        self.revalidated = 0
+        self.downloads = 0
+        self._lock = threading.Lock()
+        self._manifest = None
+
+    def _path(self, url: str) -> str:
+        return os.path.join(self.root, hashlib.sha256(url.encode('utf-8')).hexdigest())
+
+    def _manifest_file(self, url: str) -> Optional[str]:
+        if self._manifest is None:
+            try:
+                with open(os.path.join(self.root, MANIFEST_NAME), encoding='utf-8') as f:
+                    self._manifest = json.load(f)
+            except (OSError, ValueError):
+                self._manifest = {}
+        name = self._manifest.get(url)
+        return os.path.join(self.root, name) if name else None
+
+    def load(self, url: str) -> Optional[Dict[str, Any]]:
+        """Cached entry for a URL (meta plus 'body'), or None"""
+        recorded = self._manifest_file(url)
+        if recorded is not None:
+            try:
+                with open(recorded, encoding='utf-8') as f:
+                    return {'url': url, 'body': f.read(), 'fetched_at': float('inf'), 'recorded': True}
+            except OSError:
+                return None
+        path = self._path(url)
+        try:
+            with open(path + '.json', encoding='utf-8') as f:
+                meta = json.load(f)
+            with open(path + '.html', encoding='utf-8') as f:
+                meta['body'] = f.read()
+            return meta
+        except (OSError, ValueError):
+            return None
+
+    def store(self, url: str, body: Optional[str], etag: Optional[str] = None,
+              last_modified: Optional[str] = None):
+        """Write (or, with body None, just re-stamp) a cache entry atomically"""
+        os.makedirs(self.root, exist_ok=True)
+        path = self._path(url)
+        if body is not None:
+            self._write_atomic(path + '.html', body)
+        meta = {'url': url, 'etag': etag, 'last_modified': last_modified, 'fetched_at': time.time()}
+        self._write_atomic(path + '.json', json.dumps(meta))
+
+    def _write_atomic(self, path: str, text: str):
+        # A unique temp file per writer, so concurrent fetches of one URL can't interleave
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def get(self, url: str, headers: Dict[str, str] = None,
+            before_request: Callable[[str], Any] = None) -> str:
+        """
+        Get a page body, going to the network only when the cache can't answer
+
+        Args:
+            url: Page URL
+            headers: Extra request headers (User-Agent, ...)
+            before_request: Called with the URL right before a network request
+                (rate limiting)
+
+        Returns:
+            Page HTML
+
+        Raises:
+            LookupError: Offline and the page was never recorded
+            requests.HTTPError: Error status, or a 304 with nothing cached to reuse
+        """
+        cached = self.load(url)
+        if cached is not None and (self.offline or time.time() - cached.get('fetched_at', 0) < self.max_age):
+            with self._lock:
+                self.hits += 1
+            return cached['body']
+        if self.offline:
+            raise LookupError(f'No recorded page for {url}')
+
+        request_headers = dict(headers or {})
+        if cached is not None:
+            if cached.get('etag'):
+                request_headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                request_headers['If-Modified-Since'] = cached['last_modified']
+
+        if before_request is not None:
+            before_request(url)
+        response = http_transport.request('GET', url, headers=request_headers)
+
+        if response.status_code == 304 and cached is not None:
+            self.store(url, None, cached.get('etag'), cached.get('last_modified'))
+            with self._lock:
+                self.revalidated += 1
+            return cached['body']
+        if response.status_code == 304:
+            # We sent no validators, so there is no body to reuse; never cache an empty page
+            raise requests.HTTPError(f'304 Not Modified for {url} with no cached copy', response=response)
+
+        response.raise_for_status()
+        self.store(url, response.text, response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        with self._lock:
+            self.downloads += 1
+        return response.text
+
+    def stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        return {
+            'root': self.root,
+            'offline': self.offline,
+            'hits': self.hits,
+            'revalidated': self.revalidated,
+            'downloads': self.downloads
+        }
+
+
+class DirectorySource:
+    """
+    One supplier directory: a search URL template and the selectors for its listing
+
+    Config keys: name, url (with {query}, {metal}, {region} placeholders),
+    item (CSS selector of one supplier entry), fields (record field -> CSS
+    selector, 'selector@attr' for an attribute) and optional listing
+    ({'name': tag, 'attrs': {...}} limiting what gets parsed).
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.name = config['name']
+        self.url = config['url']
+        self.item = config['item']
+        self.fields = config.get('fields', {})
+        listing = config.get('listing')
+        self.strainer = SoupStrainer(listing.get('name'), attrs=listing.get('attrs', {})) if listing else None
+
+    def url_for(self, query: str, metal: str, region: str) -> str:
+        """Search URL for a query"""
+        return self.url.format(query=quote_plus(query), metal=quote_plus(metal), region=quote_plus(region))
+
+    def parse(self, html: str, source_url: str) -> Iterator[Dict[str, Any]]:
+        """
+        Extract supplier entries from a page, one at a time
+
+        Only the listing markup is parsed when a listing strainer is configured.
+        """
+        soup = BeautifulSoup(html, HTML_PARSER, parse_only=self.strainer)
+        for item in soup.select(self.item):
+            supplier = {}
+            for field, selector in self.fields.items():
+                selector, _, attr = selector.partition('@')
+                element = item.select_one(selector) if selector else item
+                if element is None:
+                    continue
+                value = element.get(attr) if attr else element.get_text(' ', strip=True)
+                if value:
+                    supplier[field] = value.strip()
+            if supplier.get('name'):
+                if supplier.get('email', '').startswith('mailto:'):
+                    supplier['email'] = supplier['email'][len('mailto:'):]
+                supplier.update(source=self.name, source_url=source_url, verified=False)
+                yield supplier
+
+
+def load_sources(path: str) -> List[DirectorySource]:
+    """Load directory sources from a JSON list; a missing file means scraping is off"""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as f:
+        return [DirectorySource(config) for config in json.load(f)]
+
+
+class SupplierScraper:
+    """
+    Parallel, cached scraping of every configured directory
+    """
+
+    def __init__(self, sources: List[DirectorySource], cache: PageCache,
+                 headers: Dict[str, str] = None, before_request: Callable[[str], Any] = None,
+                 timeout: float = 20.0):
+        """
+        Args:
+            sources: Directories to search
+            cache: Page cache (offline for fixture runs)
+            headers: Request headers
+            before_request: Called with each URL before it goes to the network
+            timeout: Seconds to wait for all pages
+        """
+        self.sources = sources
+        self.cache = cache
+        self.headers = headers or {}
+        self.before_request = before_request
+        self.timeout = timeout
+
+    def plan(self, queries: List[str], metal: str, region: str) -> Dict[str, DirectorySource]:
+        """Distinct URLs to fetch for a set of queries"""
+        urls = {}
+        for query in queries:
+            for source in self.sources:
+                urls.setdefault(source.url_for(query, metal, region), source)
+        return urls
+
+    def scrape_page(self, url: str, source: DirectorySource, limit: int = None) -> List[Dict[str, Any]]:
+        """Fetch (through the cache) and parse one page"""
+        html = self.cache.get(url, self.headers, self.before_request)
+        suppliers = []
+        for supplier in source.parse(html, url):
+            suppliers.append(supplier)
+            if limit is not None and len(suppliers) >= limit:
+                break
+        return suppliers
+
+    def scrape_calls(self, queries: List[str], metal: str, region: str,
+                     limit: int = None) -> Dict[str, Callable[[], List[Dict[str, Any]]]]:
+        """One zero-argument call per distinct page, for the caller's fan-out"""
+        return {
+            url: (lambda url=url, source=source: self.scrape_page(url, source, limit))
+            for url, source in self.plan(queries, metal, region).items()
+        }
+
+    def search(self, queries: List[str], metal: str, region: str, limit: int = None) -> List[Dict[str, Any]]:
+        """Scrape every page for the queries in parallel; failed pages are skipped"""
+        suppliers = []
+        for url, found, error in fan_out_iter(self.scrape_calls(queries, metal, region, limit), self.timeout):
+            if error is not None:
+                print(f"Error scraping {urlsplit(url).netloc}: {error}")
+                continue
+            suppliers.extend(found)
+        return suppliers
@@ -0,0 +1,20 @@
+"""
+Test setup - run the top-level modules from a checkout
+Puts the repository root on sys.path and points the on-disk stores at a
+temporary directory before anything imports them.
+"""
+
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_STATE_DIR = tempfile.mkdtemp(prefix='layla-tests-')
+os.environ.setdefault('OPENAI_API_KEY', 'test')
+os.environ.setdefault('ALERTS_DB_PATH', os.path.join(_STATE_DIR, 'alerts.db'))
+os.environ.setdefault('SUPPLIER_CATALOG_PATH', os.path.join(_STATE_DIR, 'suppliers.db'))
+os.environ.setdefault('CONVERSATION_DB_PATH', os.path.join(_STATE_DIR, 'conversations.db'))
+os.environ.setdefault('BAR_STORE_DIR', os.path.join(_STATE_DIR, 'bars'))
+os.environ.setdefault('LAYLA_ANALYSIS_PATH', os.path.join(_STATE_DIR, 'layla_analysis.json'))
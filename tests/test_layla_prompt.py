@@ -0,0 +1,46 @@
+from types import SimpleNamespace
+
+import layla
+from price_refresher import PriceSnapshot
+
+
+def _snapshot(copper_price, version):
+    return PriceSnapshot({
+        'lme_prices': {
+            'copper': {'metal': 'Copper', 'price_usd_per_tonne': copper_price, 'change_percent': 0.4},
+            'aluminum': {'metal': 'Aluminum', 'price_usd_per_tonne': 2580.0, 'change_percent': -0.1}
+        }
+    }, version)
+
+
+def _prompt_messages(monkeypatch, snapshot, message, history=None):
+    """Messages the agent sends to the LLM for one request"""
+    sent = {}
+
+    def create(**completion_args):
+        sent.update(completion_args)
+        reply = SimpleNamespace(message=SimpleNamespace(content='ok'))
+        return SimpleNamespace(choices=[reply])
+
+    monkeypatch.setattr(layla.price_refresher, 'get_snapshot', lambda: snapshot)
+    monkeypatch.setattr(layla.client.chat.completions, 'create', create)
+    layla.LaylaAgent().generate_response_with_usage(message, history)
+    return sent['messages']
+
+
+def test_static_prefix_is_byte_identical_across_requests(monkeypatch):
+    first = _prompt_messages(monkeypatch, _snapshot(9412.5, 1), 'Should we buy copper?')
+    second = _prompt_messages(
+        monkeypatch, _snapshot(9530.0, 2), 'What about aluminium?',
+        [{'role': 'user', 'content': 'hi'}, {'role': 'assistant', 'content': 'hello'}]
+    )
+
+    assert first[0]['content'].encode('utf-8') == second[0]['content'].encode('utf-8')
+    assert first[1]['content'] != second[1]['content']
+
+
+def test_live_prices_come_before_market_intelligence(monkeypatch):
+    messages = _prompt_messages(monkeypatch, _snapshot(9412.5, 1), 'Should we buy copper?')
+
+    assert messages[1]['content'].startswith('Current LME market data:')
+    assert messages[2]['content'].startswith('Market intelligence:')
@@ -0,0 +1,42 @@
+import pytest
+
+from prompt_encoding import render_compact_market_data, render_market_data
+
+MARKET_DATA = {
+    'lme_prices': {
+        'tin': {'error': 'No LME data available for tin', 'metal': 'tin'},
+        'aluminum': {
+            'price_usd_per_tonne': 2580.0, 'change_percent': -0.12,
+            'trading_status': 'Open'
+        },
+        'copper': {
+            'price_usd_per_tonne': 10251.48, 'change_percent': 0.43,
+            'day_low_usd_per_tonne': 10141.3, 'day_high_usd_per_tonne': 10362.2,
+            'trading_status': 'Open'
+        },
+        'cobalt': {'price': 33000, 'change': 1}
+    },
+    'timestamp': '2025-09-15T10:00:00'
+}
+
+
+def test_compact_rendering_is_pinned():
+    assert render_compact_market_data(MARKET_DATA) == (
+        'LME USD/t: metal price chg% [day low-high]\n'
+        'copper 10251.48 +0.43% [10141.3-10362.2]\n'
+        'aluminum 2580 -0.12%\n'
+        'tin n/a\n'
+        'cobalt 33000 +1.00%\n'
+        'session: Open'
+    )
+
+
+def test_error_response_renders_as_error_line():
+    rendered = render_compact_market_data({'error': 'LME prices warming up', 'status': 'unavailable'})
+
+    assert rendered == 'LME market data error: LME prices warming up'
+
+
+def test_unknown_format_is_rejected():
+    with pytest.raises(ValueError):
+        render_market_data(MARKET_DATA, 'yaml')
@@ -0,0 +1,55 @@
+import os
+
+import pytest
+import requests
+
+import supplier_scraper
+from supplier_scraper import PageCache, SupplierScraper, load_sources
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'scraper')
+
+
+def _offline_scraper():
+    cache = PageCache(os.path.join(FIXTURES, 'pages'), offline=True)
+    return SupplierScraper(load_sources(os.path.join(FIXTURES, 'sources.json')), cache)
+
+
+def test_offline_search_parses_recorded_listing():
+    scraper = _offline_scraper()
+
+    suppliers = scraper.search(['copper scrap UAE', 'never recorded'], 'copper', 'UAE')
+
+    assert [s['name'] for s in suppliers] == ['Al Noor Copper Trading LLC', 'Desert Metals Recycling']
+    assert suppliers[0]['email'] == 'sales@alnoorcopper.ae'
+    assert suppliers[0]['website'] == 'https://alnoorcopper.ae'
+    assert suppliers[0]['source'] == 'Gulf Metals Directory'
+    assert scraper.cache.stats()['hits'] == 1
+    assert scraper.cache.stats()['downloads'] == 0
+
+
+def test_offline_cache_never_fetches_unrecorded_pages():
+    cache = PageCache(os.path.join(FIXTURES, 'pages'), offline=True)
+
+    with pytest.raises(LookupError):
+        cache.get('https://directory.example/search?q=tin')
+
+
+def test_not_modified_without_cached_copy_is_not_stored(tmp_path, monkeypatch):
+    response = requests.Response()
+    response.status_code = 304
+    monkeypatch.setattr(supplier_scraper.http_transport, 'request', lambda *args, **kwargs: response)
+    cache = PageCache(str(tmp_path))
+
+    with pytest.raises(requests.HTTPError):
+        cache.get('https://directory.example/search?q=lead')
+    assert cache.load('https://directory.example/search?q=lead') is None
+
+
+def test_store_leaves_no_temp_files(tmp_path):
+    cache = PageCache(str(tmp_path))
+
+    cache.store('https://directory.example/a', '<html></html>', etag='"v1"')
+    cache.store('https://directory.example/a', None, etag='"v1"')
+
+    assert cache.load('https://directory.example/a')['body'] == '<html></html>'
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]